@@ -8,9 +8,12 @@ erop te klikken en grappige uitspraken te zien.
 
 import streamlit as st
 import robot_display
-import quote_generator
+import quote_session
 import styles
-from constants import APP_TITLE, APP_DESCRIPTION
+import metrics
+import click_analytics
+import state_backend
+from constants import APP_TITLE, APP_DESCRIPTION, CLIENT_QUOTE_MODE
 
 
 def setup_page_config():
@@ -34,28 +37,60 @@ def initialize_session():
     Zorgt ervoor dat alle benodigde sessie-variabelen bestaan en juist zijn ingesteld.
     """
     # Initialiseer quote generator sessie-state
-    quote_generator.initialize_session_state()
+    quote_session.initialize_session_state()
     
-    # Initialiseer click counter als die nog niet bestaat
+    # Initialiseer click counter als die nog niet bestaat (met een gedeelde
+    # state backend hersteld van een eerder bezoek)
     if 'click_count' not in st.session_state:
-        st.session_state.click_count = 0
-    
-    # Initialiseer huidige quote als die nog niet bestaat
-    if 'current_quote' not in st.session_state:
-        st.session_state.current_quote = "Klik op de robot om een grappige uitspraak te zien!"
+        st.session_state.click_count = state_backend.get_restored_state().get("click_count", 0)
 
 
-def handle_robot_click():
+def handle_robot_click(clicks=1):
     """
-    Afhandeling van een klik op de robot.
+    Afhandeling van een of meer klikken op de robot.
+    
+    Kiest een nieuwe uitspraak en verhoogt de click counter. Wordt als
+    on_click callback gebruikt: Streamlit voert hem uit vóór de rerun van het
+    fragment, dus er is geen extra st.rerun() nodig. Klikken die samen
+    binnenkomen worden in deze ene rerun verwerkt; de rate limiter van de
+    sessie bepaalt hoeveel er meetellen (zie click_limiter.py).
     
-    Genereert een nieuwe uitspraak en verhoogt de click counter.
+    Args:
+        clicks (int, optional): Aantal klikken dat samen binnenkwam. Default is 1.
     """
-    st.session_state.click_count += 1
-    st.session_state.current_quote = quote_generator.get_next_quote_with_state()
+    decision = quote_session.admit_clicks(clicks)
+    if not decision.accepted:
+        return
+    
+    st.session_state.click_count += decision.accepted
+    for _ in range(decision.applied):
+        quote_session.get_next_quote_with_state()
+    metrics.count(metrics.CLICKS_METRIC, decision.accepted)
+    click_analytics.record_click(
+        st.session_state.quote_index, quote_session.current_session_id(), count=decision.accepted,
+        quote_id=st.session_state.get(quote_session.QUOTE_ID_KEY)
+    )
     
-    # Forceer een refresh van de pagina om de nieuwe uitspraak te tonen
-    st.rerun()
+    # Klik en cursor in één round trip naar de gedeelde backend; het totaal van
+    # de backend telt ook klikken in andere tabbladen of processen mee
+    persisted_count = state_backend.persist_clicks(
+        st.session_state.quote_index, clicks=decision.accepted,
+        quote_id=st.session_state.get(quote_session.QUOTE_ID_KEY)
+    )
+    if persisted_count is not None:
+        st.session_state.click_count = persisted_count
+
+
+def reset_session():
+    """
+    Zet de click counter en de uitspraken terug naar de beginsituatie.
+    """
+    st.session_state.click_count = 0
+    st.session_state.pop(quote_session.CLICKS_REJECTED_KEY, None)
+    st.session_state.pop(quote_session.CLICKS_COALESCED_KEY, None)
+    quote_session.reset_session_state()
+    state_backend.reset_persisted_state()
+    click_analytics.record_reset(quote_session.current_session_id())
 
 
 def display_header():
@@ -79,14 +114,18 @@ def display_quote_section():
     """
     # Gebruik de HTML generator uit styles.py voor mooiere quotes
     quote_html = styles.create_quote_html(
-        st.session_state.current_quote,
+        quote_session.get_current_quote(),
         is_new=(st.session_state.click_count > 0)
     )
     st.markdown(quote_html, unsafe_allow_html=True)
     
     # Toon een subtiele indicator voor het aantal clicks
     if st.session_state.click_count > 0:
-        st.caption(f"Je hebt de robot {st.session_state.click_count} keer geklikt")
+        caption = f"Je hebt de robot {st.session_state.click_count} keer geklikt"
+        rejected = st.session_state.get(quote_session.CLICKS_REJECTED_KEY, 0)
+        if rejected:
+            caption += f" ({rejected} te snelle klikken genegeerd)"
+        st.caption(caption)
 
 
 def display_robot_section():
@@ -94,24 +133,56 @@ def display_robot_section():
     Toont de robot sectie inclusief klikbare robot afbeelding.
     
     De klikbaarheid van de robot is nu geïmplementeerd in de robot_display module.
-    Voor toegankelijkheid is er ook nog een extra knop beschikbaar.
+    Voor toegankelijkheid is er ook nog een extra knop beschikbaar. In de
+    client-side quote modus is de robot zelf een toetsenbord-bedienbare knop
+    en zou de extra knop alleen een server round trip toevoegen.
     """
     # Container voor robot weergave
     robot_container = st.container()
     
     with robot_container:
         # Gebruik de robot_display module om de robot weer te geven
-        # De robot is nu direct klikbaar en verwerkt kliks intern
-        success = robot_display.display_robot()
+        # De robot is direct klikbaar en roept bij een klik handle_robot_click aan
+        success = robot_display.display_robot(
+            on_click=handle_robot_click,
+            client_mode=CLIENT_QUOTE_MODE
+        )
         
         if not success:
             st.info("Zorg ervoor dat de assets directory bestaat met een robot.svg bestand.")
             return
         
+        if CLIENT_QUOTE_MODE:
+            return
+        
         # Een zichtbare button onder de robot voor alternatieve klikinteractie
         # (Voor toegankelijkheidsdoeleinden)
-        if st.button("Klik op de Robot", key="robot_button", help="Alternatieve knop voor een nieuwe uitspraak"):
-            handle_robot_click()
+        st.button("Klik op de Robot", key="robot_button", help="Alternatieve knop voor een nieuwe uitspraak",
+                  on_click=handle_robot_click)
+
+
+@st.fragment
+def display_interactive_section():
+    """
+    Toont de uitspraak en de klikbare robot als geïsoleerd fragment.
+    
+    Een klik op de robot of de knop herlaadt alleen dit fragment, niet de hele
+    pagina: paginaconfiguratie, stijlen, header en footer blijven staan.
+    """
+    metrics.count(metrics.RERUNS_METRIC, scope="fragment")
+    try:
+        # Toon de huidige uitspraak sectie (in client-side modus toont de
+        # robot component de uitspraak zelf)
+        if not CLIENT_QUOTE_MODE:
+            with metrics.timed("display_quote_section"):
+                display_quote_section()
+        
+        # Toon de robot sectie
+        with metrics.timed("display_robot_section"):
+            display_robot_section()
+        
+    except Exception as e:
+        st.error(f"Er is een fout opgetreden: {str(e)}")
 
 
 def add_extra_features():
@@ -128,11 +199,7 @@ def add_extra_features():
     
     with col1:
         # Reset knop om alle uitspraken opnieuw te beginnen
-        if st.button("Reset", help="Begin opnieuw met de uitspraken"):
-            st.session_state.click_count = 0
-            st.session_state.quote_index = None
-            st.session_state.current_quote = "Klik op de robot om een grappige uitspraak te zien!"
-            st.rerun()
+        st.button("Reset", key="reset_button", help="Begin opnieuw met de uitspraken", on_click=reset_session)
     
     with col2:
         # Voeg een footer met credits toe
@@ -144,33 +211,44 @@ def main():
     """
     Hoofdfunctie die de Streamlit applicatie initialiseert en draait.
     
-    Deze functie coördineert alle componenten van de applicatie.
+    Deze functie coördineert alle componenten van de applicatie. Met
+    STAN_METRICS=1 wordt de duur van elke sectie vastgelegd (zie metrics.py).
     """
     try:
         # Setup pagina configuratie
-        setup_page_config()
+        with metrics.timed("setup_page_config"):
+            setup_page_config()
+        
+        # Start (eenmalig) het metrics endpoint en tel de rerun
+        metrics.start_exporter()
+        metrics.count(metrics.RERUNS_METRIC, scope="app")
         
         # Initialiseer de sessie-state
-        initialize_session()
+        with metrics.timed("initialize_session"):
+            initialize_session()
         
         # Pas de stijlen toe
-        styles.apply_styles()
+        with metrics.timed("apply_styles"):
+            styles.apply_styles()
         
         # Toon de header
-        display_header()
+        with metrics.timed("display_header"):
+            display_header()
         
-        # Toon de huidige uitspraak sectie
-        display_quote_section()
-        
-        # Toon de robot sectie
-        display_robot_section()
+        # Toon de uitspraak en de robot (herlaadt los bij een klik)
+        with metrics.timed("display_interactive_section"):
+            display_interactive_section()
         
         # Voeg extra features toe
-        add_extra_features()
+        with metrics.timed("add_extra_features"):
+            add_extra_features()
         
     except Exception as e:
         st.error(f"Er is een fout opgetreden: {str(e)}")
         st.info("Probeer de pagina te vernieuwen of neem contact op met de ontwikkelaar.")
+    
+    finally:
+        metrics.write_metrics_file()
 
 
 # Entry point voor de applicatie
@@ -0,0 +1,328 @@
+"""
+Asset Build Module voor Stan de GitHub Agent.
+
+Deze module maakt vanuit een SVG asset een set varianten, elk in de static
+directory onder een naam met content-hash:
+
+- een geminificeerde SVG (schaalt naar elke breedte)
+- gzip (en, als het `brotli` package aanwezig is, brotli) voorgecomprimeerde
+  versies daarvan, die static_server.py serveert als de browser dat accepteert
+- PNG en WebP rasters op de gangbare breedtes (ROBOT_RASTER_WIDTHS)
+
+Pillow kan zelf geen SVG lezen. De rasters worden daarom gemaakt van één
+rendering op de grootste breedte via `cairosvg`, of van een PNG naast de SVG in
+de assets directory (bijv. assets/robot.png); Pillow schaalt die daarna naar
+elke breedte. Is geen van beide beschikbaar, dan bestaan er alleen SVG
+varianten.
+
+Per bron (content-hash) en configuratie wordt één manifest bewaard, zodat de
+build maar één keer per asset wordt uitgevoerd. `get_variant_src()` kiest de
+kleinste variant die voor een gevraagde breedte geschikt is; zolang de build
+nog niet klaar is (in een achtergrondthread, of vooraf via `ensure_variants()`
+in warmup.py) geeft het de originele asset.
+
+Gebruik:
+    python asset_build.py
+    python asset_build.py --widths 150 300 600
+"""
+
+import io
+import os
+import re
+import gzip
+import json
+import hashlib
+import argparse
+import threading
+from constants import (
+    ROBOT_IMAGE_PATH,
+    ROBOT_RASTER_WIDTHS,
+    ROBOT_RASTER_FORMATS,
+    ASSET_SERVING_MODE
+)
+from asset_registry import get_registry
+
+try:
+    import cairosvg
+except ImportError:
+    cairosvg = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Versie van de build; verhoog bij een wijziging die andere varianten oplevert
+BUILD_VERSION = 1
+
+
+def minify_svg(data):
+    """
+    Verkleint een SVG zonder de weergave te veranderen.
+
+    Verwijdert de XML declaratie, commentaar en witruimte tussen tags.
+
+    Args:
+        data (bytes): De SVG inhoud
+
+    Returns:
+        bytes: De geminificeerde SVG
+    """
+    text = data.decode("utf-8")
+    text = re.sub(r"<\?xml[^>]*\?>", "", text)
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.S)
+    text = re.sub(r">\s+<", "><", text)
+    text = re.sub(r"\s{2,}", " ", text)
+    return text.strip().encode("utf-8")
+
+
+def _content_hash(data):
+    """Verkorte SHA-256 hash, zelfde vorm als AssetEntry.content_hash."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _write_atomic(path, data):
+    """Schrijft een bestand atomair, als het nog niet bestaat."""
+    if os.path.exists(path):
+        return
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as output_file:
+        output_file.write(data)
+    os.replace(temp_path, path)
+
+
+def _raster_source(entry, max_width):
+    """
+    Geeft een Pillow afbeelding om de rasters van te maken, of None.
+
+    Args:
+        entry (AssetEntry): De SVG asset
+        max_width (int): Grootste gevraagde breedte
+
+    Returns:
+        PIL.Image.Image: RGBA afbeelding, of None als er geen rasterbron is
+    """
+    # Pillow pas hier laden, zodat een import van deze module goedkoop blijft
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    png_path = os.path.splitext(entry.path)[0] + ".png"
+    if os.path.exists(png_path):
+        return Image.open(png_path).convert("RGBA")
+    if cairosvg is not None:
+        png_data = cairosvg.svg2png(bytestring=entry.data, output_width=max_width)
+        return Image.open(io.BytesIO(png_data)).convert("RGBA")
+    return None
+
+
+def build_variants(name=ROBOT_IMAGE_PATH, widths=ROBOT_RASTER_WIDTHS,
+                   formats=ROBOT_RASTER_FORMATS, registry=None):
+    """
+    Bouwt (of hergebruikt) de varianten van een SVG asset.
+
+    Args:
+        name (str, optional): Bestandsnaam binnen de assets directory of een absoluut pad
+        widths (tuple, optional): Breedtes in pixels voor de rasters
+        formats (tuple, optional): Rasterformaten ("png", "webp")
+        registry (AssetRegistry, optional): Registry; default de procesbrede
+
+    Returns:
+        dict: Manifest met de bron-hash en een lijst varianten
+            ({"name", "format", "width", "bytes", "encodings"})
+
+    Raises:
+        OSError: Als de asset niet gelezen of de static directory niet beschreven kan worden
+    """
+    registry = registry or get_registry()
+    entry = registry.get(name)
+    stem = os.path.splitext(os.path.basename(entry.path))[0]
+    widths = tuple(sorted(set(int(width) for width in widths)))
+    png_path = os.path.splitext(entry.path)[0] + ".png"
+    config = {"version": BUILD_VERSION, "widths": widths, "formats": tuple(formats),
+              "brotli": brotli is not None, "rasterizer": cairosvg is not None,
+              "png_source": registry.get(png_path).content_hash if os.path.exists(png_path) else None}
+    config_hash = _content_hash(json.dumps(config, sort_keys=True).encode("utf-8"))
+
+    static_dir = registry.static_dir
+    manifest_path = os.path.join(static_dir, f"{stem}.{entry.content_hash}.{config_hash}.variants.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if all(os.path.exists(os.path.join(static_dir, variant["name"])) for variant in manifest["variants"]):
+            return manifest
+
+    os.makedirs(static_dir, exist_ok=True)
+    variants = []
+
+    # Geminificeerde SVG met voorgecomprimeerde versies
+    svg_data = minify_svg(entry.data)
+    svg_name = f"{stem}.{_content_hash(svg_data)}.svg"
+    _write_atomic(os.path.join(static_dir, svg_name), svg_data)
+    gzip_data = gzip.compress(svg_data, 9, mtime=0)
+    _write_atomic(os.path.join(static_dir, svg_name + ".gz"), gzip_data)
+    encodings = {"gzip": len(gzip_data)}
+    if brotli is not None:
+        br_data = brotli.compress(svg_data, quality=11)
+        _write_atomic(os.path.join(static_dir, svg_name + ".br"), br_data)
+        encodings["br"] = len(br_data)
+    variants.append({"name": svg_name, "format": "svg", "width": None,
+                     "bytes": len(svg_data), "encodings": encodings})
+
+    # Rasters, van groot naar klein geschaald uit één bron
+    source = _raster_source(entry, widths[-1]) if widths else None
+    if source is not None:
+        from PIL import Image
+        for width in widths:
+            height = max(round(source.height * width / source.width), 1)
+            image = source.resize((width, height), Image.LANCZOS)
+            for image_format in formats:
+                buffer = io.BytesIO()
+                if image_format == "webp":
+                    image.save(buffer, "WEBP", quality=90, method=6)
+                else:
+                    image.save(buffer, "PNG", optimize=True)
+                data = buffer.getvalue()
+                variant_name = f"{stem}-{width}w.{_content_hash(data)}.{image_format}"
+                _write_atomic(os.path.join(static_dir, variant_name), data)
+                variants.append({"name": variant_name, "format": image_format, "width": width,
+                                 "bytes": len(data), "encodings": {}})
+
+    manifest = {"source": entry.content_hash, "config": config, "variants": variants}
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+
+def pick_variant(manifest, width, formats=("svg",) + ROBOT_RASTER_FORMATS):
+    """
+    Kiest de kleinste variant die op de gevraagde breedte scherp blijft.
+
+    Een SVG is op elke breedte geschikt; een raster alleen als hij minstens zo
+    breed is als gevraagd.
+
+    Args:
+        manifest (dict): Resultaat van build_variants
+        width (int): Gevraagde weergavebreedte in pixels
+        formats (tuple, optional): Toegestane formaten
+
+    Returns:
+        dict: De gekozen variant, of None als er geen geschikte is
+    """
+    suitable = [
+        variant for variant in manifest["variants"]
+        if variant["format"] in formats and (variant["width"] is None or variant["width"] >= width)
+    ]
+    return min(suitable, key=lambda variant: variant["bytes"]) if suitable else None
+
+
+# Gebouwde manifests per (bron, signatuur van het bestand); None als de build mislukte
+_manifests = {}
+_manifests_lock = threading.Lock()
+# Sleutels waarvoor een build in een achtergrondthread loopt
+_building = set()
+
+
+def _manifest_key(registry, name):
+    """Geeft de sleutel van een asset in _manifests (pad en signatuur van het bestand)."""
+    entry = registry.get(name)
+    return entry.path, entry.signature
+
+
+def ensure_variants(name=ROBOT_IMAGE_PATH):
+    """
+    Bouwt de varianten van een asset (als dat nog niet gebeurd is) en wacht erop.
+
+    Bedoeld voor de start van het proces (warmup.py) en de achtergrondthread
+    van get_variant_src; een request roept dit niet zelf aan.
+
+    Args:
+        name (str, optional): Bestandsnaam binnen de assets directory of een absoluut pad
+
+    Returns:
+        dict: Het manifest, of None als de build mislukte (bijv. een static
+            directory zonder schrijfrechten)
+    """
+    registry = get_registry()
+    key = _manifest_key(registry, name)
+    if key in _manifests:
+        return _manifests[key]
+    try:
+        manifest = build_variants(name, registry=registry)
+    except OSError:
+        manifest = None
+    with _manifests_lock:
+        _manifests[key] = manifest
+    return manifest
+
+
+def _build_in_background(name, key):
+    """Bouwt de varianten in een achtergrondthread (hooguit één per asset)."""
+    with _manifests_lock:
+        if key in _manifests or key in _building:
+            return
+        _building.add(key)
+
+    def run():
+        try:
+            ensure_variants(name)
+        finally:
+            with _manifests_lock:
+                _building.discard(key)
+
+    threading.Thread(target=run, name="stan-asset-build", daemon=True).start()
+
+
+def get_variant_src(name=ROBOT_IMAGE_PATH, width=300, mode=ASSET_SERVING_MODE):
+    """
+    Geeft de <img src> van de kleinste geschikte variant voor een breedte.
+
+    In de "static" modus is dat een URL naar de variant; in de "inline" modus
+    (of als de static directory niet beschreven kan worden) een data URI van de
+    variant. Valt ook dat terug, dan de originele asset.
+
+    Het bouwen (minify, gzip/brotli, rasters) gebeurt nooit binnen een request:
+    zolang er geen manifest is, wordt de originele asset geserveerd en start
+    een achtergrondthread de build. warmup.py bouwt de varianten vooraf.
+
+    Args:
+        name (str, optional): Bestandsnaam binnen de assets directory of een absoluut pad
+        width (int, optional): Weergavebreedte in pixels
+        mode (str, optional): "static" of "inline". Default uit constants.py.
+
+    Returns:
+        str: URL of data URI
+    """
+    registry = get_registry()
+    key = _manifest_key(registry, name)
+    if key not in _manifests:
+        _build_in_background(name, key)
+        return registry.get_image_src(name, mode)
+
+    manifest = _manifests[key]
+    variant = pick_variant(manifest, width) if manifest is not None else None
+    if variant is None:
+        return registry.get_image_src(name, mode)
+    if mode == "static":
+        return f"{registry.url_prefix}/{variant['name']}"
+    return registry.get_data_uri(os.path.join(registry.static_dir, variant["name"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bouw de varianten van een asset")
+    parser.add_argument("name", nargs="?", default=ROBOT_IMAGE_PATH, help="Asset in de assets directory")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(ROBOT_RASTER_WIDTHS),
+                        help="Breedtes voor de rasters")
+    arguments = parser.parse_args()
+
+    built = build_variants(arguments.name, widths=arguments.widths)
+    print(f"Bron {built['source']} ({len(get_registry().get(arguments.name).data)} bytes):")
+    for built_variant in built["variants"]:
+        width_label = f"{built_variant['width']}px" if built_variant["width"] else "schaalbaar"
+        print(f"  {built_variant['name']}: {built_variant['bytes']} bytes, {width_label}, {built_variant['encodings']}")
+    if cairosvg is None:
+        print("Geen rasters: installeer cairosvg of plaats een PNG naast de SVG")
+    ensure_variants(arguments.name)
+    for requested in (150, 300, 600):
+        print(f"Breedte {requested}: {get_variant_src(arguments.name, requested)}")
@@ -0,0 +1,296 @@
+"""
+Asset Registry Module voor Stan de GitHub Agent.
+
+Deze module laadt de bestanden uit de assets directory één keer per proces en
+houdt de ruwe inhoud en de base64-encoded data URI in het geheugen vast. Een
+rerun van de Streamlit app hoeft daardoor niet opnieuw de schijf te lezen.
+Wijzigingen aan een asset worden opgepikt via een periodieke mtime/inode check.
+
+In de "static" serveermodus worden assets bovendien gepubliceerd in de static
+directory onder een naam met content-hash, zodat de browser ze kan cachen en
+alleen een korte URL per rerun hoeft te worden meegestuurd.
+"""
+
+import os
+import time
+import base64
+import hashlib
+import mimetypes
+import threading
+from constants import (
+    ASSETS_DIR,
+    ASSET_CHECK_INTERVAL,
+    ASSET_SERVING_MODE,
+    STATIC_DIR,
+    STATIC_URL_PREFIX
+)
+
+
+# SVG staat niet in elke mimetypes database, dus registreer het expliciet
+mimetypes.add_type("image/svg+xml", ".svg")
+
+
+class AssetEntry:
+    """
+    Een in het geheugen geladen asset met de metadata die nodig is om
+    wijzigingen op schijf te detecteren.
+    """
+
+    __slots__ = (
+        "path", "data", "mime_type", "signature", "checked_at",
+        "_base64", "_content_hash", "published_name"
+    )
+
+    def __init__(self, path, data, mime_type, signature, checked_at):
+        self.path = path
+        self.data = data
+        self.mime_type = mime_type
+        self.signature = signature
+        self.checked_at = checked_at
+        self._base64 = None
+        self._content_hash = None
+        self.published_name = None
+
+    @property
+    def base64(self):
+        """str: De base64-encoded inhoud, pas berekend bij eerste gebruik."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode()
+        return self._base64
+
+    @property
+    def data_uri(self):
+        """str: Een data URI die direct in een <img src> gebruikt kan worden."""
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+    @property
+    def content_hash(self):
+        """str: Verkorte SHA-256 hash van de inhoud, gebruikt in bestandsnamen."""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest()[:16]
+        return self._content_hash
+
+    @property
+    def hashed_name(self):
+        """str: Bestandsnaam met content-hash, bijv. robot.0123456789abcdef.svg."""
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        return f"{stem}.{self.content_hash}{ext}"
+
+
+def _file_signature(stat_result):
+    """
+    Bepaalt een signatuur van een bestand op basis van de stat-gegevens.
+
+    Args:
+        stat_result (os.stat_result): Resultaat van os.stat
+
+    Returns:
+        tuple: (mtime_ns, inode, size)
+    """
+    return (stat_result.st_mtime_ns, stat_result.st_ino, stat_result.st_size)
+
+
+class AssetRegistry:
+    """
+    Procesbrede cache voor de bestanden in de assets directory.
+
+    Elke asset wordt bij de eerste aanvraag ingelezen. Daarna wordt hij uit het
+    geheugen geserveerd; pas als `check_interval` seconden zijn verstreken wordt
+    met één os.stat gecontroleerd of het bestand op schijf is gewijzigd.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, check_interval=ASSET_CHECK_INTERVAL,
+                 static_dir=STATIC_DIR, url_prefix=STATIC_URL_PREFIX):
+        self.assets_dir = assets_dir
+        self.check_interval = check_interval
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix.rstrip("/")
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Aparte lock voor de tellers: de snelle route wacht zo niet op een
+        # asset die onder self._lock van schijf wordt gelezen
+        self._stats_lock = threading.Lock()
+
+    def _count(self, hit):
+        """Telt een hit of miss; "+=" is niet atomair bij gelijktijdige sessies."""
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _resolve(self, name):
+        """Zet een assetnaam om naar een absoluut pad."""
+        if os.path.isabs(name):
+            return name
+        return os.path.join(self.assets_dir, name)
+
+    def _load(self, path, now):
+        """Leest een asset van schijf en maakt er een AssetEntry van."""
+        with open(path, "rb") as asset_file:
+            stat_result = os.fstat(asset_file.fileno())
+            data = asset_file.read()
+        mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return AssetEntry(path, data, mime_type, _file_signature(stat_result), now)
+
+    def get(self, name):
+        """
+        Haalt een asset op uit de cache en laadt hem indien nodig (opnieuw) in.
+
+        Args:
+            name (str): Bestandsnaam binnen de assets directory of een absoluut pad
+
+        Returns:
+            AssetEntry: De geladen asset
+
+        Raises:
+            OSError: Als het bestand niet bestaat of niet gelezen kan worden
+        """
+        path = self._resolve(name)
+        now = time.monotonic()
+        entry = self._entries.get(path)
+
+        # Snelle route: recent gecontroleerd, dus geen schijftoegang nodig
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            self._count(hit=True)
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                signature = _file_signature(os.stat(path))
+                if signature == entry.signature:
+                    entry.checked_at = now
+                    self._count(hit=True)
+                    return entry
+
+            entry = self._load(path, now)
+            self._entries[path] = entry
+            self._count(hit=False)
+            return entry
+
+    def get_data_uri(self, name):
+        """
+        Haalt de data URI van een asset op.
+
+        Args:
+            name (str): Bestandsnaam binnen de assets directory of een absoluut pad
+
+        Returns:
+            str: Data URI van de asset
+        """
+        return self.get(name).data_uri
+
+    def publish(self, name):
+        """
+        Publiceert een asset in de static directory onder zijn content-hash naam.
+
+        Het bestand wordt alleen geschreven als het nog niet bestaat. Omdat de
+        naam van de inhoud afhangt, verandert een gepubliceerd bestand nooit en
+        mag de browser het onbeperkt cachen.
+
+        Args:
+            name (str): Bestandsnaam binnen de assets directory of een absoluut pad
+
+        Returns:
+            str: De gepubliceerde bestandsnaam (zonder directory)
+
+        Raises:
+            OSError: Als de asset niet gelezen of de static directory niet
+                beschreven kan worden
+        """
+        entry = self.get(name)
+        if entry.published_name is not None:
+            return entry.published_name
+
+        target = os.path.join(self.static_dir, entry.hashed_name)
+        if not os.path.exists(target):
+            os.makedirs(self.static_dir, exist_ok=True)
+            # Schrijf atomair zodat een gelijktijdige request nooit een half bestand ziet
+            temp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as static_file:
+                static_file.write(entry.data)
+            os.replace(temp_path, target)
+
+        entry.published_name = entry.hashed_name
+        return entry.published_name
+
+    def get_url(self, name):
+        """
+        Geeft de URL van de gepubliceerde, cachebare versie van een asset.
+
+        Args:
+            name (str): Bestandsnaam binnen de assets directory of een absoluut pad
+
+        Returns:
+            str: URL relatief aan de app, bijv. app/static/robot.<hash>.svg
+        """
+        return f"{self.url_prefix}/{self.publish(name)}"
+
+    def get_image_src(self, name, mode=ASSET_SERVING_MODE):
+        """
+        Geeft de waarde voor het src attribuut van een <img> voor een asset.
+
+        In de "static" modus is dat een korte URL; lukt publiceren niet (bijv.
+        een read-only bestandssysteem) dan wordt teruggevallen op een data URI.
+
+        Args:
+            name (str): Bestandsnaam binnen de assets directory of een absoluut pad
+            mode (str, optional): "static" of "inline". Default uit constants.py.
+
+        Returns:
+            str: URL of data URI
+        """
+        if mode == "static":
+            try:
+                return self.get_url(name)
+            except OSError:
+                pass
+        return self.get_data_uri(name)
+
+    def stats(self):
+        """
+        Geeft de cache statistieken terug.
+
+        Returns:
+            dict: Aantal hits, misses en geladen assets
+        """
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self):
+        """Leegt de cache en zet de tellers op nul."""
+        with self._lock, self._stats_lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Eén registry per proces, gedeeld door alle sessies
+_registry = AssetRegistry()
+
+
+def get_registry():
+    """
+    Geeft de procesbrede asset registry terug.
+
+    Returns:
+        AssetRegistry: De gedeelde registry
+    """
+    return _registry
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    registry = get_registry()
+    print("Asset Registry Test\n")
+
+    for i in range(3):
+        entry = registry.get("robot.svg")
+        print(f"Aanvraag {i+1}: {entry.mime_type}, {len(entry.data)} bytes")
+
+    print(f"Data URI prefix: {entry.data_uri[:40]}...")
+    print(f"Image src: {registry.get_image_src('robot.svg')}")
+    print(f"Statistieken: {registry.stats()}")
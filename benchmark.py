@@ -0,0 +1,356 @@
+"""
+Benchmark Module voor Stan de GitHub Agent.
+
+Deze module meet het klikpad en de render pipeline van de app. Met Streamlit's
+AppTest wordt app.py headless doorlopen met een instelbaar aantal sessies,
+klikken en resets. Gerapporteerd worden:
+
+- p50/p99 latency van een script run (klik en reset)
+- grootte van de elementen per rerun (som van de protobuf berichten)
+- geheugen per sessie (tracemalloc)
+- doorvoer van de quote selectie
+
+De resultaten worden als JSON weggeschreven; met --baseline worden ze
+vergeleken met een eerdere run en eindigt het script met exitcode 1 bij een
+regressie.
+
+Gebruik:
+    python benchmark.py --sessions 8 --clicks 50 --output bench_results.json
+    python benchmark.py --baseline bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+# De benchmark klikt sneller dan een mens; zonder deze instelling zou de rate
+# limiter (click_limiter.py) de meeste klikken weigeren en het klikpad niet
+# meer gemeten worden
+os.environ.setdefault("STAN_CLICK_RATE", "0")
+
+# Vaste root seed voor de willekeur per sessie (quote_sampler.session_rng),
+# zodat elke run dezelfde reeks uitspraken toont en runs vergelijkbaar zijn
+os.environ.setdefault("STAN_RANDOM_SEED", "0")
+
+from constants import BASE_DIR
+
+
+# Pad naar de app die wordt gebenchmarkt
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+# Maximale tijd (s) voor één script run in AppTest
+SCRIPT_TIMEOUT = 30
+
+# Toegestane verslechtering ten opzichte van de baseline (0.2 = 20%)
+DEFAULT_TOLERANCE = 0.2
+
+# Metrics waarvoor een hogere waarde een regressie is; voor de overige
+# (doorvoer) is een lagere waarde een regressie
+LOWER_IS_BETTER = (
+    "click_latency_ms.p50", "click_latency_ms.p99",
+    "reset_latency_ms.p50", "reset_latency_ms.p99",
+    "delta_bytes.mean", "memory_per_session_kb",
+)
+
+
+def percentile(values, fraction):
+    """
+    Berekent een percentiel met lineaire interpolatie.
+
+    Args:
+        values (list): Meetwaarden
+        fraction (float): Gevraagd percentiel tussen 0 en 1
+
+    Returns:
+        float: Het percentiel, of 0.0 bij een lege lijst
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values):
+    """Vat een lijst meetwaarden samen als p50/p99/mean/max."""
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.50), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def tree_bytes(app_test):
+    """
+    Telt de grootte van alle elementen van de laatste run.
+
+    AppTest geeft geen toegang tot de ruwe websocket berichten; de som van de
+    protobuf berichten van het element tree is de beste benadering van de
+    delta die naar de browser gaat. AppTest voert bij een klik het volledige
+    script uit (geen fragment reruns), dus dit is een bovengrens.
+
+    Args:
+        app_test (AppTest): Een AppTest na run()
+
+    Returns:
+        int: Totaal aantal bytes
+    """
+    def walk(node):
+        total = 0
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        for child in getattr(node, "children", {}).values():
+            total += walk(child)
+        return total
+
+    return walk(app_test._tree)
+
+
+def new_session():
+    """Maakt een nieuwe AppTest sessie voor de app."""
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=SCRIPT_TIMEOUT)
+
+
+def run_session(clicks, reset_every, seed=None):
+    """
+    Doorloopt één sessie: eerste render, klikken en periodieke resets.
+
+    Args:
+        clicks (int): Aantal klikken op de robot knop
+        reset_every (int): Na hoeveel klikken er gereset wordt (0 = nooit)
+        seed (int, optional): Seed voor de random module in dit proces
+
+    Returns:
+        dict: Latencies (ms), delta groottes (bytes) en eventuele fouten
+    """
+    if seed is not None:
+        random.seed(seed)
+    result = {"first_run_ms": 0.0, "click_ms": [], "reset_ms": [], "delta_bytes": [], "errors": 0}
+    app_test = new_session()
+
+    start = time.perf_counter()
+    app_test.run()
+    result["first_run_ms"] = (time.perf_counter() - start) * 1000
+    result["delta_bytes"].append(tree_bytes(app_test))
+
+    for click in range(1, clicks + 1):
+        start = time.perf_counter()
+        app_test.button(key="robot_button").click().run()
+        result["click_ms"].append((time.perf_counter() - start) * 1000)
+        result["delta_bytes"].append(tree_bytes(app_test))
+
+        if reset_every and click % reset_every == 0:
+            start = time.perf_counter()
+            app_test.button(key="reset_button").click().run()
+            result["reset_ms"].append((time.perf_counter() - start) * 1000)
+
+    result["errors"] = len(app_test.exception) + len(app_test.error)
+    return result
+
+
+def measure_session_memory(sessions=5):
+    """
+    Meet het extra geheugen per sessie met tracemalloc.
+
+    Args:
+        sessions (int, optional): Aantal sessies dat tegelijk wordt vastgehouden
+
+    Returns:
+        float: Gemiddeld aantal KB per sessie
+    """
+    # Eerste run buiten de meting, zodat imports en procesbrede caches niet meetellen
+    warm_up = new_session()
+    warm_up.run()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = []
+    for _ in range(sessions):
+        app_test = new_session()
+        app_test.run()
+        app_test.button(key="robot_button").click().run()
+        kept.append(app_test)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return round(grown / sessions / 1024, 1)
+
+
+def measure_selection_throughput(draws=200000):
+    """
+    Meet hoeveel quote selecties per seconde mogelijk zijn.
+
+    Args:
+        draws (int, optional): Aantal trekkingen per meting
+
+    Returns:
+        dict: Trekkingen per seconde per selectiepad
+    """
+    import quote_generator
+    from quote_sampler import QuoteSampler
+
+    results = {}
+    for name, sampler in (("random", QuoteSampler("random")), ("bag", QuoteSampler("bag"))):
+        current = None
+        start = time.perf_counter()
+        for _ in range(draws):
+            _, current = quote_generator.get_next_quote(current, sampler=sampler)
+        results[name] = round(draws / (time.perf_counter() - start))
+
+    current = None
+    start = time.perf_counter()
+    for _ in range(draws):
+        _, current = quote_generator.get_next_filtered_quote(current)
+    results["weighted"] = round(draws / (time.perf_counter() - start))
+    return results
+
+
+def run_benchmark(sessions=4, clicks=25, reset_every=10, concurrency=4, seed=0):
+    """
+    Voert de volledige benchmark uit.
+
+    Args:
+        sessions (int): Aantal gesimuleerde browsersessies
+        clicks (int): Aantal klikken per sessie
+        reset_every (int): Na hoeveel klikken er gereset wordt (0 = nooit)
+        concurrency (int): Aantal sessies dat tegelijk draait. AppTest deelt een
+            procesbrede runtime, dus gelijktijdige sessies draaien elk in een
+            eigen proces.
+        seed (int): Seed voor de random module, voor vergelijkbare runs
+
+    Returns:
+        dict: De resultaten, klaar om als JSON weg te schrijven
+    """
+    # AppTest draait app.py als __main__ in het worker proces; verwijs daarom
+    # via de modulenaam naar de worker functie en niet via __main__
+    from benchmark import run_session as session_worker
+
+    random.seed(seed)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency) as executor:
+        session_results = list(executor.map(
+            session_worker,
+            [clicks] * sessions,
+            [reset_every] * sessions,
+            [seed + index for index in range(sessions)]
+        ))
+    wall_time = time.perf_counter() - started
+
+    click_ms = [value for result in session_results for value in result["click_ms"]]
+    reset_ms = [value for result in session_results for value in result["reset_ms"]]
+    delta_bytes = [value for result in session_results for value in result["delta_bytes"]]
+
+    return {
+        "config": {
+            "sessions": sessions, "clicks": clicks, "reset_every": reset_every,
+            "concurrency": concurrency, "seed": seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "metrics": {
+            "first_run_ms": summarize([result["first_run_ms"] for result in session_results]),
+            "click_latency_ms": summarize(click_ms),
+            "reset_latency_ms": summarize(reset_ms),
+            "delta_bytes": summarize(delta_bytes),
+            "clicks_per_second": round(len(click_ms) / wall_time, 1) if wall_time else 0.0,
+            "memory_per_session_kb": measure_session_memory(),
+            "selection_per_second": measure_selection_throughput(),
+            "errors": sum(result["errors"] for result in session_results),
+        },
+    }
+
+
+def _flatten(metrics, prefix=""):
+    """Zet geneste metrics om naar een platte dict met punt-gescheiden namen."""
+    flat = {}
+    for name, value in metrics.items():
+        full_name = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{full_name}."))
+        elif isinstance(value, (int, float)):
+            flat[full_name] = value
+    return flat
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Vergelijkt resultaten met een baseline en geeft de regressies terug.
+
+    Args:
+        results (dict): Resultaten van run_benchmark
+        baseline (dict): Eerder opgeslagen resultaten
+        tolerance (float, optional): Toegestane relatieve verslechtering
+
+    Returns:
+        list: Beschrijvingen van de gevonden regressies
+    """
+    current = _flatten(results["metrics"])
+    previous = _flatten(baseline.get("metrics", {}))
+    regressions = []
+
+    for name in LOWER_IS_BETTER:
+        if previous.get(name) and current.get(name, 0) > previous[name] * (1 + tolerance):
+            regressions.append(f"{name}: {previous[name]} -> {current[name]}")
+
+    for name, value in previous.items():
+        if name.startswith(("selection_per_second.", "clicks_per_second")) and value:
+            if current.get(name, 0) < value * (1 - tolerance):
+                regressions.append(f"{name}: {value} -> {current.get(name, 0)}")
+
+    if current.get("errors", 0) > previous.get("errors", 0):
+        regressions.append(f"errors: {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark voor het klikpad van Stan de GitHub Agent")
+    parser.add_argument("--sessions", type=int, default=4, help="Aantal gesimuleerde sessies")
+    parser.add_argument("--clicks", type=int, default=25, help="Aantal klikken per sessie")
+    parser.add_argument("--reset-every", type=int, default=10, help="Reset na dit aantal klikken (0 = nooit)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Aantal sessies tegelijk")
+    parser.add_argument("--seed", type=int, default=0, help="Seed voor vergelijkbare runs")
+    parser.add_argument("--output", help="Schrijf de resultaten als JSON naar dit bestand")
+    parser.add_argument("--baseline", help="Vergelijk met de resultaten in dit JSON bestand")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Toegestane relatieve verslechtering ten opzichte van de baseline")
+    arguments = parser.parse_args()
+
+    results = run_benchmark(
+        sessions=arguments.sessions,
+        clicks=arguments.clicks,
+        reset_every=arguments.reset_every,
+        concurrency=arguments.concurrency,
+        seed=arguments.seed,
+    )
+    print(json.dumps(results["metrics"], indent=2))
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Resultaten geschreven naar {arguments.output}")
+
+    if arguments.baseline:
+        with open(arguments.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), arguments.tolerance)
+        if regressions:
+            print("Regressies gevonden:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("Geen regressies ten opzichte van de baseline")
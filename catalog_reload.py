@@ -0,0 +1,295 @@
+"""
+Catalog Reload Module voor Stan de GitHub Agent.
+
+Deze module herlaadt de catalogus uit QUOTE_SOURCE zonder de workers te
+herstarten of sessies kwijt te raken. Een achtergrondthread controleert elke
+CATALOG_RELOAD_INTERVAL seconden de mtime en grootte van het bestand (polling:
+werkt op elk platform en zonder extra dependencies). Is het bestand veranderd
+en daarna een interval lang niet meer gewijzigd, dan wordt het als nieuwe,
+onveranderlijke catalogus geopend.
+
+De id-tabel, de zoekindex en (bij gewogen selectie) de alias-tabel van de
+nieuwe catalogus worden opgebouwd vóórdat hij met quote_store.swap_quote_store
+in één keer de oude vervangt. Sessies zetten hun index daarna om op het
+stabiele id van de uitspraak (quote_session.py), de shuffle-bag van een sessie
+via de omzettabel van de catalogus (quote_service.py).
+
+Het bestand moet atomair worden vervangen (tijdelijk bestand + os.replace).
+Een bestand dat in place wordt overschreven laat de app niet crashen, omdat
+quote_store.py een eigen kopie mapt (open_snapshot), maar kan half worden
+ingelezen.
+
+Een bestand dat niet te lezen is wordt overgeslagen; de oude catalogus blijft
+dan actief tot het bestand opnieuw verandert. De vervangen catalogus wordt
+pas na CATALOG_RETIRE_GRACE seconden gesloten, zodat lopende reruns hem nog
+kunnen lezen.
+
+Zonder QUOTE_SOURCE (de QUOTES lijst uit constants.py) is er geen bestand om
+te volgen; zet de uitspraken dan in een .jsonl bestand.
+"""
+
+import os
+import csv
+import time
+import sqlite3
+import threading
+import metrics
+from constants import QUOTE_SOURCE, QUOTE_WEIGHTED, CATALOG_RELOAD_INTERVAL, CATALOG_RETIRE_GRACE
+from quote_store import open_quote_store, swap_quote_store, get_quote_store
+from quote_search import get_search_index
+from quote_selection import get_selection_engine
+
+
+# Fouten bij het openen of inlezen van een (half geschreven of ongeldig) bestand
+LOAD_ERRORS = (OSError, ValueError, KeyError, csv.Error, sqlite3.Error)
+
+
+def file_signature(path):
+    """
+    Geeft een signatuur van een bestand die verandert als het bestand verandert.
+
+    Args:
+        path (str): Pad naar het bestand
+
+    Returns:
+        tuple: (mtime_ns, grootte, inode), of None als het bestand ontbreekt
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return (file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+
+
+def prepare_snapshot(store):
+    """
+    Bouwt de afgeleide structuren van een nieuwe catalogus vóór het omwisselen.
+
+    Args:
+        store (QuoteStore): De nieuwe catalogus
+    """
+    store.build_id_index()
+    get_search_index(store)
+    if QUOTE_WEIGHTED:
+        get_selection_engine().get_table(store)
+
+
+class CatalogWatcher:
+    """
+    Volgt het catalogusbestand en wisselt bij een wijziging de catalogus om.
+
+    Args:
+        source (str, optional): Pad naar de catalogus (.jsonl, .csv, .sqlite of .db)
+        interval (float, optional): Seconden tussen twee controles
+        retire_grace (float, optional): Seconden waarna een vervangen catalogus wordt gesloten
+    """
+
+    def __init__(self, source=QUOTE_SOURCE, interval=CATALOG_RELOAD_INTERVAL,
+                 retire_grace=CATALOG_RETIRE_GRACE):
+        self.source = source
+        self.interval = interval
+        self.retire_grace = retire_grace
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._signature = file_signature(source)
+        self._pending = None
+        self._retired = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _close_retired(self, force=False):
+        """Sluit vervangen catalogi waarvan de wachttijd voorbij is."""
+        now = time.monotonic()
+        keep = []
+        for deadline, store in self._retired:
+            if force or now >= deadline:
+                store.close()
+            else:
+                keep.append((deadline, store))
+        self._retired = keep
+
+    def check(self):
+        """
+        Controleert het bestand één keer en herlaadt het als het veranderd is.
+
+        Een wijziging wordt pas opgepakt als de signatuur bij de volgende
+        controle gelijk is gebleven, zodat een bestand dat nog wordt
+        geschreven niet half wordt ingelezen.
+
+        Returns:
+            bool: True als de catalogus is vervangen
+        """
+        with self._lock:
+            self._close_retired()
+            signature = file_signature(self.source)
+            if signature is None or signature == self._signature:
+                self._pending = None
+                return False
+            if signature != self._pending:
+                self._pending = signature
+                return False
+            self._pending = None
+            return self._reload(signature)
+
+    def reload(self):
+        """
+        Herlaadt de catalogus direct, ongeacht de signatuur van het bestand.
+
+        Returns:
+            bool: True als de catalogus is vervangen
+        """
+        with self._lock:
+            return self._reload(file_signature(self.source))
+
+    def _reload(self, signature):
+        """Opent het bestand en wisselt de catalogus om (aanroeper houdt de lock)."""
+        # Ook bij een fout: hetzelfde bestand niet elke controle opnieuw proberen
+        self._signature = signature
+        store = None
+        try:
+            store = open_quote_store(self.source)
+            old_store = swap_quote_store(store, prepare=prepare_snapshot)
+        except LOAD_ERRORS as error:
+            if store is not None:
+                store.close()
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            metrics.count(metrics.CATALOG_RELOADS_METRIC, result="error")
+            return False
+
+        self._retired.append((time.monotonic() + self.retire_grace, old_store))
+        self.reloads += 1
+        self.last_error = None
+        metrics.count(metrics.CATALOG_RELOADS_METRIC, result="ok")
+        return True
+
+    def _run(self):
+        """Controleert het bestand tot stop() wordt aangeroepen."""
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start de achtergrondthread (hooguit één keer)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stan-catalog-reload", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stopt de achtergrondthread en sluit alle vervangen catalogi."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._close_retired(force=True)
+
+    def stats(self):
+        """
+        Geeft statistieken van de watcher.
+
+        Returns:
+            dict: Generation van de catalogus, aantal gelukte en mislukte
+                herlaadpogingen, de laatste fout en het aantal nog open oude catalogi
+        """
+        with self._lock:
+            return {
+                "generation": get_quote_store().generation,
+                "reloads": self.reloads,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "retired": len(self._retired),
+            }
+
+
+# Eén watcher per proces
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_catalog_watcher():
+    """
+    Start de procesbrede watcher als er een catalogusbestand te volgen is.
+
+    Returns:
+        CatalogWatcher: De gestarte watcher, of None zonder QUOTE_SOURCE of
+            met CATALOG_RELOAD_INTERVAL 0
+    """
+    global _watcher
+    if not QUOTE_SOURCE or CATALOG_RELOAD_INTERVAL <= 0:
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            # Eerst de huidige catalogus openen, zodat die als uitgangspunt dient
+            get_quote_store()
+            _watcher = CatalogWatcher()
+            _watcher.start()
+    return _watcher
+
+
+def get_catalog_watcher():
+    """
+    Geeft de procesbrede watcher terug.
+
+    Returns:
+        CatalogWatcher: De watcher, of None als hij niet gestart is
+    """
+    return _watcher
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    import json
+    import tempfile
+    from quote_service import QuoteService
+
+    def write_catalog(path, texts):
+        """Schrijft een catalogus atomair (tijdelijk bestand + rename)."""
+        with open(path + ".tmp", "w", encoding="utf-8") as catalog_file:
+            for text in texts:
+                catalog_file.write(json.dumps({"text": text}) + "\n")
+        os.replace(path + ".tmp", path)
+
+    print("Catalog Reload Test\n")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "quotes.jsonl")
+        texts = [f"Uitspraak {number}" for number in range(10)]
+        write_catalog(path, texts)
+        swap_quote_store(open_quote_store(path)).close()
+        watcher = CatalogWatcher(path, interval=0.05, retire_grace=0)
+
+        service = QuoteService(mode="bag")
+        current = None
+        shown = []
+        for _ in range(4):
+            current = service.next_index("sessie", current)
+            shown.append(get_quote_store()[current])
+        current_id = get_quote_store().quote_id(current)
+
+        # Verwijder een getoonde uitspraak, voeg er een toe en verander de volgorde
+        removed = shown[0]
+        new_texts = [text for text in reversed(texts) if text != removed] + ["Uitspraak nieuw"]
+        write_catalog(path, new_texts)
+
+        watcher.start()
+        deadline = time.monotonic() + 5
+        while watcher.reloads == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print(f"Na wijziging: {watcher.stats()}")
+
+        current = service.remap_index(current, current_id)
+        assert get_quote_store()[current] == shown[-1]
+        rest = []
+        for _ in range(len(new_texts) - len(shown) + 1):
+            current = service.next_index("sessie", current)
+            rest.append(get_quote_store()[current])
+        assert sorted(rest + shown[1:]) == sorted(new_texts), rest
+        print(f"Rest van de ronde zonder herhalingen: {rest}")
+
+        # Een ongeldig bestand laat de huidige catalogus staan
+        with open(path, "w", encoding="utf-8") as catalog_file:
+            catalog_file.write("{geen json\n")
+        time.sleep(0.5)
+        print(f"Na ongeldig bestand: {watcher.stats()}")
+        watcher.stop()
+        get_quote_store().close()
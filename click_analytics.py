@@ -0,0 +1,425 @@
+"""
+Click Analytics Module voor Stan de GitHub Agent.
+
+Deze module legt klikken op de robot blijvend vast, zodat zichtbaar wordt
+welke uitspraken mensen doorklikken en hoe vaak. Het klikpad voegt een event
+alleen toe aan een buffer in het geheugen; een achtergrondthread schrijft de
+buffer in batches (één transactie per batch) naar een lokale SQLite database.
+Het klikpad wacht dus nooit op de schijf.
+
+Naast de index wordt het stabiele id van de uitspraak (quote_store.record_id)
+vastgelegd: een index verschuift als de catalogus herladen wordt, het id niet.
+De aggregatie per uitspraak telt daarom op het id.
+
+Analytics staat standaard uit (STAN_ANALYTICS=1 zet hem aan); de database
+staat in ANALYTICS_DB_PATH (STAN_ANALYTICS_DB).
+
+Voor dashboards zijn er aggregaties per uitspraak en per uur. Een reset van
+een sessie wordt vastgelegd als event met source "reset" en count 0, zodat
+replay.py de klikreeks van een sessie kan naspelen; de aggregaties tellen die
+events niet mee.
+"""
+
+import os
+import time
+import atexit
+import logging
+import sqlite3
+import threading
+from collections import deque
+from constants import (
+    ANALYTICS_ENABLED,
+    ANALYTICS_DB_PATH,
+    ANALYTICS_BATCH_SIZE,
+    ANALYTICS_FLUSH_INTERVAL,
+    ANALYTICS_MAX_BUFFER
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Maximale wachttijd (s) tussen twee pogingen als de database onbereikbaar is
+MAX_RETRY_INTERVAL = 60.0
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clicks (
+    ts REAL NOT NULL,
+    session_id TEXT,
+    quote_index INTEGER,
+    source TEXT,
+    count INTEGER NOT NULL DEFAULT 1,
+    quote_id TEXT
+);
+CREATE INDEX IF NOT EXISTS clicks_ts ON clicks (ts);
+CREATE INDEX IF NOT EXISTS clicks_quote ON clicks (quote_index);
+"""
+
+# Kolommen die later aan de tabel zijn toegevoegd, met hun SQL type; een
+# bestaande database krijgt ze bij het openen alsnog
+MIGRATIONS = (
+    ("quote_id", "TEXT"),
+)
+
+
+class ClickRecorder:
+    """
+    Buffert klik-events en schrijft ze vanuit een achtergrondthread weg.
+
+    Args:
+        db_path (str): Pad naar de SQLite database
+        batch_size (int, optional): Aantal events waarbij direct wordt geschreven
+        flush_interval (float, optional): Maximaal aantal seconden tussen twee batches
+        max_buffer (int, optional): Maximale grootte van de buffer; bij een
+            vastgelopen schijf vallen de oudste events weg in plaats van dat het
+            geheugen blijft groeien
+    """
+
+    def __init__(self, db_path, batch_size=ANALYTICS_BATCH_SIZE,
+                 flush_interval=ANALYTICS_FLUSH_INTERVAL, max_buffer=ANALYTICS_MAX_BUFFER):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        # deque.append en popleft zijn thread-safe; geen lock nodig op het klikpad
+        self._buffer = deque(maxlen=max_buffer)
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopped = False
+
+    def _connect(self):
+        """Opent een verbinding en maakt de map en de tabel aan indien nodig."""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as error:
+                raise sqlite3.OperationalError(f"Kan de map {directory} niet aanmaken: {error}")
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(clicks)")}
+        for column, column_type in MIGRATIONS:
+            if column not in columns:
+                try:
+                    connection.execute(f"ALTER TABLE clicks ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError:
+                    # Een ander proces heeft de kolom net toegevoegd
+                    pass
+        connection.execute("CREATE INDEX IF NOT EXISTS clicks_quote_id ON clicks (quote_id)")
+        return connection
+
+    def _ensure_thread(self):
+        """Start de schrijfthread bij het eerste event."""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stan-click-analytics", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def record(self, quote_index, session_id=None, source="server", count=1, quote_id=None):
+        """
+        Legt een klik vast (alleen een append op de buffer).
+
+        Args:
+            quote_index (int): Index van de uitspraak die na de klik wordt getoond
+            session_id (str, optional): Id van de sessie
+            source (str, optional): Herkomst, bijv. "server", "client" of "reset"
+            count (int, optional): Aantal klikken in dit event (client batches);
+                0 alleen voor een reset
+            quote_id (str, optional): Stabiel id van de uitspraak (quote_store.record_id)
+        """
+        if self._stopped or (count <= 0 and source != "reset"):
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), session_id, quote_index, source, count, quote_id))
+        self._ensure_thread()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        """
+        Hoofdlus van de schrijfthread.
+
+        Een fout van SQLite (onbereikbaar pad, database te lang op slot, volle
+        schijf) stopt de thread niet: de verbinding wordt gesloten en met een
+        oplopende wachttijd (tot MAX_RETRY_INTERVAL) opnieuw geprobeerd. De
+        events blijven zolang in de buffer.
+        """
+        connection = None
+        failures = 0
+        try:
+            while not self._stopped:
+                if failures:
+                    # Tijdens het wachten maakt een volle buffer de thread niet wakker
+                    deadline = time.monotonic() + min(self.flush_interval * 2 ** failures, MAX_RETRY_INTERVAL)
+                    while not self._stopped and time.monotonic() < deadline:
+                        self._wakeup.wait(deadline - time.monotonic())
+                        self._wakeup.clear()
+                else:
+                    self._wakeup.wait(self.flush_interval)
+                    self._wakeup.clear()
+                try:
+                    if connection is None:
+                        connection = self._connect()
+                    self._write_pending(connection)
+                except sqlite3.Error as error:
+                    failures += 1
+                    self._log_failure(error, failures)
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    continue
+                if failures:
+                    logger.info("Analytics database %s weer bereikbaar", self.db_path)
+                    failures = 0
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _log_failure(self, error, failures):
+        """Telt een mislukte schrijfpoging; alleen de eerste van een reeks wordt als waarschuwing gelogd."""
+        self.errors += 1
+        log = logger.warning if failures == 1 else logger.debug
+        log("Kon de analytics niet naar %s schrijven (%d events in de buffer): %s",
+            self.db_path, len(self._buffer), error)
+
+    def _write_pending(self, connection):
+        """
+        Schrijft alle events in de buffer in één transactie weg.
+
+        Mislukt de transactie, dan gaat de batch terug vooraan in de buffer
+        (zo nodig zonder de oudste events) en wordt de fout doorgegeven.
+        """
+        with self._write_lock:
+            batch = []
+            while self._buffer:
+                try:
+                    batch.append(self._buffer.popleft())
+                except IndexError:
+                    break
+            if not batch:
+                return 0
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO clicks (ts, session_id, quote_index, source, count, quote_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+            except sqlite3.Error:
+                room = self._buffer.maxlen - len(self._buffer)
+                kept = batch[-room:] if room > 0 else []
+                self.dropped += len(batch) - len(kept)
+                self._buffer.extendleft(reversed(kept))
+                raise
+            self.written += len(batch)
+            return len(batch)
+
+    def flush(self):
+        """
+        Schrijft de buffer direct weg, vanuit de aanroepende thread.
+
+        Returns:
+            int: Aantal weggeschreven events; 0 als de database onbereikbaar
+                is (de events blijven dan in de buffer)
+        """
+        try:
+            connection = self._connect()
+        except sqlite3.Error as error:
+            self._log_failure(error, 1)
+            return 0
+        try:
+            return self._write_pending(connection)
+        except sqlite3.Error as error:
+            self._log_failure(error, 1)
+            return 0
+        finally:
+            connection.close()
+
+    def close(self):
+        """Stopt de schrijfthread en schrijft de resterende events weg."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        if self._buffer:
+            self.flush()
+
+    def _query(self, sql, parameters=()):
+        """Voert een leesquery uit op een eigen verbinding."""
+        connection = self._connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def clicks_per_quote(self, since=None, limit=None):
+        """
+        Geeft het aantal klikken per uitspraak, meest geklikt eerst.
+
+        Er wordt geteld op het stabiele id, zodat klikken van vóór en na een
+        herladen catalogus bij dezelfde uitspraak horen. Events zonder id (uit
+        een oudere database) tellen per index.
+
+        Args:
+            since (float, optional): Alleen klikken vanaf dit Unix tijdstip
+            limit (int, optional): Maximaal aantal uitspraken
+
+        Returns:
+            list: Tuples (quote_id, quote_index, klikken); quote_index is de
+                index bij de laatste klik, quote_id is None voor events zonder id
+        """
+        # Een kale kolom naast MAX() komt in SQLite uit de rij met dat maximum
+        sql = (
+            "SELECT quote_id, quote_index, SUM(count) AS clicks, MAX(rowid) FROM clicks "
+            "WHERE ts >= ? AND count > 0 "
+            "GROUP BY COALESCE(quote_id, 'index:' || quote_index) ORDER BY clicks DESC"
+        )
+        parameters = [since or 0]
+        if limit:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [row[:3] for row in self._query(sql, parameters)]
+
+    def clicks_per_hour(self, since=None):
+        """
+        Geeft het aantal klikken per uur (UTC).
+
+        Args:
+            since (float, optional): Alleen klikken vanaf dit Unix tijdstip
+
+        Returns:
+            list: Tuples ("YYYY-MM-DD HH:00", klikken), oudste eerst
+        """
+        return self._query(
+            "SELECT strftime('%Y-%m-%d %H:00', ts, 'unixepoch') AS hour, SUM(count) "
+            "FROM clicks WHERE ts >= ? AND count > 0 GROUP BY hour ORDER BY hour",
+            (since or 0,)
+        )
+
+    def total_clicks(self, since=None):
+        """Geeft het totaal aantal vastgelegde klikken."""
+        return self._query("SELECT COALESCE(SUM(count), 0) FROM clicks WHERE ts >= ?", (since or 0,))[0][0]
+
+    def stats(self):
+        """
+        Geeft statistieken van de recorder.
+
+        Returns:
+            dict: Aantal events in de buffer, geschreven en weggevallen, en het
+                aantal mislukte schrijfpogingen
+        """
+        return {"buffered": len(self._buffer), "written": self.written, "dropped": self.dropped,
+                "errors": self.errors}
+
+
+# Eén recorder per proces, gedeeld door alle sessies
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_click_recorder():
+    """
+    Geeft de procesbrede click recorder terug.
+
+    Returns:
+        ClickRecorder: De gedeelde recorder
+    """
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = ClickRecorder(ANALYTICS_DB_PATH)
+    return _recorder
+
+
+def record_click(quote_index, session_id=None, source="server", count=1, quote_id=None):
+    """
+    Legt een klik vast als analytics aan staat.
+
+    Args:
+        quote_index (int): Index van de uitspraak die na de klik wordt getoond
+        session_id (str, optional): Id van de sessie
+        source (str, optional): Herkomst van de klik
+        count (int, optional): Aantal klikken
+        quote_id (str, optional): Stabiel id van de uitspraak
+    """
+    if ANALYTICS_ENABLED:
+        get_click_recorder().record(quote_index, session_id, source, count, quote_id)
+
+
+def record_reset(session_id=None):
+    """
+    Legt een reset van een sessie vast als analytics aan staat.
+
+    Args:
+        session_id (str, optional): Id van de sessie
+    """
+    if ANALYTICS_ENABLED:
+        get_click_recorder().record(None, session_id, source="reset", count=0)
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    print("Click Analytics Test\n")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        recorder = ClickRecorder(os.path.join(temp_dir, "clicks.sqlite"), batch_size=50, flush_interval=0.1)
+
+        start = time.perf_counter()
+        for i in range(1000):
+            recorder.record(i % 7, session_id="test", quote_id=f"q{i % 7}")
+        recorder.record(None, session_id="test", source="reset", count=0)
+        elapsed = (time.perf_counter() - start) * 1e6 / 1000
+        print(f"Kosten op het klikpad: {elapsed:.1f} µs per klik")
+
+        recorder.close()
+        print(f"Statistieken: {recorder.stats()}")
+        print(f"Totaal: {recorder.total_clicks()}")
+        print(f"Per uitspraak: {recorder.clicks_per_quote(limit=3)}")
+        print(f"Per uur: {recorder.clicks_per_hour()}")
+
+        # Na een herladen catalogus staat dezelfde uitspraak op een andere index
+        recorder = ClickRecorder(recorder.db_path)
+        recorder.record(9, session_id="test", quote_id="q0", count=5)
+        recorder.close()
+        top = recorder.clicks_per_quote(limit=1)[0]
+        assert top == ("q0", 9, 148), top
+        print(f"Zelfde id, nieuwe index: {top}")
+
+        # Een database van vóór de quote_id kolom krijgt hem bij het openen
+        old_path = os.path.join(temp_dir, "old.sqlite")
+        connection = sqlite3.connect(old_path)
+        connection.execute("CREATE TABLE clicks (ts REAL NOT NULL, session_id TEXT, quote_index INTEGER, "
+                           "source TEXT, count INTEGER NOT NULL DEFAULT 1)")
+        connection.execute("INSERT INTO clicks VALUES (0, 'oud', 3, 'server', 2)")
+        connection.commit()
+        connection.close()
+        recorder = ClickRecorder(old_path)
+        recorder.record(3, session_id="nieuw", quote_id="q3")
+        recorder.close()
+        print(f"Gemigreerde database: {recorder.clicks_per_quote()}")
+        assert sorted(recorder.clicks_per_quote(), key=str) == sorted([(None, 3, 2), ("q3", 3, 1)], key=str)
+
+        # Een onbereikbare database stopt de schrijfthread niet en verliest geen events
+        missing_dir = os.path.join(temp_dir, "nog-niet")
+        open(missing_dir, "w").close()  # een bestand waar de map hoort
+        recorder = ClickRecorder(os.path.join(missing_dir, "clicks.sqlite"), batch_size=2, flush_interval=0.05)
+        for i in range(5):
+            recorder.record(i, session_id="test")
+        time.sleep(0.3)
+        assert recorder._thread.is_alive() and recorder.stats()["buffered"] == 5, recorder.stats()
+        os.remove(missing_dir)
+        recorder.close()
+        print(f"Onbereikbare database, daarna hersteld: {recorder.stats()}")
+        assert recorder.stats()["written"] == 5 and recorder.total_clicks() == 5
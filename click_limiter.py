@@ -0,0 +1,203 @@
+"""
+Click Limiter Module voor Stan de GitHub Agent.
+
+Deze module begrenst per sessie hoeveel klikken op de robot worden verwerkt,
+zodat één tabblad dat de robot blijft aanklikken geen worker kan opeisen.
+Elke sessie heeft een token bucket: er komen CLICK_RATE_LIMIT tokens per
+seconde bij, tot maximaal CLICK_BURST. Een klik kost één token; klikken
+zonder token worden geweigerd.
+
+Klikken die samen binnenkomen (bijv. de debounce van de robot component)
+worden in één rerun verwerkt. Met CLICK_COALESCE_MODE "each" schuift de
+uitspraak per toegelaten klik één plaats op, met "once" één keer per rerun;
+de overige klikken tellen dan als samengevoegd.
+
+Buckets van inactieve sessies zijn na CLICK_BURST / CLICK_RATE_LIMIT seconden
+weer vol en dus gelijk aan een nieuwe bucket; ze worden dan verwijderd. Er
+worden nooit meer dan max_sessions buckets tegelijk bewaard (LRU).
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from constants import (
+    CLICK_RATE_LIMIT,
+    CLICK_BURST,
+    CLICK_COALESCE_MODE,
+    QUOTE_SERVICE_MAX_SESSIONS
+)
+
+
+class TokenBucket:
+    """
+    Token bucket van één sessie.
+
+    Args:
+        tokens (float): Aantal tokens bij het aanmaken
+        now (float): Tijdstip (time.monotonic) van het aanmaken
+    """
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+
+    def take(self, requested, rate, burst, now):
+        """
+        Vult de bucket bij en neemt zoveel tokens als er beschikbaar zijn.
+
+        Args:
+            requested (int): Gevraagd aantal tokens
+            rate (float): Tokens per seconde
+            burst (int): Maximaal aantal tokens
+            now (float): Huidig tijdstip (time.monotonic)
+
+        Returns:
+            int: Toegekend aantal tokens (0 tot en met requested)
+        """
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        granted = min(requested, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+
+class ClickDecision:
+    """
+    Uitkomst van ClickLimiter.admit voor een reeks klikken.
+
+    Attributes:
+        accepted (int): Toegelaten klikken (tellen mee voor de counter)
+        applied (int): Aantal keer dat de uitspraak moet opschuiven
+        coalesced (int): Toegelaten klikken die zijn samengevoegd (accepted - applied)
+        rejected (int): Geweigerde klikken
+    """
+
+    __slots__ = ("accepted", "applied", "coalesced", "rejected")
+
+    def __init__(self, accepted, applied, rejected):
+        self.accepted = accepted
+        self.applied = applied
+        self.coalesced = accepted - applied
+        self.rejected = rejected
+
+    def __repr__(self):
+        return (f"ClickDecision(accepted={self.accepted}, applied={self.applied}, "
+                f"coalesced={self.coalesced}, rejected={self.rejected})")
+
+
+class ClickLimiter:
+    """
+    Procesbrede rate limiter met een token bucket per sessie.
+
+    Args:
+        rate (float, optional): Tokens per seconde; 0 schakelt de limiet uit
+        burst (int, optional): Maximaal aantal klikken achter elkaar
+        coalesce_mode (str, optional): "each" of "once"
+        max_sessions (int, optional): Maximaal aantal bewaarde buckets
+        clock (callable, optional): Klok in seconden; default time.monotonic
+    """
+
+    def __init__(self, rate=CLICK_RATE_LIMIT, burst=CLICK_BURST, coalesce_mode=CLICK_COALESCE_MODE,
+                 max_sessions=QUOTE_SERVICE_MAX_SESSIONS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.coalesce_mode = coalesce_mode
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.accepted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        """Verwijdert volle en overtollige buckets (de oudste staan vooraan)."""
+        refill_time = self.burst / self.rate
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if len(self._buckets) <= self.max_sessions and now - bucket.updated < refill_time:
+                break
+            self._buckets.popitem(last=False)
+
+    def _take(self, session_id, clicks):
+        """Neemt tokens uit de bucket van een sessie."""
+        if self.rate <= 0:
+            return clicks
+
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(session_id)
+            if bucket is None:
+                bucket = self._buckets[session_id] = TokenBucket(self.burst, now)
+            else:
+                self._buckets.move_to_end(session_id)
+            granted = bucket.take(clicks, self.rate, self.burst, now)
+            self._evict(now)
+            return granted
+
+    def admit(self, session_id, clicks=1):
+        """
+        Beslist hoeveel van een reeks klikken van een sessie worden verwerkt.
+
+        Args:
+            session_id (str): Id van de sessie
+            clicks (int, optional): Aantal klikken dat samen binnenkwam. Default is 1.
+
+        Returns:
+            ClickDecision: Toegelaten, toe te passen, samengevoegde en geweigerde klikken
+        """
+        clicks = max(int(clicks), 0)
+        accepted = self._take(session_id, clicks) if clicks else 0
+        applied = min(accepted, 1) if self.coalesce_mode == "once" else accepted
+        decision = ClickDecision(accepted, applied, clicks - accepted)
+
+        with self._lock:
+            self.accepted += decision.accepted
+            self.rejected += decision.rejected
+            self.coalesced += decision.coalesced
+        return decision
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def stats(self):
+        """
+        Geeft statistieken van de limiter.
+
+        Returns:
+            dict: Aantal buckets en de totalen van toegelaten, geweigerde en samengevoegde klikken
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._buckets),
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "coalesced": self.coalesced,
+            }
+
+
+# Eén limiter per proces, gedeeld door alle sessies
+_limiter = ClickLimiter()
+
+
+def get_click_limiter():
+    """
+    Geeft de procesbrede click limiter terug.
+
+    Returns:
+        ClickLimiter: De gedeelde limiter
+    """
+    return _limiter
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    print("Click Limiter Test\n")
+    fake_time = [0.0]
+    limiter = ClickLimiter(rate=2, burst=3, coalesce_mode="once", clock=lambda: fake_time[0])
+    for moment, clicks in ((0.0, 5), (0.5, 1), (1.0, 1), (3.0, 4)):
+        fake_time[0] = moment
+        print(f"t={moment}s, {clicks} klik(ken): {limiter.admit('sessie', clicks)}")
+    print(f"\nStatistieken: {limiter.stats()}")
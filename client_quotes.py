@@ -0,0 +1,223 @@
+"""
+Client Quotes Module voor Stan de GitHub Agent.
+
+Deze module verzorgt de optionele "client-side" quote modus voor kiosk
+deployments. De catalogus wordt per pagina één keer gecomprimeerd naar de
+robot component gestuurd; de browser kiest daarna zelf de volgende uitspraak,
+met dezelfde regel als get_next_quote() (geen directe herhaling). Klikken
+worden in batches teruggemeld, zodat een klik vrijwel geen serverwerk kost.
+
+De index die de browser terugstuurt wordt niet blind vertrouwd: alleen een
+niet-negatief geheel getal binnen de catalogus wordt overgenomen. Per
+verstuurde pagina onthoudt de sessie bij welke catalogus (generation) hij
+hoort; de browser bevestigt de pagina die hij toont met zijn hash. Hoort die
+pagina bij een catalogus van vóór een herlaadbeurt, dan wordt de index omgezet
+(quote_store.get_remap); een onbekende pagina of een verwijderde uitspraak
+wordt genegeerd.
+"""
+
+import gzip
+import json
+import base64
+import hashlib
+import functools
+import streamlit as st
+import metrics
+import click_analytics
+import state_backend
+from quote_store import get_quote_store, get_remap
+from robot_component import consume_new_clicks
+from quote_session import QUOTE_ID_KEY, current_session_id, set_quote_index
+from constants import (
+    CLIENT_QUOTE_PAGE_SIZE,
+    CLIENT_CLICK_SYNC_BATCH,
+    CLIENT_CLICK_SYNC_INTERVAL_MS
+)
+
+
+# Sessie-state sleutels
+PAGE_KEY = "client_quote_page"
+ACKED_PAGE_KEY = "client_quote_acked_page"
+# Hash -> generation van de naar de browser gestuurde pagina's
+SENT_PAGES_KEY = "client_quote_sent_pages"
+
+# Aantal verstuurde pagina's dat per sessie wordt onthouden; een browser die
+# nog een oudere pagina toont, wordt daarna niet meer herkend
+MAX_SENT_PAGES = 8
+
+
+@functools.lru_cache(maxsize=16)
+def _encode_page(store_id, store_generation, store_version, page, page_size):
+    """
+    Comprimeert één pagina van de catalogus (gecachet per catalogusversie).
+
+    store_id, store_generation en store_version maken deel uit van de
+    cache-sleutel, zodat een andere, herladen of gewijzigde catalogus nieuwe
+    pagina's oplevert.
+
+    Returns:
+        tuple: (str, str) Base64-encoded gzip van de JSON lijst en de hash ervan
+    """
+    store = get_quote_store()
+    start = page * page_size
+    end = min(start + page_size, len(store))
+    texts = [store[index] for index in range(start, end)]
+    payload = gzip.compress(json.dumps(texts, ensure_ascii=False).encode("utf-8"))
+    return base64.b64encode(payload).decode(), hashlib.sha256(payload).hexdigest()[:16]
+
+
+def get_page_count(store, page_size=CLIENT_QUOTE_PAGE_SIZE):
+    """
+    Geeft het aantal pagina's waarin de catalogus wordt opgedeeld.
+
+    Args:
+        store (QuoteStore): De catalogus
+        page_size (int, optional): Aantal uitspraken per pagina
+
+    Returns:
+        int: Aantal pagina's (minimaal 1)
+    """
+    return max((len(store) + page_size - 1) // page_size, 1)
+
+
+def get_page(page, page_size=CLIENT_QUOTE_PAGE_SIZE):
+    """
+    Geeft een gecomprimeerde pagina van de catalogus.
+
+    Args:
+        page (int): Paginanummer, beginnend bij 0
+        page_size (int, optional): Aantal uitspraken per pagina
+
+    Returns:
+        tuple: (str, str) Base64-encoded gzip payload en de hash ervan
+    """
+    store = get_quote_store()
+    return _encode_page(id(store), store.generation, store.version, page, page_size)
+
+
+def build_component_args(styles_css):
+    """
+    Bouwt de argumenten voor de robot component in client-side modus.
+
+    De payload van de huidige pagina (en de stylesheet voor de iframe) wordt
+    alleen meegestuurd zolang de browser die pagina nog niet heeft bevestigd.
+
+    Args:
+        styles_css (str): Geminificeerde CSS voor de quote weergave in de iframe
+
+    Returns:
+        dict: Argumenten voor robot_component
+    """
+    store = get_quote_store()
+    page_count = get_page_count(store)
+    page = st.session_state.get(PAGE_KEY, 0) % page_count
+    payload, page_hash = get_page(page)
+    acked = st.session_state.get(ACKED_PAGE_KEY) == page_hash
+    remember_sent_page(page_hash, store.generation)
+
+    return {
+        "client_mode": True,
+        "page": page,
+        "page_count": page_count,
+        "page_size": CLIENT_QUOTE_PAGE_SIZE,
+        "page_hash": page_hash,
+        "catalog": None if acked else payload,
+        "styles_css": None if acked else styles_css,
+        "click_count": st.session_state.get("click_count", 0),
+        "quote_index": st.session_state.get("quote_index"),
+        "sync_batch": CLIENT_CLICK_SYNC_BATCH,
+        "sync_interval_ms": CLIENT_CLICK_SYNC_INTERVAL_MS,
+    }
+
+
+def remember_sent_page(page_hash, generation):
+    """
+    Onthoudt bij welke catalogus een naar de browser gestuurde pagina hoort.
+
+    Args:
+        page_hash (str): Hash van de pagina
+        generation (int): Generation van de catalogus
+    """
+    sent_pages = st.session_state.setdefault(SENT_PAGES_KEY, {})
+    sent_pages.pop(page_hash, None)
+    sent_pages[page_hash] = generation
+    while len(sent_pages) > MAX_SENT_PAGES:
+        del sent_pages[next(iter(sent_pages))]
+
+
+def _non_negative_int(value):
+    """Geeft value als hij een niet-negatief geheel getal is, anders None."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        return None
+    return value
+
+
+def parse_client_index(value, store):
+    """
+    Controleert de index die de browser terugstuurt en zet hem om naar de huidige catalogus.
+
+    Args:
+        value (dict): Waarde van de robot component
+        store (QuoteStore): De huidige catalogus
+
+    Returns:
+        int: Een geldige index in de huidige catalogus, of None als de index
+            ontbreekt, ongeldig is, bij een onbekende pagina hoort of niet meer bestaat
+    """
+    index = _non_negative_int(value.get("quote_index"))
+    if index is None:
+        return None
+
+    ack = value.get("ack")
+    generation = st.session_state.get(SENT_PAGES_KEY, {}).get(ack) if isinstance(ack, str) else None
+    if generation is None:
+        return None
+
+    # De pagina van de browser hoort bij een eerdere catalogus: zet de index om
+    if generation != store.generation:
+        mapping = get_remap(generation)
+        if mapping is None or index >= len(mapping):
+            return None
+        index = mapping[index]
+        return index if index >= 0 else None
+
+    return index if index < len(store) else None
+
+
+def apply_client_sync(value):
+    """
+    Verwerkt een batch die de browser in client-side modus terugstuurt.
+
+    Werkt de click counter, de huidige index, de bevestigde pagina en de
+    gevraagde volgende pagina bij in de sessie-state.
+
+    Args:
+        value (dict): Waarde van de robot component
+    """
+    if not isinstance(value, dict):
+        return
+
+    new_clicks = consume_new_clicks(value)
+    st.session_state.click_count = st.session_state.get("click_count", 0) + new_clicks
+    metrics.count(metrics.CLICKS_METRIC, new_clicks)
+
+    store = get_quote_store()
+    quote_index = parse_client_index(value, store)
+    if quote_index is not None:
+        set_quote_index(quote_index, store)
+
+    # Een batch uit de browser telt als één event met het aantal klikken
+    click_analytics.record_click(
+        st.session_state.get("quote_index"), current_session_id(), source="client", count=new_clicks,
+        quote_id=st.session_state.get(QUOTE_ID_KEY)
+    )
+    if new_clicks or quote_index is not None:
+        state_backend.persist_clicks(
+            st.session_state.get("quote_index"), new_clicks, quote_id=st.session_state.get(QUOTE_ID_KEY)
+        )
+
+    if value.get("ack"):
+        st.session_state[ACKED_PAGE_KEY] = value["ack"]
+    want_page = _non_negative_int(value.get("want_page"))
+    if want_page is not None:
+        st.session_state[PAGE_KEY] = want_page
@@ -0,0 +1,448 @@
+"""
+Compact Catalog Module voor Stan de GitHub Agent.
+
+Deze module bevat een compacte representatie van de catalogus voor hosts met
+veel Streamlit processen. In plaats van een lijst met losse str objecten (elk
+met zijn eigen object header en refcount) staat de catalogus in één UTF-8 blob
+met een offset-tabel (array('I')); een uitspraak wordt pas bij het opvragen
+gedecodeerd.
+
+Het bestandsformaat (.stancat) is:
+
+    header   8 bytes magic, uint32 aantal, uint32 flags (little-endian)
+    offsets  (aantal + 1) x uint32: begin van elke entry in de blob
+    blob     per entry één typebyte (0 = tekst, 1 = JSON record) + UTF-8
+
+Een .stancat bestand wordt read-only gemapt (mmap), via een onveranderlijke
+kopie per versie van het bestand (quote_store.open_snapshot); offset-tabel en
+blob zijn views op de map. Alle processen die dezelfde versie openen delen dus
+dezelfde pagina's uit de page cache, ook zonder fork. Een
+in-memory catalogus (CompactQuoteStore.from_records) die vóór een fork is
+opgebouwd blijft ook gedeeld: lezen raakt de refcounts van de blob niet, zodat
+er geen copy-on-write kopieën ontstaan zoals bij een lijst met str objecten.
+
+Gebruik:
+    python compact_catalog.py build --output quotes.stancat
+    python compact_catalog.py build --source quotes.jsonl --output quotes.stancat
+    python compact_catalog.py bench --quotes 200000 --workers 8
+
+Zet daarna STAN_QUOTE_SOURCE=quotes.stancat; hot reload (catalog_reload.py)
+werkt ook voor dit formaat.
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import random
+import struct
+import argparse
+from array import array
+from quote_store import (
+    QuoteStore, InMemoryQuoteStore, open_quote_store, open_snapshot, remove_snapshot
+)
+
+
+# Header van een .stancat bestand: magic, aantal uitspraken, flags
+MAGIC = b"STANCAT1"
+HEADER = struct.Struct("<8sII")
+
+# Typebyte vóór elke entry in de blob
+ENTRY_TEXT = 0
+ENTRY_RECORD = 1
+
+# Grootste blob die met uint32 offsets te adresseren is
+MAX_BLOB_SIZE = 2 ** 32 - 1
+
+# Representaties die de benchmark vergelijkt
+BENCH_MODES = ("list", "compact", "mapped")
+
+
+def encode_entry(quote):
+    """
+    Codeert één uitspraak als entry voor de blob.
+
+    Een record met alleen "text" wordt als kale tekst opgeslagen; andere
+    velden (weight, tags, lang, id) blijven als JSON bewaard.
+
+    Args:
+        quote (str or dict): De tekst, of een record met minimaal "text"
+
+    Returns:
+        bytes: De typebyte gevolgd door de UTF-8 inhoud
+    """
+    if isinstance(quote, dict) and set(quote) != {"text"}:
+        return bytes((ENTRY_RECORD,)) + json.dumps(quote, ensure_ascii=False).encode("utf-8")
+    text = quote["text"] if isinstance(quote, dict) else quote
+    return bytes((ENTRY_TEXT,)) + text.encode("utf-8")
+
+
+def build_compact(quotes):
+    """
+    Bouwt offset-tabel en blob voor een reeks uitspraken.
+
+    Args:
+        quotes (iterable): Strings of records
+
+    Returns:
+        tuple: (array('I'), bytes) De offsets (aantal + 1) en de blob
+
+    Raises:
+        ValueError: Als de blob niet met uint32 offsets te adresseren is
+    """
+    offsets = array("I", [0])
+    blob = bytearray()
+    for quote in quotes:
+        blob += encode_entry(quote)
+        if len(blob) > MAX_BLOB_SIZE:
+            raise ValueError("Catalogus te groot voor een .stancat bestand (maximaal 4 GiB)")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def write_compact_catalog(quotes, path):
+    """
+    Schrijft een reeks uitspraken als .stancat bestand.
+
+    Het bestand wordt atomair vervangen (tijdelijk bestand + rename), zodat
+    een draaiende app (catalog_reload.py) nooit een half bestand inleest.
+
+    Args:
+        quotes (iterable): Strings of records
+        path (str): Pad naar het .stancat bestand
+
+    Returns:
+        int: Aantal geschreven uitspraken
+    """
+    offsets, blob = build_compact(quotes)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as catalog_file:
+        catalog_file.write(HEADER.pack(MAGIC, len(offsets) - 1, 0))
+        catalog_file.write(offsets.tobytes())
+        catalog_file.write(blob)
+    os.replace(temp_path, path)
+    return len(offsets) - 1
+
+
+class CompactQuoteStore(QuoteStore):
+    """
+    Catalogus als één UTF-8 blob met een offset-tabel.
+
+    Gebruik `CompactQuoteStore.open(path)` voor een .stancat bestand (gedeeld
+    via mmap) of `CompactQuoteStore.from_records(quotes)` voor een catalogus in
+    het geheugen.
+
+    Args:
+        offsets (array or memoryview): Begin van elke entry, plus het einde van de laatste
+        blob (bytes or mmap): Buffer met de entries
+        base (int, optional): Positie van de eerste entry in de buffer
+        owner (tuple, optional): Bestand en memoryview die bij close() worden gesloten
+    """
+
+    def __init__(self, offsets, blob, base=0, owner=None):
+        self._offsets = offsets
+        # bytes en mmap leveren bij slicing direct bytes op; dat is sneller dan een memoryview
+        self._blob = blob
+        self._base = base
+        self._count = len(offsets) - 1
+        self._owner = owner
+
+    @classmethod
+    def from_records(cls, quotes):
+        """
+        Bouwt een compacte catalogus in het geheugen.
+
+        Args:
+            quotes (iterable): Strings of records
+
+        Returns:
+            CompactQuoteStore: De catalogus
+        """
+        offsets, blob = build_compact(quotes)
+        return cls(offsets, blob)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Opent een .stancat bestand via een read-only memory map van een
+        onveranderlijke kopie (quote_store.open_snapshot).
+
+        Args:
+            path (str): Pad naar het bestand
+
+        Returns:
+            CompactQuoteStore: De catalogus
+
+        Raises:
+            ValueError: Als het bestand geen geldig .stancat bestand is
+        """
+        catalog_file, file_stat = open_snapshot(path)
+        try:
+            if file_stat.st_size < HEADER.size:
+                raise ValueError(f"{path} is geen .stancat bestand")
+            mapped = mmap.mmap(catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            remove_snapshot(catalog_file)
+            raise
+
+        view = memoryview(mapped)
+        offsets = None
+        try:
+            magic, count, _ = HEADER.unpack_from(view, 0)
+            table_end = HEADER.size + 4 * (count + 1)
+            if magic != MAGIC or table_end > len(view):
+                raise ValueError(f"{path} is geen geldig .stancat bestand")
+            if sys.byteorder == "little":
+                offsets = view[HEADER.size:table_end].cast("I")
+            else:
+                offsets = array("I")
+                offsets.frombytes(view[HEADER.size:table_end])
+                offsets.byteswap()
+            if offsets[count] > len(view) - table_end:
+                raise ValueError(f"{path} is afgekapt")
+        except Exception:
+            if isinstance(offsets, memoryview):
+                offsets.release()
+            view.release()
+            mapped.close()
+            remove_snapshot(catalog_file)
+            raise
+
+        store = cls(offsets, mapped, base=table_end, owner=(catalog_file, view))
+        store.path = path
+        store.version = (file_stat.st_mtime_ns, file_stat.st_size)
+        return store
+
+    def __len__(self):
+        return self._count
+
+    def _decode(self, index):
+        """Geeft de typebyte en de gedecodeerde inhoud van een entry."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("catalogus index buiten bereik")
+        start = self._base + self._offsets[index]
+        end = self._base + self._offsets[index + 1]
+        return self._blob[start], self._blob[start + 1:end].decode("utf-8")
+
+    def __getitem__(self, index):
+        # Snelle route voor tekst-entries (het klikpad); zelfde logica als _decode
+        if 0 <= index < self._count:
+            start = self._base + self._offsets[index]
+            if self._blob[start] == ENTRY_TEXT:
+                return self._blob[start + 1:self._base + self._offsets[index + 1]].decode("utf-8")
+        kind, content = self._decode(index)
+        return content if kind == ENTRY_TEXT else json.loads(content)["text"]
+
+    def get_record(self, index):
+        kind, content = self._decode(index)
+        return {"text": content} if kind == ENTRY_TEXT else json.loads(content)
+
+    @property
+    def nbytes(self):
+        """Grootte van offset-tabel en blob in bytes."""
+        return len(self._blob) - self._base + 4 * (self._count + 1)
+
+    def close(self):
+        if self._owner is None:
+            return
+        catalog_file, view = self._owner
+        self._owner = None
+        # Eerst alle views vrijgeven, anders weigert mmap.close()
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        view.release()
+        self._blob.close()
+        remove_snapshot(catalog_file)
+
+
+def read_memory_kb():
+    """
+    Leest het geheugengebruik van het huidige proces uit /proc.
+
+    Returns:
+        dict: rss, pss en private (eigen pagina's) in KB; leeg buiten Linux
+    """
+    fields = {"Rss:": "rss", "Pss:": "pss", "Private_Clean:": "private", "Private_Dirty:": "private"}
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as smaps_file:
+            for line in smaps_file:
+                parts = line.split()
+                name = fields.get(parts[0]) if parts else None
+                if name:
+                    memory[name] = memory.get(name, 0) + int(parts[1])
+    except (OSError, ValueError, IndexError):
+        return {}
+    return memory
+
+
+def _load_representation(mode, jsonl_path, stancat_path):
+    """Laadt de catalogus van de benchmark in een van de BENCH_MODES."""
+    if mode == "list":
+        # Zoals de QUOTES lijst in constants.py: één str object per uitspraak
+        with open(jsonl_path, encoding="utf-8") as jsonl_file:
+            return InMemoryQuoteStore([json.loads(line) for line in jsonl_file])
+    if mode == "compact":
+        with open(jsonl_path, encoding="utf-8") as jsonl_file:
+            return CompactQuoteStore.from_records(json.loads(line) for line in jsonl_file)
+    return CompactQuoteStore.open(stancat_path)
+
+
+def _touch_all(store):
+    """Leest elke uitspraak één keer, zoals een worker die lang genoeg draait."""
+    total = 0
+    for index in range(len(store)):
+        total += len(store[index])
+    return total
+
+
+def measure_representation(mode, jsonl_path, stancat_path, workers):
+    """
+    Meet het geheugen van één representatie (in een vers proces aanroepen).
+
+    Na het laden leest het proces de hele catalogus en forkt het `workers`
+    processen die ook elk de hele catalogus lezen. Per worker wordt het eigen
+    (niet gedeelde) geheugen gemeten; de som van de PSS van alle processen is
+    het werkelijke geheugen op de host.
+
+    Args:
+        mode (str): Een van BENCH_MODES
+        jsonl_path (str): Synthetische catalogus als JSONL
+        stancat_path (str): Dezelfde catalogus als .stancat
+        workers (int): Aantal geforkte workers (0 zonder os.fork)
+
+    Returns:
+        dict: Laadtijd, lookup tijd en geheugen in KB
+    """
+    before = read_memory_kb()
+    start = time.perf_counter()
+    store = _load_representation(mode, jsonl_path, stancat_path)
+    load_ms = (time.perf_counter() - start) * 1000
+    _touch_all(store)
+    after = read_memory_kb()
+
+    rng = random.Random(0)
+    sample = [rng.randrange(len(store)) for _ in range(100000)]
+    start = time.perf_counter()
+    for index in sample:
+        store[index]
+    lookup_ns = (time.perf_counter() - start) / len(sample) * 1e9
+
+    worker_memory = []
+    if workers and hasattr(os, "fork"):
+        pipes = []
+        for _ in range(workers):
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_end)
+                _touch_all(store)
+                os.write(write_end, json.dumps(read_memory_kb()).encode("ascii"))
+                os._exit(0)
+            os.close(write_end)
+            pipes.append((pid, read_end))
+        # Pas meten als alle workers klaar zijn: dan delen ze wat ze kunnen delen
+        for pid, read_end in pipes:
+            with os.fdopen(read_end, "rb") as pipe:
+                worker_memory.append(json.loads(pipe.read() or b"{}"))
+            os.waitpid(pid, 0)
+
+    parent = read_memory_kb()
+    result = {
+        "quotes": len(store),
+        "load_ms": round(load_ms, 1),
+        "lookup_ns": round(lookup_ns),
+        "catalog_rss_kb": after.get("rss", 0) - before.get("rss", 0),
+    }
+    if worker_memory:
+        result["worker_private_kb"] = round(
+            sum(memory.get("private", 0) for memory in worker_memory) / len(worker_memory))
+        result["host_pss_kb"] = parent.get("pss", 0) + sum(memory.get("pss", 0) for memory in worker_memory)
+    store.close()
+    return result
+
+
+def run_memory_benchmark(quotes=200000, workers=8, seed=0):
+    """
+    Vergelijkt het geheugen van een lijst met str objecten met de compacte catalogus.
+
+    Elke representatie wordt in een eigen, vers Python proces gemeten.
+
+    Args:
+        quotes (int, optional): Aantal synthetische uitspraken
+        workers (int, optional): Aantal geforkte workers per meting
+        seed (int, optional): Seed voor de synthetische catalogus
+
+    Returns:
+        dict: Resultaten per representatie
+    """
+    import subprocess
+    import tempfile
+    from constants import QUOTES
+
+    rng = random.Random(seed)
+    words = " ".join(QUOTES).split()
+    texts = [" ".join(rng.choices(words, k=rng.randint(8, 20))) for _ in range(quotes)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jsonl_path = os.path.join(temp_dir, "quotes.jsonl")
+        stancat_path = os.path.join(temp_dir, "quotes.stancat")
+        with open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+            for text in texts:
+                jsonl_file.write(json.dumps(text, ensure_ascii=False) + "\n")
+        write_compact_catalog(texts, stancat_path)
+
+        results = {}
+        for mode in BENCH_MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "measure", mode,
+                 jsonl_path, stancat_path, str(workers)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output)
+        results["stancat_file_kb"] = os.path.getsize(stancat_path) // 1024
+    return results
+
+
+# Command line interface
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacte catalogus voor Stan de GitHub Agent")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Zet een catalogus om naar een .stancat bestand")
+    build_parser.add_argument("--source", help="Bron (.jsonl, .csv, .sqlite, .db); default de QUOTES lijst")
+    build_parser.add_argument("--output", required=True, help="Pad naar het .stancat bestand")
+
+    bench_parser = subparsers.add_parser("bench", help="Vergelijk het geheugen met een lijst met str objecten")
+    bench_parser.add_argument("--quotes", type=int, default=200000, help="Aantal synthetische uitspraken")
+    bench_parser.add_argument("--workers", type=int, default=8, help="Aantal geforkte workers")
+    bench_parser.add_argument("--output", help="Schrijf de resultaten als JSON naar dit bestand")
+
+    # Interne meting in een vers proces (zie run_memory_benchmark)
+    measure_parser = subparsers.add_parser("measure")
+    measure_parser.add_argument("mode", choices=BENCH_MODES)
+    measure_parser.add_argument("jsonl_path")
+    measure_parser.add_argument("stancat_path")
+    measure_parser.add_argument("workers", type=int)
+
+    arguments = parser.parse_args()
+    if arguments.command == "build":
+        source = open_quote_store(arguments.source)
+        count = write_compact_catalog((record for _, record in source.iter_records()), arguments.output)
+        source.close()
+        check = CompactQuoteStore.open(arguments.output)
+        print(f"{count} uitspraken geschreven naar {arguments.output} ({check.nbytes} bytes)")
+        check.close()
+    elif arguments.command == "bench":
+        results = run_memory_benchmark(arguments.quotes, arguments.workers)
+        print(json.dumps(results, indent=2))
+        if arguments.output:
+            with open(arguments.output, "w", encoding="utf-8") as output_file:
+                json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(measure_representation(
+            arguments.mode, arguments.jsonl_path, arguments.stancat_path, arguments.workers)))
@@ -6,6 +6,7 @@ inclusief een lijst van grappige uitspraken over wat een GitHub Agent kan doen.
 """
 
 import os
+import tempfile
 
 # Basis pad relatief ten opzichte van de locatie van dit bestand
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -29,8 +30,87 @@ QUOTES = [
     "Soms droom ik van perfect geïndenteerde code."
 ]
 
+# Optionele externe catalogus met uitspraken (.jsonl, .csv, .sqlite of .db).
+# Indien niet ingesteld wordt de QUOTES lijst hierboven gebruikt.
+QUOTE_SOURCE = os.environ.get("STAN_QUOTE_SOURCE")
+
+# Hot reload van de catalogus uit QUOTE_SOURCE (zie catalog_reload.py): het
+# bestand wordt elke CATALOG_RELOAD_INTERVAL seconden gecontroleerd (0 zet het
+# herladen uit); een vervangen catalogus wordt na CATALOG_RETIRE_GRACE seconden
+# gesloten, zodat lopende reruns hem nog kunnen lezen
+CATALOG_RELOAD_INTERVAL = float(os.environ.get("STAN_CATALOG_RELOAD_INTERVAL", "2"))
+CATALOG_RETIRE_GRACE = 60
+
+# Bestanden uit QUOTE_SOURCE worden niet direct gemapt maar via een
+# onveranderlijke kopie in deze directory (zie quote_store.open_snapshot), zodat
+# het bewerken van het bronbestand een gemapte catalogus niet kan afkappen.
+# Processen met dezelfde versie van het bestand delen één kopie.
+CATALOG_SNAPSHOT_DIR = os.environ.get(
+    "STAN_CATALOG_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "stan-catalog-snapshots")
+)
+
+# Selectiemodus voor uitspraken:
+# "random" = willekeurig, zonder directe herhaling
+# "bag" = shuffle-bag, elke uitspraak één keer voordat er herhalingen komen
+QUOTE_SELECTION_MODE = os.environ.get("STAN_QUOTE_SELECTION_MODE", "random")
+
+# Root seed voor de willekeur per sessie (zie quote_sampler.session_rng). Elke
+# sessie krijgt een eigen random.Random, afgeleid van deze seed en het
+# sessie-id, zodat een klikreeks reproduceerbaar is (replay.py). Indien niet
+# ingesteld krijgt elke sessie een onvoorspelbare seed.
+RANDOM_SEED = os.environ.get("STAN_RANDOM_SEED")
+
+# Gewogen selectie op basis van het "weight" veld van de uitspraken in de catalogus
+QUOTE_WEIGHTED = os.environ.get("STAN_QUOTE_WEIGHTED", "0") == "1"
+
+# Tekst die wordt getoond zolang er nog niet op de robot is geklikt
+QUOTE_PLACEHOLDER = "Klik op de robot om een grappige uitspraak te zien!"
+
+# Procesbrede quote service (zie quote_service.py): maximaal aantal bewaarde
+# sessie-cursors en het aantal seconden waarna een inactieve cursor vervalt
+QUOTE_SERVICE_MAX_SESSIONS = 10000
+QUOTE_SERVICE_SESSION_TTL = 1800
+
+# Lookahead per sessie (zie quote_service.py): aantal vooraf gekozen indices
+# per sessie, in batches aangevuld door QUOTE_LOOKAHEAD_WORKERS
+# achtergrondthreads (0 = uit, elke klik kiest synchroon)
+QUOTE_LOOKAHEAD = int(os.environ.get("STAN_QUOTE_LOOKAHEAD", "0"))
+QUOTE_LOOKAHEAD_WORKERS = int(os.environ.get("STAN_QUOTE_LOOKAHEAD_WORKERS", "2"))
+
+# Taal van uitspraken die geen "lang" veld hebben
+DEFAULT_QUOTE_LANGUAGE = "nl"
+
+# Directory met statische bestanden (afbeeldingen e.d.)
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+
 # Pad naar de robot afbeelding met correcte pad constructie
-ROBOT_IMAGE_PATH = os.path.join(BASE_DIR, "assets", "robot.svg")
+ROBOT_IMAGE_PATH = os.path.join(ASSETS_DIR, "robot.svg")
+
+# Aantal seconden dat een geladen asset als actueel wordt beschouwd voordat
+# mtime/inode opnieuw wordt gecontroleerd (0 = bij elke aanvraag controleren)
+ASSET_CHECK_INTERVAL = 2.0
+
+# Manier waarop afbeeldingen naar de browser gaan:
+# "static" = URL naar een bestand met content-hash in de naam (cachebaar door de browser)
+# "inline" = base64 data URI die bij elke rerun opnieuw wordt meegestuurd
+ASSET_SERVING_MODE = os.environ.get("STAN_ASSET_SERVING_MODE", "static")
+
+# Directory die Streamlit serveert onder app/static (zie .streamlit/config.toml)
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# URL prefix voor gepubliceerde assets; wijs deze naar static_server.py of een
+# reverse proxy voor lange "immutable" cache headers
+STATIC_URL_PREFIX = os.environ.get("STAN_STATIC_URL_PREFIX", "app/static")
+
+# Breedtes (px) waarvoor asset_build.py rasters van de robot maakt, en de
+# rasterformaten; de kleinste geschikte variant wordt per breedte gekozen
+ROBOT_RASTER_WIDTHS = tuple(
+    int(width) for width in os.environ.get("STAN_ROBOT_RASTER_WIDTHS", "150,300,600").split(",")
+)
+ROBOT_RASTER_FORMATS = ("webp", "png")
+
+# Serveer de robot via de gebouwde varianten (geminificeerd, voorgecomprimeerd, rasters)
+ASSET_VARIANTS = os.environ.get("STAN_ASSET_VARIANTS", "1") == "1"
 
 # App configuratie parameters
 APP_TITLE = "Stan de GitHub Agent"
@@ -41,3 +121,100 @@ PRIMARY_COLOR = "#2EA44F"  # GitHub groen
 SECONDARY_COLOR = "#0366D6"  # GitHub blauw
 BACKGROUND_COLOR = "#F6F8FA"  # GitHub lichtgrijs achtergrond
 TEXT_COLOR = "#24292E"  # GitHub donkergrijs tekst
+
+# Maximaal aantal HTML fragmenten (uitspraken, robot) in de fragment cache
+HTML_FRAGMENT_CACHE_SIZE = 4096
+
+# Bouw bij de warm-up de HTML van de hele catalogus vooraf op (tot de cache vol is)
+HTML_PRERENDER = os.environ.get("STAN_HTML_PRERENDER", "0") == "1"
+
+# Weergave van een nieuwe uitspraak:
+# "fade" = de hele uitspraak in één keer infaden
+# "typewriter" = woord voor woord onthullen via CSS animaties in de browser
+#                (één bericht per uitspraak, geen extra reruns)
+QUOTE_DISPLAY_MODE = os.environ.get("STAN_QUOTE_DISPLAY_MODE", "fade")
+
+# Typemachine-tempo in milliseconden per teken, en de maximale totale duur
+# (langere uitspraken worden sneller getypt)
+TYPEWRITER_CHAR_MS = 30
+TYPEWRITER_MAX_MS = 2500
+
+# Zoekindex (zie quote_search.py): maximaal aantal typefouten bij fuzzy lookup
+# en de minimale lengte van een zoekterm voordat er fuzzy gezocht wordt
+SEARCH_FUZZY_DISTANCE = 1
+SEARCH_FUZZY_MIN_LENGTH = 4
+
+# Venster (ms) waarin snelle klikken op de robot in de browser worden
+# samengevoegd tot één bericht aan de server
+ROBOT_CLICK_DEBOUNCE_MS = 250
+
+# Rate limiting van klikken per sessie (zie click_limiter.py): token bucket met
+# CLICK_RATE_LIMIT tokens per seconde en maximaal CLICK_BURST klikken achter
+# elkaar (CLICK_RATE_LIMIT=0 zet de limiet uit)
+CLICK_RATE_LIMIT = float(os.environ.get("STAN_CLICK_RATE", "5"))
+CLICK_BURST = int(os.environ.get("STAN_CLICK_BURST", "10"))
+
+# Klikken die samen in één rerun binnenkomen:
+# "each" = de uitspraak schuift per klik één plaats op
+# "once" = de uitspraak schuift één keer op, de counter telt alle klikken
+CLICK_COALESCE_MODE = os.environ.get("STAN_CLICK_COALESCE", "each")
+
+# Client-side quote modus (kiosk): de catalogus gaat één keer gecomprimeerd
+# naar de browser, die zelf de uitspraken roteert en klikken in batches meldt
+CLIENT_QUOTE_MODE = os.environ.get("STAN_CLIENT_QUOTE_MODE", "0") == "1"
+
+# Aantal uitspraken per pagina die in client-side modus naar de browser gaat
+CLIENT_QUOTE_PAGE_SIZE = 500
+
+# Client-side klikken worden gemeld na dit aantal klikken, of na dit aantal
+# milliseconden zonder nieuwe klik
+CLIENT_CLICK_SYNC_BATCH = 10
+CLIENT_CLICK_SYNC_INTERVAL_MS = 5000
+
+# Hoe de CSS bundle in de pagina komt:
+# "once" = één keer per browsersessie in de <head> van de pagina
+# "every_run" = bij elke rerun via st.markdown (werkt ook zonder iframe toegang)
+STYLE_INJECTION_MODE = os.environ.get("STAN_STYLE_INJECTION_MODE", "once")
+
+# Instrumentatie van de reruns (zie metrics.py); staat standaard uit
+METRICS_ENABLED = os.environ.get("STAN_METRICS", "0") == "1"
+
+# Export van de metrics in het Prometheus formaat:
+# "http" = lokaal endpoint op METRICS_HOST:METRICS_PORT (/metrics)
+# "file" = bestand METRICS_FILE, hooguit eens per METRICS_FILE_INTERVAL seconden bijgewerkt
+METRICS_EXPORT = os.environ.get("STAN_METRICS_EXPORT", "http")
+METRICS_HOST = os.environ.get("STAN_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("STAN_METRICS_PORT", "9464"))
+METRICS_FILE = os.environ.get("STAN_METRICS_FILE", os.path.join(BASE_DIR, "metrics.prom"))
+METRICS_FILE_INTERVAL = 5.0
+
+# Blijvende click analytics (zie click_analytics.py): klikken worden gebufferd
+# en in batches vanuit een achtergrondthread naar SQLite geschreven. Staat
+# standaard uit (STAN_ANALYTICS=1 zet hem aan). De database staat standaard in
+# de datamap van de gebruiker ($XDG_DATA_HOME of ~/.local/share) en niet naast
+# de broncode, die bij een deploy vaak alleen-lezen is.
+ANALYTICS_ENABLED = os.environ.get("STAN_ANALYTICS", "0") == "1"
+ANALYTICS_DB_PATH = os.environ.get("STAN_ANALYTICS_DB", os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "stan-github-agent", "analytics.sqlite"
+))
+
+# Een batch wordt geschreven bij dit aantal events, of na dit aantal seconden
+ANALYTICS_BATCH_SIZE = 100
+ANALYTICS_FLUSH_INTERVAL = 2.0
+
+# Maximaal aantal events in de buffer; daarboven vallen de oudste weg
+ANALYTICS_MAX_BUFFER = 10000
+
+# Gedeelde staat voor meerdere Streamlit processen (zie state_backend.py):
+# "session" = alleen st.session_state, "memory" = procesbreed in het geheugen,
+# "sqlite" = bestand gedeeld door alle processen op één host, "redis" = Redis server
+STATE_BACKEND = os.environ.get("STAN_STATE_BACKEND", "session")
+STATE_SQLITE_PATH = os.environ.get("STAN_STATE_SQLITE", os.path.join(BASE_DIR, "state.sqlite"))
+STATE_REDIS_URL = os.environ.get("STAN_STATE_REDIS_URL", "redis://127.0.0.1:6379/0")
+
+# Seconden waarna de bewaarde staat van een inactieve sessie vervalt
+STATE_TTL = 86400
+
+# Query parameter met het id van de browsersessie
+STATE_SESSION_PARAM = "sid"
@@ -0,0 +1,103 @@
+"""
+Fragment Cache Module voor Stan de GitHub Agent.
+
+Deze module bevat een begrensde LRU cache voor HTML fragmenten. De invoer van
+de HTML generators (uitspraak + is_new, robot breedte + afbeelding) komt uit
+een eindige verzameling, dus elk fragment hoeft maar één keer te worden
+opgebouwd; daarna is renderen een dict lookup.
+"""
+
+import threading
+from collections import OrderedDict
+from constants import HTML_FRAGMENT_CACHE_SIZE
+
+
+class FragmentCache:
+    """
+    Thread-safe LRU cache van HTML fragmenten.
+
+    Args:
+        max_entries (int, optional): Maximaal aantal fragmenten in de cache
+    """
+
+    def __init__(self, max_entries=HTML_FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        """
+        Geeft het fragment voor een sleutel en rendert het bij een miss.
+
+        Args:
+            key (tuple): Sleutel met alle invoer van het fragment
+            render (callable): Functie zonder argumenten die het fragment maakt
+
+        Returns:
+            str: Het HTML fragment
+        """
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        # Renderen buiten de lock; bij een race wint gewoon de laatste
+        fragment = render()
+        self.put(key, fragment)
+        return fragment
+
+    def put(self, key, fragment):
+        """Zet een fragment in de cache en verwijdert zo nodig het oudste."""
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Geeft statistieken van de cache.
+
+        Returns:
+            dict: Aantal fragmenten, hits en misses
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Leegt de cache."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Eén cache per proces, gedeeld door alle sessies
+_cache = FragmentCache()
+
+
+def get_fragment_cache():
+    """
+    Geeft de procesbrede fragment cache terug.
+
+    Returns:
+        FragmentCache: De gedeelde cache
+    """
+    return _cache
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    print("Fragment Cache Test\n")
+    cache = FragmentCache(max_entries=2)
+    for key in ("a", "b", "a", "c", "b"):
+        cache.get_or_render((key,), lambda: f"<p>{key}</p>")
+    print(f"Statistieken: {cache.stats()}")
@@ -0,0 +1,517 @@
+"""
+Load Test Module voor Stan de GitHub Agent.
+
+Deze module meet hoeveel bezoekers één Streamlit worker met app.py aankan.
+Een lokale `streamlit run` server wordt gestart (of een bestaande server op
+localhost gebruikt) en een groot aantal gesimuleerde sessies verbindt via
+Streamlit's eigen websocket protocol (`/_stcore/stream`, protobuf BackMsg en
+ForwardMsg). Elke sessie doet de eerste run, zoekt de robot knop op en klikt
+daarna met een instelbaar tempo (Poisson verdeeld); een klik is klaar zodra de
+server het einde van de (fragment-)rerun meldt.
+
+Gerapporteerd worden de doorvoer (klikken per seconde), de latency van de
+eerste run en van een klik (p50/p90/p99/max), de groei van het RSS geheugen
+van de server, het aantal afgevallen sessies met de reden en het aantal klikken
+dat de rate limiter van de app heeft geweigerd (uit de caption onder de quote).
+
+Een eigen server draait zonder click rate limiter (STAN_CLICK_RATE=0), zodat
+elke klik echt serverwerk kost, en schrijft zijn analytics database, state en
+metrics naar een tijdelijke map in plaats van naar de repository. Bij --url
+bepaalt de draaiende server zelf zijn limiter en paden.
+
+Alles draait op localhost; er is geen browser nodig.
+
+Gebruik:
+    python loadtest.py --sessions 1000 --clicks 10 --rate 0.5 --ramp 20
+    python loadtest.py --url ws://127.0.0.1:8501 --pid 12345 --output loadtest.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import argparse
+import platform
+import subprocess
+import urllib.request
+from collections import Counter
+from constants import BASE_DIR
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - websockets komt mee met Streamlit
+    websockets = None
+
+
+# Pad naar de app die wordt getest
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+# Websocket route van Streamlit
+STREAM_PATH = "/_stcore/stream"
+
+# Key van de knop waarmee de sessies op de robot klikken
+CLICK_BUTTON_KEY = "robot_button"
+
+# Maximale tijd (s) voor de eerste run of één klik voordat een sessie afvalt
+DEFAULT_TIMEOUT = 30.0
+
+# Maximale tijd (s) die de server krijgt om op te starten
+SERVER_START_TIMEOUT = 60.0
+
+# Interval (s) tussen twee RSS metingen van de server
+RSS_SAMPLE_INTERVAL = 0.5
+
+# Caption waarmee app.py de door de rate limiter geweigerde klikken meldt
+REJECTED_CLICKS_PATTERN = re.compile(r"\((\d+) te snelle klikken genegeerd\)")
+
+
+def percentile(values, fraction):
+    """
+    Berekent een percentiel met lineaire interpolatie.
+
+    Args:
+        values (list): Meetwaarden
+        fraction (float): Gevraagd percentiel tussen 0 en 1
+
+    Returns:
+        float: Het percentiel, of 0.0 bij een lege lijst
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values):
+    """Vat latencies samen als p50/p90/p99/max in milliseconden."""
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.50), 2),
+        "p90": round(percentile(values, 0.90), 2),
+        "p99": round(percentile(values, 0.99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+def read_rss_kb(pid):
+    """
+    Leest het RSS geheugen van een proces uit /proc.
+
+    Args:
+        pid (int): Proces-id
+
+    Returns:
+        int: RSS in KB, of None als het niet te bepalen is (geen Linux of geen proces)
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def raise_file_limit():
+    """Verhoogt de limiet op open bestanden tot het maximum (één socket per sessie)."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def server_environment(data_dir):
+    """
+    Bouwt de omgeving voor een eigen server: zonder click rate limiter en met
+    de analytics database, state en metrics in data_dir.
+
+    Args:
+        data_dir (str): Tijdelijke map voor de bestanden van de server
+
+    Returns:
+        dict: Omgevingsvariabelen voor het serverproces
+    """
+    environment = dict(os.environ)
+    environment.update({
+        "STAN_CLICK_RATE": "0",
+        "STAN_ANALYTICS_DB": os.path.join(data_dir, "analytics.sqlite"),
+        "STAN_STATE_SQLITE": os.path.join(data_dir, "state.sqlite"),
+        "STAN_METRICS_FILE": os.path.join(data_dir, "metrics.prom"),
+        "STAN_CATALOG_SNAPSHOT_DIR": os.path.join(data_dir, "snapshots"),
+    })
+    return environment
+
+
+def start_server(port, data_dir):
+    """
+    Start app.py met `streamlit run` op localhost en wacht tot hij gezond is.
+
+    Args:
+        port (int): Poort van de server
+        data_dir (str): Tijdelijke map voor de bestanden van de server (zie server_environment)
+
+    Returns:
+        subprocess.Popen: Het serverproces
+
+    Raises:
+        RuntimeError: Als de server niet binnen SERVER_START_TIMEOUT opstart
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP_PATH,
+            "--server.address", "127.0.0.1",
+            "--server.port", str(port),
+            "--server.headless", "true",
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=BASE_DIR, env=server_environment(data_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit server stopte met exitcode {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"Streamlit server niet bereikbaar binnen {SERVER_START_TIMEOUT} s")
+
+
+class SessionDropped(Exception):
+    """Een gesimuleerde sessie is afgevallen (verbinding, timeout of fout)."""
+
+
+class SimulatedSession:
+    """
+    Eén bezoeker die via het websocket protocol op de robot klikt.
+
+    Args:
+        url (str): Basis-URL van de server (ws://host:poort)
+        timeout (float): Maximale tijd voor de eerste run of één klik
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip("/") + STREAM_PATH
+        self.timeout = timeout
+        self.button_id = None
+        self.fragment_id = ""
+        self.received_bytes = 0
+        self.rejected_clicks = 0
+        self._connection = None
+
+    async def connect(self):
+        """Opent de websocket; het eerste subprotocol selecteert Streamlit's protocol."""
+        self._connection = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout
+        )
+
+    async def close(self):
+        """Sluit de websocket."""
+        if self._connection is not None:
+            await self._connection.close()
+
+    async def run_script(self, widget_id=None):
+        """
+        Vraagt een (fragment-)rerun aan en wacht tot de server hem afrondt.
+
+        Args:
+            widget_id (str, optional): Id van de knop die wordt ingedrukt;
+                None voor de eerste run
+
+        Returns:
+            float: Duur in milliseconden
+
+        Raises:
+            SessionDropped: Bij een timeout, verbroken verbinding of een mislukte run
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        back_msg = BackMsg()
+        client_state = back_msg.rerun_script
+        client_state.query_string = ""
+        if widget_id is not None:
+            client_state.fragment_id = self.fragment_id
+            widget = client_state.widget_states.widgets.add()
+            widget.id = widget_id
+            widget.trigger_value = True
+
+        start = time.perf_counter()
+        try:
+            await self._connection.send(back_msg.SerializeToString())
+            await asyncio.wait_for(self._wait_for_finish(), self.timeout)
+        except asyncio.TimeoutError:
+            raise SessionDropped("timeout")
+        except websockets.ConnectionClosed:
+            raise SessionDropped("connection_closed")
+        return (time.perf_counter() - start) * 1000
+
+    async def _wait_for_finish(self):
+        """Leest ForwardMsgs tot het einde van de run en onthoudt de robot knop."""
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            payload = await self._connection.recv()
+            self.received_bytes += len(payload)
+            forward_msg = ForwardMsg()
+            forward_msg.ParseFromString(payload)
+            kind = forward_msg.WhichOneof("type")
+
+            if kind == "delta" and forward_msg.delta.WhichOneof("type") == "new_element":
+                element = forward_msg.delta.new_element
+                if element.WhichOneof("type") == "exception":
+                    raise SessionDropped("script_exception")
+                if element.WhichOneof("type") == "button" and element.button.id.endswith(f"-{CLICK_BUTTON_KEY}"):
+                    self.button_id = element.button.id
+                    self.fragment_id = forward_msg.delta.fragment_id
+                elif element.WhichOneof("type") == "markdown":
+                    rejected = REJECTED_CLICKS_PATTERN.search(element.markdown.body)
+                    if rejected:
+                        self.rejected_clicks = int(rejected.group(1))
+
+            elif kind == "script_finished":
+                status = forward_msg.script_finished
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise SessionDropped("compile_error")
+                if status != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    async def run(self, clicks, rate, results):
+        """
+        Doorloopt de sessie: verbinden, eerste run en klikken.
+
+        Args:
+            clicks (int): Aantal klikken op de robot
+            rate (float): Gemiddeld aantal klikken per seconde
+            results (dict): Gedeelde resultaten (first_run_ms, click_ms, dropped, ...)
+        """
+        try:
+            try:
+                await self.connect()
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake) as e:
+                raise SessionDropped(f"connect_failed:{type(e).__name__}")
+
+            results["first_run_ms"].append(await self.run_script())
+            if self.button_id is None:
+                raise SessionDropped("button_not_found")
+            results["connected"] += 1
+
+            for _ in range(clicks):
+                await asyncio.sleep(random.expovariate(rate))
+                results["click_ms"].append(await self.run_script(self.button_id))
+            results["completed"] += 1
+
+        except SessionDropped as e:
+            results["dropped"][str(e)] += 1
+        finally:
+            results["received_bytes"] += self.received_bytes
+            results["rejected_clicks"] += self.rejected_clicks
+            try:
+                await self.close()
+            except Exception:
+                pass
+
+
+async def sample_rss(pid, samples, stop_event):
+    """Meet het RSS van de server tot stop_event gezet wordt."""
+    while not stop_event.is_set():
+        rss_kb = read_rss_kb(pid)
+        if rss_kb is not None:
+            samples.append(rss_kb)
+        try:
+            await asyncio.wait_for(stop_event.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(url, sessions, clicks, rate, ramp, timeout, server_pid=None):
+    """
+    Start alle gesimuleerde sessies, verdeeld over de ramp-up tijd.
+
+    Args:
+        url (str): Basis-URL van de server (ws://host:poort)
+        sessions (int): Aantal sessies
+        clicks (int): Aantal klikken per sessie
+        rate (float): Gemiddeld aantal klikken per seconde per sessie
+        ramp (float): Seconden waarover het starten van de sessies verdeeld wordt
+        timeout (float): Maximale tijd voor de eerste run of één klik
+        server_pid (int, optional): Proces-id van de server voor de RSS meting
+
+    Returns:
+        dict: Ruwe resultaten (latencies, tellers, RSS metingen en duur)
+    """
+    results = {
+        "first_run_ms": [], "click_ms": [], "connected": 0, "completed": 0,
+        "dropped": Counter(), "received_bytes": 0, "rejected_clicks": 0, "rss_kb": [],
+    }
+    rss_baseline = read_rss_kb(server_pid) if server_pid else None
+
+    stop_event = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server_pid, results["rss_kb"], stop_event)) if server_pid else None
+
+    async def delayed_session(delay):
+        await asyncio.sleep(delay)
+        await SimulatedSession(url, timeout).run(clicks, rate, results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        delayed_session(ramp * index / sessions) for index in range(sessions)
+    ))
+    results["duration_s"] = time.perf_counter() - started
+
+    stop_event.set()
+    if sampler is not None:
+        await sampler
+    results["rss_baseline_kb"] = rss_baseline
+    results["rss_end_kb"] = read_rss_kb(server_pid) if server_pid else None
+    return results
+
+
+def build_report(results, config):
+    """
+    Zet de ruwe resultaten om naar het rapport.
+
+    Args:
+        results (dict): Resultaat van run_load
+        config (dict): Instellingen van de run
+
+    Returns:
+        dict: Het rapport, klaar om als JSON weg te schrijven
+    """
+    duration = results["duration_s"]
+    rss_samples = results["rss_kb"]
+    baseline = results["rss_baseline_kb"]
+    peak = max(rss_samples) if rss_samples else None
+    rss_report = None
+    if baseline is not None and peak is not None:
+        rss_report = {
+            "baseline_mb": round(baseline / 1024, 1),
+            "peak_mb": round(peak / 1024, 1),
+            "end_mb": round(results["rss_end_kb"] / 1024, 1) if results["rss_end_kb"] else None,
+            "growth_mb": round((peak - baseline) / 1024, 1),
+            "growth_per_session_kb": round((peak - baseline) / max(results["connected"], 1), 1),
+        }
+
+    return {
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "sessions": {
+            "started": config["sessions"],
+            "connected": results["connected"],
+            "completed": results["completed"],
+            "dropped": sum(results["dropped"].values()),
+            "dropped_reasons": dict(results["dropped"]),
+        },
+        "throughput": {
+            "clicks_per_second": round(len(results["click_ms"]) / duration, 1) if duration else 0.0,
+            "rejected_clicks": results["rejected_clicks"],
+            "received_mb": round(results["received_bytes"] / 1024 / 1024, 2),
+            "duration_s": round(duration, 1),
+        },
+        "first_run_ms": summarize(results["first_run_ms"]),
+        "click_latency_ms": summarize(results["click_ms"]),
+        "server_rss": rss_report,
+    }
+
+
+def run_load_test(sessions, clicks, rate, ramp, timeout=DEFAULT_TIMEOUT, port=8599, url=None, pid=None, seed=0):
+    """
+    Voert een volledige load test uit, zo nodig met een eigen server.
+
+    Args:
+        sessions (int): Aantal gesimuleerde sessies
+        clicks (int): Aantal klikken per sessie
+        rate (float): Gemiddeld aantal klikken per seconde per sessie
+        ramp (float): Ramp-up tijd in seconden
+        timeout (float, optional): Maximale tijd voor de eerste run of één klik
+        port (int, optional): Poort voor de eigen server
+        url (str, optional): Bestaande server (ws://127.0.0.1:poort); dan wordt er geen server gestart
+        pid (int, optional): Proces-id van een bestaande server voor de RSS meting
+        seed (int, optional): Seed voor het kliktempo
+
+    Returns:
+        dict: Het rapport
+
+    Raises:
+        RuntimeError: Als websockets ontbreekt of de server niet opstart
+    """
+    if websockets is None:
+        raise RuntimeError("De load test heeft het websockets package nodig (pip install websockets)")
+
+    raise_file_limit()
+    random.seed(seed)
+    config = {"sessions": sessions, "clicks": clicks, "rate": rate, "ramp": ramp,
+              "timeout": timeout, "seed": seed}
+
+    server = data_dir = None
+    if url is None:
+        data_dir = tempfile.TemporaryDirectory(prefix="stan-loadtest-")
+        try:
+            server = start_server(port, data_dir.name)
+        except Exception:
+            data_dir.cleanup()
+            raise
+        url, pid = f"ws://127.0.0.1:{port}", server.pid
+    try:
+        results = asyncio.run(run_load(url, sessions, clicks, rate, ramp, timeout, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+            data_dir.cleanup()
+
+    config["url"] = url
+    # Alleen bij een eigen server staat vast dat de limiter uit staat
+    config["click_rate_limit"] = 0.0 if server is not None else None
+    return build_report(results, config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test van één Streamlit worker met app.py")
+    parser.add_argument("--sessions", type=int, default=200, help="Aantal gesimuleerde sessies")
+    parser.add_argument("--clicks", type=int, default=10, help="Aantal klikken per sessie")
+    parser.add_argument("--rate", type=float, default=1.0, help="Gemiddeld aantal klikken per seconde per sessie")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconden waarover de sessies starten")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconden voordat een run als afgevallen telt")
+    parser.add_argument("--port", type=int, default=8599, help="Poort voor de eigen server")
+    parser.add_argument("--url", help="Gebruik een draaiende server, bijv. ws://127.0.0.1:8501")
+    parser.add_argument("--pid", type=int, help="Proces-id van die server, voor de RSS meting")
+    parser.add_argument("--seed", type=int, default=0, help="Seed voor het kliktempo")
+    parser.add_argument("--output", help="Schrijf het rapport als JSON naar dit bestand")
+    arguments = parser.parse_args()
+
+    if arguments.url and not arguments.url.startswith(("ws://127.0.0.1", "ws://localhost")):
+        parser.error("de load test draait alleen tegen localhost")
+
+    report = run_load_test(
+        arguments.sessions, arguments.clicks, arguments.rate, arguments.ramp,
+        arguments.timeout, arguments.port, arguments.url, arguments.pid, arguments.seed
+    )
+    print(json.dumps(report, indent=2))
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Rapport geschreven naar {arguments.output}")
@@ -0,0 +1,385 @@
+"""
+Metrics Module voor Stan de GitHub Agent.
+
+Deze module bevat een optionele, lichte instrumentatielaag. Per sectie van een
+rerun (paginaconfiguratie, stijlen, robot, uitspraak, ...) en per quote
+selectie wordt de duur gemeten; daarnaast worden reruns, klikken en nieuwe
+sessies geteld. De metrics zijn beschikbaar in het Prometheus tekstformaat via
+een lokaal HTTP endpoint of een bestand (voor de node_exporter textfile
+collector).
+
+Instrumentatie staat standaard uit (STAN_METRICS=1 zet hem aan). Uitgeschakeld
+geeft `timed` een gedeelde lege context manager terug en doet `count` niets,
+zodat de kosten verwaarloosbaar zijn.
+
+Per-sessie tellers staan in de sessie-state (METRICS_SESSION_KEY); in de
+export staan alleen totalen, om het aantal tijdreeksen begrensd te houden.
+Het gemiddelde per sessie volgt uit stan_clicks_total / stan_sessions_total.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from constants import (
+    METRICS_ENABLED,
+    METRICS_EXPORT,
+    METRICS_HOST,
+    METRICS_PORT,
+    METRICS_FILE,
+    METRICS_FILE_INTERVAL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Grenzen (seconden) van de histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Namen van de metrics
+SECTION_METRIC = "stan_section_duration_seconds"
+QUOTE_DRAW_METRIC = "stan_quote_draw_duration_seconds"
+RERUNS_METRIC = "stan_reruns_total"
+CLICKS_METRIC = "stan_clicks_total"
+CLICKS_REJECTED_METRIC = "stan_clicks_rejected_total"
+CLICKS_COALESCED_METRIC = "stan_clicks_coalesced_total"
+SESSIONS_METRIC = "stan_sessions_total"
+ERRORS_METRIC = "stan_errors_total"
+CATALOG_RELOADS_METRIC = "stan_catalog_reloads_total"
+QUOTE_LOOKAHEAD_METRIC = "stan_quote_lookahead_total"
+
+# Sessie-state sleutel met de tellers van de huidige sessie
+METRICS_SESSION_KEY = "metrics_session"
+
+HELP_TEXTS = {
+    SECTION_METRIC: "Duur van een sectie van de rerun",
+    QUOTE_DRAW_METRIC: "Duur van het kiezen van de volgende uitspraak",
+    RERUNS_METRIC: "Aantal script- en fragmentreruns",
+    CLICKS_METRIC: "Aantal verwerkte klikken op de robot",
+    CLICKS_REJECTED_METRIC: "Aantal door de rate limiter geweigerde klikken",
+    CLICKS_COALESCED_METRIC: "Aantal klikken samengevoegd met een andere klik in dezelfde rerun",
+    SESSIONS_METRIC: "Aantal gestarte sessies",
+    ERRORS_METRIC: "Aantal fouten per sectie",
+    CATALOG_RELOADS_METRIC: "Aantal herladen catalogi per resultaat",
+    QUOTE_LOOKAHEAD_METRIC: "Aantal klikken per resultaat van de lookahead (hit of miss)",
+}
+
+# Lege context manager voor uitgeschakelde instrumentatie (herbruikbaar)
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class MetricsRegistry:
+    """
+    Thread-safe opslag van tellers en histogrammen.
+
+    Labels worden als gesorteerde tuple van (naam, waarde) paren opgeslagen,
+    zodat dezelfde combinatie altijd op dezelfde reeks uitkomt.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, labels=()):
+        """
+        Verhoogt een teller.
+
+        Args:
+            name (str): Naam van de metric
+            amount (float, optional): Ophoging. Default is 1.
+            labels (tuple, optional): Labels als tuple van (naam, waarde) paren
+        """
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """
+        Voegt een meting toe aan een histogram.
+
+        Args:
+            name (str): Naam van de metric
+            value (float): Gemeten waarde in seconden
+            labels (tuple, optional): Labels als tuple van (naam, waarde) paren
+        """
+        key = (name, labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Tellingen per bucket (laatste = +Inf), som en aantal
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][position] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self):
+        """
+        Geeft alle metrics in het Prometheus tekstformaat.
+
+        Returns:
+            str: De exposition tekst
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP_TEXTS.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Verwijdert alle metingen."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _format_labels(labels):
+    """Zet een tuple van (naam, waarde) paren om naar {naam="waarde",...}."""
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+# Eén registry per proces, gedeeld door alle sessies
+_registry = MetricsRegistry()
+_exporter_lock = threading.Lock()
+_exporter_started = False
+# Een mislukte start (bijv. poort bezet) wordt niet bij elke rerun opnieuw geprobeerd
+_exporter_failed = False
+# Een bestand dat niet te schrijven is wordt per reeks mislukkingen één keer gelogd
+_file_write_failed = False
+_last_file_write = 0.0
+
+
+def get_metrics_registry():
+    """
+    Geeft de procesbrede metrics registry terug.
+
+    Returns:
+        MetricsRegistry: De gedeelde registry
+    """
+    return _registry
+
+
+def enabled():
+    """Geeft aan of de instrumentatie aan staat."""
+    return METRICS_ENABLED
+
+
+class _Timer:
+    """Context manager die de duur van een blok in een histogram vastlegt."""
+
+    __slots__ = ("metric", "labels", "start")
+
+    def __init__(self, metric, labels):
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _registry.observe(self.metric, time.perf_counter() - self.start, self.labels)
+        if exc_type is not None:
+            _registry.inc(ERRORS_METRIC, 1, self.labels)
+        return False
+
+
+def timed(section, metric=SECTION_METRIC):
+    """
+    Meet de duur van een blok code.
+
+    Gebruik: `with metrics.timed("display_robot"): ...`
+
+    Args:
+        section (str): Naam van de sectie (label "section")
+        metric (str, optional): Naam van het histogram. Default is SECTION_METRIC.
+
+    Returns:
+        context manager: Een timer, of een lege context als instrumentatie uit staat
+    """
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(metric, (("section", section),))
+
+
+def count(name, amount=1, **labels):
+    """
+    Verhoogt een teller, en de gelijknamige teller van de sessie als die er is.
+
+    Args:
+        name (str): Naam van de metric
+        amount (int, optional): Ophoging. Default is 1.
+        **labels: Labels van de reeks
+    """
+    if not METRICS_ENABLED or not amount:
+        return
+    _registry.inc(name, amount, tuple(sorted(labels.items())))
+
+    session_counts = _session_counts()
+    if session_counts is not None:
+        session_counts[name] = session_counts.get(name, 0) + amount
+
+
+def _session_counts():
+    """Geeft de tellers van de huidige Streamlit sessie, of None buiten een sessie."""
+    try:
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        if get_script_run_ctx() is None:
+            return None
+        if METRICS_SESSION_KEY not in st.session_state:
+            st.session_state[METRICS_SESSION_KEY] = {}
+            _registry.inc(SESSIONS_METRIC)
+        return st.session_state[METRICS_SESSION_KEY]
+    except Exception:
+        return None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serveert /metrics in het Prometheus tekstformaat."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = _registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Geen log regel per scrape
+        pass
+
+
+def start_exporter(host=METRICS_HOST, port=METRICS_PORT):
+    """
+    Start één keer per proces het HTTP endpoint in een achtergrondthread.
+
+    Doet niets als instrumentatie uit staat of de export naar een bestand gaat.
+    Lukt het starten niet, dan wordt dat één keer gelogd en niet opnieuw geprobeerd.
+
+    Args:
+        host (str, optional): Adres om op te luisteren. Default uit constants.py.
+        port (int, optional): Poort. Default uit constants.py.
+
+    Returns:
+        bool: True als het endpoint draait
+    """
+    global _exporter_started, _exporter_failed
+    if not METRICS_ENABLED or METRICS_EXPORT != "http":
+        return False
+
+    with _exporter_lock:
+        if _exporter_started or _exporter_failed:
+            return _exporter_started
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            # Poort bezet, bijv. door een tweede Streamlit proces
+            logger.warning("Metrics endpoint niet gestart op %s:%s: %s", host, port, e)
+            _exporter_failed = True
+            return False
+        thread = threading.Thread(target=server.serve_forever, name="stan-metrics", daemon=True)
+        thread.start()
+        _exporter_started = True
+        return True
+
+
+def write_metrics_file(path=METRICS_FILE, force=False):
+    """
+    Schrijft de metrics naar een bestand, hooguit eens per METRICS_FILE_INTERVAL.
+
+    Het bestand wordt atomair vervangen, zodat een collector nooit een half
+    geschreven bestand leest. Een fout bij het schrijven (bijv. een map zonder
+    schrijfrechten) wordt gelogd in plaats van doorgegeven: de metrics mogen de
+    pagina niet breken. Alleen de eerste fout van een reeks wordt gelogd.
+
+    Args:
+        path (str, optional): Doelbestand. Default uit constants.py.
+        force (bool, optional): Schrijf ook als het interval nog niet verstreken is
+
+    Returns:
+        bool: True als het bestand is geschreven
+    """
+    global _last_file_write, _file_write_failed
+    if not METRICS_ENABLED or (METRICS_EXPORT != "file" and not force):
+        return False
+
+    now = time.monotonic()
+    with _exporter_lock:
+        if not force and now - _last_file_write < METRICS_FILE_INTERVAL:
+            return False
+        _last_file_write = now
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(_registry.render())
+        os.replace(temporary_path, path)
+    except OSError as e:
+        if not _file_write_failed:
+            logger.warning("Metrics bestand %s niet geschreven: %s", path, e)
+            _file_write_failed = True
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        return False
+    _file_write_failed = False
+    return True
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    print("Metrics Test\n")
+    registry = MetricsRegistry()
+    for duration in (0.0004, 0.003, 0.02, 0.3):
+        registry.observe(SECTION_METRIC, duration, (("section", "display_robot"),))
+    registry.inc(CLICKS_METRIC, 3)
+    registry.inc(RERUNS_METRIC, 2, (("scope", "app"),))
+    print(registry.render())
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        with timed("noop"):
+            pass
+    elapsed = (time.perf_counter() - start) * 1e9 / 100000
+    print(f"Kosten van timed() (instrumentatie {'aan' if enabled() else 'uit'}): {elapsed:.0f} ns per blok")
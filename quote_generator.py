@@ -2,95 +2,109 @@
 Quote Generator Module voor Stan de GitHub Agent.
 
 Deze module is verantwoordelijk voor het genereren en beheren van grappige uitspraken
-die worden weergegeven wanneer de gebruiker op de robot klikt.
+die worden weergegeven wanneer de gebruiker op de robot klikt. De uitspraken zelf
+komen uit de catalogus van quote_store.py.
+
+Deze module is pure logica en importeert Streamlit niet; de koppeling met de
+sessie-state staat in quote_session.py.
 """
 
-import random
-import streamlit as st
-from constants import QUOTES
+from constants import QUOTE_SELECTION_MODE
+from quote_sampler import QuoteSampler, session_rng
+from quote_store import get_quote_store
+from quote_selection import get_selection_engine
+
+
+# Generator en sampler voor aanroepen buiten een Streamlit sessie (geseed uit
+# RANDOM_SEED, zoals een sessie met id "default")
+_default_rng = session_rng("default")
+_default_sampler = QuoteSampler(QUOTE_SELECTION_MODE, rng=_default_rng)
 
 
-def get_next_quote(current_index=None):
+def get_next_quote(current_index=None, sampler=None):
     """
     Haalt de volgende willekeurige uitspraak op uit de lijst met uitspraken.
     
     Zorgt ervoor dat dezelfde uitspraak niet direct wordt herhaald door de huidige
-    index uit te sluiten van de willekeurige selectie.
+    index uit te sluiten van de willekeurige selectie. De selectie is O(1) en
+    bouwt geen lijst met kandidaten op.
     
     Args:
         current_index (int, optional): De index van de huidige uitspraak.
             Indien None, wordt er geen index uitgesloten.
+        sampler (QuoteSampler, optional): De sampler die de index kiest.
+            Indien None, wordt de procesbrede sampler gebruikt.
             
     Returns:
         tuple: (str, int) Een tuple met de volgende uitspraak en de nieuwe index.
     """
+    store = get_quote_store()
+    
     # Aantal beschikbare uitspraken
-    num_quotes = len(QUOTES)
+    num_quotes = len(store)
     
     # Als er maar 1 uitspraak is, of helemaal geen uitspraken
     if num_quotes <= 1:
-        return QUOTES[0] if num_quotes == 1 else "Geen uitspraken beschikbaar", 0
-    
-    # Genereer een lijst met alle mogelijke indices, behalve de huidige
-    possible_indices = list(range(num_quotes))
-    if current_index is not None and 0 <= current_index < num_quotes:
-        possible_indices.remove(current_index)
+        return store[0] if num_quotes == 1 else "Geen uitspraken beschikbaar", 0
     
-    # Kies een willekeurige index uit de mogelijke indices
-    new_index = random.choice(possible_indices)
+    # Kies een willekeurige index, exclusief de huidige
+    new_index = (sampler or _default_sampler).next_index(num_quotes, current_index)
     
     # Return de uitspraak en de nieuwe index
-    return QUOTES[new_index], new_index
+    return store[new_index], new_index
 
 
-def get_random_quote():
+def get_random_quote(rng=None):
     """
     Haalt een volledig willekeurige uitspraak op uit de lijst met uitspraken.
     
     Deze functie houdt geen rekening met eerder gekozen uitspraken en kan dezelfde
     uitspraak meerdere keren achter elkaar kiezen.
     
+    Args:
+        rng (random.Random, optional): Bron van willekeur.
+            Indien None, wordt de procesbrede generator gebruikt.
+    
     Returns:
         str: Een willekeurige uitspraak.
     """
-    num_quotes = len(QUOTES)
+    store = get_quote_store()
+    num_quotes = len(store)
     if num_quotes == 0:
         return "Geen uitspraken beschikbaar"
     
-    random_index = random.randint(0, num_quotes - 1)
-    return QUOTES[random_index]
+    random_index = (rng or _default_rng).randrange(num_quotes)
+    return store[random_index]
 
 
-def initialize_session_state():
+def get_next_filtered_quote(current_index=None, tags=None, language=None, query=None, rng=None):
     """
-    Initialiseert de Streamlit sessie-state voor het bijhouden van de huidige quote index.
+    Haalt een gewogen en/of gefilterde uitspraak op via de alias-tabellen.
     
-    Deze functie moet worden aangeroepen aan het begin van de Streamlit app.
-    """
-    if 'quote_index' not in st.session_state:
-        st.session_state.quote_index = None
-
-
-def get_next_quote_with_state():
-    """
-    Haalt de volgende uitspraak op en update de sessie-state.
-    
-    Deze functie is specifiek voor gebruik in een Streamlit-applicatie en maakt gebruik
-    van Streamlit's sessie-state mechanisme om de huidige index bij te houden.
+    De uitspraak wordt gekozen naar het "weight" veld van de catalogus en
+    beperkt tot de gevraagde tags en taal, en eventueel tot de resultaten van
+    een zoekopdracht. De huidige uitspraak wordt niet direct herhaald.
     
+    Args:
+        current_index (int, optional): De index van de huidige uitspraak.
+        tags (iterable, optional): Alleen uitspraken met minstens één van deze tags.
+        language (str, optional): Alleen uitspraken in deze taal.
+        query (str, optional): Alleen uitspraken die deze zoekopdracht vindt
+            (prefix en typefouten toegestaan, zie quote_search.py).
+        rng (random.Random, optional): Bron van willekeur.
+            Indien None, wordt de procesbrede generator gebruikt.
+        
     Returns:
-        str: De volgende uitspraak.
+        tuple: (str, int) De uitspraak en de nieuwe index. Als er geen uitspraak
+            aan het filter voldoet, blijft de index ongewijzigd.
     """
-    # Initialiseer sessie-state indien nodig
-    initialize_session_state()
-    
-    # Haal de volgende uitspraak op
-    quote, new_index = get_next_quote(st.session_state.quote_index)
-    
-    # Update de sessie-state
-    st.session_state.quote_index = new_index
-    
-    return quote
+    store = get_quote_store()
+    new_index = get_selection_engine().draw(
+        store, current_index, tags, language, rng=rng or _default_rng, query=query
+    )
+    if new_index is None:
+        return "Geen uitspraken beschikbaar", current_index
+    return store[new_index], new_index
 
 
 # Voor standalone tests
@@ -108,11 +122,12 @@ if __name__ == "__main__":
         history.append(current)
     
     print("\nTest 2: Controleren of alle uitspraken worden gebruikt")
-    all_indices = set(range(len(QUOTES)))
+    num_quotes = len(get_quote_store())
+    all_indices = set(range(num_quotes))
     used_indices = set(history)
     missing_indices = all_indices - used_indices
     
-    if missing_indices and len(history) >= len(QUOTES):
+    if missing_indices and len(history) >= num_quotes:
         print(f"Waarschuwing: Niet alle uitspraken werden gebruikt. Ontbrekende indices: {missing_indices}")
     else:
         print("Alle uitspraken werden gebruikt of er waren niet genoeg iteraties om alle uitspraken te gebruiken.")
@@ -121,3 +136,18 @@ if __name__ == "__main__":
     for i in range(5):
         quote = get_random_quote()
         print(f"Random quote {i+1}: {quote}")
+    
+    print("\nTest 4: Shuffle-bag, alle uitspraken komen aan de beurt voor een herhaling")
+    bag_sampler = QuoteSampler("bag")
+    current = None
+    seen = set()
+    for i in range(num_quotes):
+        quote, current = get_next_quote(current, sampler=bag_sampler)
+        seen.add(current)
+    print(f"{len(seen)} van de {num_quotes} uitspraken getoond")
+    
+    print("\nTest 5: Alleen uitspraken over 'merge'")
+    current = None
+    for i in range(3):
+        quote, current = get_next_filtered_quote(current, query="merge")
+        print(f"Zoekresultaat {i+1}: {quote}")
@@ -0,0 +1,281 @@
+"""
+Quote Sampler Module voor Stan de GitHub Agent.
+
+Deze module bevat de selectie-algoritmen achter quote_generator.py. Beide
+modi kiezen een nieuwe index in constante tijd, zonder per aanroep een lijst
+met kandidaten op te bouwen:
+
+- "random": uniform willekeurig, maar nooit direct dezelfde index als de vorige
+- "bag": shuffle-bag, elke uitspraak komt één keer aan de beurt voordat er
+  herhalingen volgen (en ook op de grens van twee rondes geen directe herhaling)
+
+De willekeur komt per sessie uit een eigen random.Random (session_rng), zodat
+sessies geen gedeelde toestand van de random module gebruiken en een
+klikreeks met dezelfde root seed en hetzelfde sessie-id reproduceerbaar is.
+"""
+
+import random
+import hashlib
+from array import array
+from constants import RANDOM_SEED
+
+
+# Beschikbare selectiemodi
+SAMPLER_MODES = ("random", "bag")
+
+
+def session_rng(session_id, root_seed=RANDOM_SEED):
+    """
+    Maakt de bron van willekeur voor één sessie.
+
+    De seed is een hash van de root seed en het sessie-id: dezelfde combinatie
+    geeft altijd dezelfde reeks, verschillende sessies onafhankelijke reeksen.
+
+    Args:
+        session_id (str): Id van de sessie
+        root_seed (str, optional): Root seed; indien None een onvoorspelbare seed
+
+    Returns:
+        random.Random: Een eigen generator voor de sessie
+    """
+    if root_seed is None:
+        return random.Random()
+    digest = hashlib.sha256(f"{root_seed}:{session_id}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def sample_excluding(size, exclude=None, rng=random):
+    """
+    Kiest een uniform willekeurige index uit range(size), exclusief `exclude`.
+
+    Er wordt getrokken uit size - 1 waarden en de uitgesloten index wordt
+    overgeslagen, zodat dit O(1) is en geen geheugen alloceert.
+
+    Args:
+        size (int): Aantal beschikbare indices (minimaal 1)
+        exclude (int, optional): Index die niet gekozen mag worden.
+            Indien None of buiten bereik, wordt er geen index uitgesloten.
+        rng (random.Random, optional): Bron van willekeur. Default is de random module.
+
+    Returns:
+        int: De gekozen index
+    """
+    if exclude is None or not 0 <= exclude < size or size == 1:
+        return rng.randrange(size)
+
+    index = rng.randrange(size - 1)
+    return index + 1 if index >= exclude else index
+
+
+class ShuffleBag:
+    """
+    Shuffle-bag op basis van een incrementele Fisher-Yates shuffle.
+
+    De volgorde en de positie van elke index worden bijgehouden in twee
+    compacte arrays die één keer worden gealloceerd. Elke trekking is één
+    swap, dus O(1); een nieuwe ronde begint zonder opnieuw te schudden.
+    """
+
+    def __init__(self, size, rng=random):
+        self.size = size
+        self.rng = rng
+        self._order = array("I", range(size))
+        self._position = array("I", range(size))
+        self._remaining = 0
+
+    def _swap(self, i, j):
+        """Verwisselt de elementen op posities i en j en werkt de posities bij."""
+        order = self._order
+        order[i], order[j] = order[j], order[i]
+        self._position[order[i]] = i
+        self._position[order[j]] = j
+
+    def draw(self, exclude=None):
+        """
+        Trekt de volgende index uit de zak.
+
+        Args:
+            exclude (int, optional): Index die niet direct gekozen mag worden,
+                normaal gesproken de vorige uitspraak.
+
+        Returns:
+            int: De gekozen index
+        """
+        if self._remaining == 0:
+            self._remaining = self.size
+
+        excluded_position = None
+        if exclude is not None and 0 <= exclude < self.size and self.size > 1:
+            excluded_position = self._position[exclude]
+            if excluded_position >= self._remaining:
+                excluded_position = None
+            elif self._remaining == 1:
+                # Alleen de uitgesloten index is nog over: begin een nieuwe ronde
+                self._remaining = self.size
+
+        position = sample_excluding(self._remaining, excluded_position, self.rng)
+        last = self._remaining - 1
+        self._swap(position, last)
+        self._remaining = last
+        return self._order[last]
+
+    def undraw(self, index):
+        """
+        Legt een in deze ronde getrokken index terug in de zak.
+
+        Args:
+            index (int): De getrokken index; een index die nog in de zak zit
+                wordt genegeerd
+        """
+        if not 0 <= index < self.size:
+            return
+        position = self._position[index]
+        if position < self._remaining:
+            return
+        self._swap(position, self._remaining)
+        self._remaining += 1
+
+    def remap(self, mapping, size):
+        """
+        Zet de zak om naar een nieuwe catalogus, met behoud van de ronde.
+
+        Uitspraken die deze ronde al getoond zijn blijven getoond; nieuwe
+        uitspraken komen nog aan de beurt en verwijderde vallen weg.
+
+        Args:
+            mapping (array): Per oude index de nieuwe index, of -1 (zie quote_store.build_remap)
+            size (int): Aantal uitspraken in de nieuwe catalogus
+        """
+        remaining = {}
+        seen = set()
+        for position in range(self.size):
+            new_index = mapping[self._order[position]]
+            if new_index < 0:
+                continue
+            if position < self._remaining:
+                remaining[new_index] = None
+            else:
+                seen.add(new_index)
+        seen.difference_update(remaining)
+        for index in range(size):
+            if index not in remaining and index not in seen:
+                remaining[index] = None
+
+        order = list(remaining) + list(seen)
+        self.size = size
+        self._order = array("I", order)
+        self._position = array("I", [0]) * size
+        for position, index in enumerate(order):
+            self._position[index] = position
+        self._remaining = len(remaining)
+
+
+class QuoteSampler:
+    """
+    Kiest de volgende index volgens de ingestelde modus.
+
+    Een sampler in "bag" modus houdt zijn eigen ronde bij en hoort dus per
+    sessie te worden bewaard; in "random" modus is hij stateless.
+    """
+
+    def __init__(self, mode="random", rng=None):
+        if mode not in SAMPLER_MODES:
+            raise ValueError(f"Onbekende selectiemodus: {mode}")
+        self.mode = mode
+        self.rng = rng or random
+        self._bag = None
+
+    def next_index(self, size, current_index=None):
+        """
+        Kiest de volgende index die niet gelijk is aan de huidige.
+
+        Args:
+            size (int): Aantal beschikbare uitspraken (minimaal 1)
+            current_index (int, optional): De index van de huidige uitspraak
+
+        Returns:
+            int: De nieuwe index
+        """
+        if self.mode == "random":
+            return sample_excluding(size, current_index, self.rng)
+
+        # De catalogus is van grootte veranderd: begin een nieuwe zak
+        if self._bag is None or self._bag.size != size:
+            self._bag = ShuffleBag(size, self.rng)
+        return self._bag.draw(current_index)
+
+    def undraw(self, indices):
+        """
+        Legt vooraf getrokken maar niet getoonde indices terug (zie ShuffleBag.undraw).
+
+        Args:
+            indices (iterable): De terug te leggen indices
+        """
+        if self._bag is not None:
+            for index in indices:
+                self._bag.undraw(index)
+
+    def remap(self, mapping, size):
+        """
+        Zet de selectiestaat om naar een nieuwe catalogus (zie ShuffleBag.remap).
+
+        Args:
+            mapping (array): Per oude index de nieuwe index, of -1
+            size (int): Aantal uitspraken in de nieuwe catalogus
+        """
+        if self._bag is not None:
+            self._bag.remap(mapping, size)
+
+
+# Voor standalone tests
+if __name__ == "__main__":
+    print("Quote Sampler Test\n")
+
+    print("Test 1: random modus, geen directe herhalingen")
+    sampler = QuoteSampler("random")
+    current = None
+    for _ in range(10000):
+        new = sampler.next_index(15, current)
+        assert new != current
+        current = new
+    print("OK")
+
+    print("\nTest 2: bag modus, elke ronde bevat alle indices precies één keer")
+    sampler = QuoteSampler("bag")
+    current = None
+    for round_number in range(100):
+        seen = []
+        for _ in range(15):
+            new = sampler.next_index(15, current)
+            assert new != current
+            seen.append(new)
+            current = new
+        assert sorted(seen) == list(range(15)), seen
+    print("OK")
+
+    print("\nTest 3: bag modus, omzetten naar een catalogus met een verwijderde en een nieuwe uitspraak")
+    sampler = QuoteSampler("bag")
+    shown = [sampler.next_index(10) for _ in range(4)]
+    # Oude index 0 is verwijderd, de rest schuift één op en index 9 is nieuw
+    mapping = array("l", [-1] + list(range(9)))
+    sampler.remap(mapping, 10)
+    rest = [sampler.next_index(10) for _ in range(10 - len([i for i in shown if i != 0]))]
+    assert sorted(rest + [i - 1 for i in shown if i != 0]) == list(range(10)), rest
+    print("OK")
+
+    print("\nTest 4: zelfde root seed en sessie-id geven dezelfde reeks")
+    first = QuoteSampler("bag", rng=session_rng("sessie", root_seed="42"))
+    second = QuoteSampler("bag", rng=session_rng("sessie", root_seed="42"))
+    other = QuoteSampler("bag", rng=session_rng("andere sessie", root_seed="42"))
+    sequences = [[sampler.next_index(15) for _ in range(30)] for sampler in (first, second, other)]
+    assert sequences[0] == sequences[1] != sequences[2]
+    print("OK")
+
+    print("\nTest 5: teruggelegde indices komen deze ronde nog aan de beurt")
+    sampler = QuoteSampler("bag")
+    shown = [sampler.next_index(10) for _ in range(4)]
+    ahead = [sampler.next_index(10, shown[-1]) for _ in range(3)]
+    sampler.undraw(ahead)
+    rest = [sampler.next_index(10) for _ in range(6)]
+    assert sorted(shown + rest) == list(range(10)), (shown, rest)
+    print("OK")
@@ -0,0 +1,364 @@
+"""
+Quote Search Module voor Stan de GitHub Agent.
+
+Deze module bevat een inverted index over de tekst van de catalogus, zodat
+uitspraken op trefwoord te vinden zijn in plaats van alleen op positie.
+
+- Tokens worden genormaliseerd: kleine letters (casefold) en zonder accenten,
+  zodat "ë" en "é" in de Nederlandse uitspraken ook met "e" gevonden worden.
+- Per token staat een gesorteerde array('I') met catalogus-indices.
+- Prefix lookup gebruikt een gesorteerde woordenlijst (bisect).
+- Fuzzy lookup gebruikt een deletion-neighbourhood: voor elk token staan de
+  varianten met tot SEARCH_FUZZY_DISTANCE weggelaten tekens in een dict, zodat
+  een zoekterm met een typefout in een handvol dict lookups zijn kandidaten
+  vindt (Damerau-Levenshtein, een verwisseling telt als één fout).
+
+De index wordt één keer per catalogus opgebouwd. Groeit de catalogus alleen
+(InMemoryQuoteStore.add), dan wordt de index incrementeel bijgewerkt; bij een
+andere of herladen catalogus of een gewijzigd bestand wordt hij opnieuw
+opgebouwd.
+"""
+
+import re
+import bisect
+import weakref
+import threading
+import unicodedata
+from array import array
+from constants import SEARCH_FUZZY_DISTANCE, SEARCH_FUZZY_MIN_LENGTH
+from quote_store import get_quote_store
+
+
+# Tokens: reeksen letters en cijfers (geen underscore)
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """
+    Zet tekst om naar kleine letters zonder accenten.
+
+    Args:
+        text (str): De tekst
+
+    Returns:
+        str: Genormaliseerde tekst, bijv. "Ideeën" -> "ideeen"
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """
+    Splitst tekst in genormaliseerde tokens.
+
+    Args:
+        text (str): De tekst
+
+    Returns:
+        list: De tokens in volgorde van voorkomen
+    """
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def _deletes(token, max_distance):
+    """Geeft alle varianten van een token met tot max_distance weggelaten tekens."""
+    variants = {token}
+    frontier = {token}
+    for _ in range(max_distance):
+        frontier = {
+            variant[:position] + variant[position + 1:]
+            for variant in frontier if len(variant) > 1
+            for position in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+def edit_distance(first, second, max_distance):
+    """
+    Berekent de Damerau-Levenshtein afstand (optimal string alignment), begrensd.
+
+    Args:
+        first (str): Eerste woord
+        second (str): Tweede woord
+        max_distance (int): Grens; daarboven stopt de berekening
+
+    Returns:
+        int: De afstand, of max_distance + 1 als die groter is dan de grens
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before_previous, previous_row = previous_row, row
+        row = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2]
+                    and first[i - 2] == second[j - 1]):
+                row[j] = min(row[j], before_previous[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return row[-1]
+
+
+class SearchIndex:
+    """
+    Inverted index met prefix en fuzzy lookup over de tekst van een catalogus.
+
+    Args:
+        fuzzy_distance (int, optional): Maximaal aantal typefouten bij fuzzy lookup
+        fuzzy_min_length (int, optional): Kortere zoektermen worden niet fuzzy gezocht
+    """
+
+    def __init__(self, fuzzy_distance=SEARCH_FUZZY_DISTANCE, fuzzy_min_length=SEARCH_FUZZY_MIN_LENGTH):
+        self.fuzzy_distance = fuzzy_distance
+        self.fuzzy_min_length = fuzzy_min_length
+        self.size = 0
+        self._postings = {}
+        self._vocabulary = []
+        self._deletes = {}
+        self._store_id = None
+        self._store_version = None
+        self._lock = threading.RLock()
+
+    def _add_token(self, token):
+        """Neemt een nieuw token op in de woordenlijst en de deletion-neighbourhood."""
+        bisect.insort(self._vocabulary, token)
+        if len(token) >= self.fuzzy_min_length - self.fuzzy_distance:
+            for variant in _deletes(token, self.fuzzy_distance):
+                self._deletes.setdefault(variant, []).append(token)
+
+    def add(self, index, text):
+        """
+        Voegt een uitspraak toe aan de index.
+
+        Args:
+            index (int): Catalogus-index van de uitspraak
+            text (str): De tekst van de uitspraak
+        """
+        with self._lock:
+            for token in set(tokenize(text)):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = array("I")
+                    self._add_token(token)
+                if postings and postings[-1] > index:
+                    postings.insert(bisect.bisect_left(postings, index), index)
+                else:
+                    postings.append(index)
+            self.size = max(self.size, index + 1)
+
+    def build(self, store):
+        """
+        Bouwt de index opnieuw op voor een hele catalogus.
+
+        Args:
+            store (QuoteStore): De catalogus
+        """
+        with self._lock:
+            self.size = 0
+            self._postings = {}
+            self._vocabulary = []
+            self._deletes = {}
+            for index, record in store.iter_records():
+                self.add(index, record.get("text", ""))
+            self._store_id = id(store)
+            self._store_version = store.version
+
+    def sync(self, store):
+        """
+        Brengt de index in lijn met de catalogus.
+
+        Nieuwe uitspraken in een catalogus die alleen groeit worden
+        incrementeel toegevoegd; in alle andere gevallen wordt de index opnieuw
+        opgebouwd als de catalogus of zijn versie veranderd is.
+
+        Args:
+            store (QuoteStore): De catalogus
+        """
+        with self._lock:
+            same_store = self._store_id == id(store)
+            if same_store and store.version == self._store_version and len(store) == self.size:
+                return
+            if same_store and store.append_only and len(store) >= self.size:
+                for index in range(self.size, len(store)):
+                    self.add(index, store[index])
+                self._store_version = store.version
+                self.size = len(store)
+                return
+            self.build(store)
+
+    def prefix_tokens(self, prefix):
+        """
+        Geeft de tokens die met een (genormaliseerde) prefix beginnen.
+
+        Args:
+            prefix (str): De prefix
+
+        Returns:
+            list: De gevonden tokens, alfabetisch
+        """
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        return self._vocabulary[start:end]
+
+    def fuzzy_tokens(self, term, max_distance=None):
+        """
+        Geeft de tokens binnen een aantal typefouten van een (genormaliseerde) term.
+
+        Args:
+            term (str): De zoekterm
+            max_distance (int, optional): Maximaal aantal fouten; default de instelling van de index
+
+        Returns:
+            set: De gevonden tokens (inclusief de term zelf als die bestaat)
+        """
+        max_distance = self.fuzzy_distance if max_distance is None else min(max_distance, self.fuzzy_distance)
+        if len(term) < self.fuzzy_min_length:
+            return {term} if term in self._postings else set()
+
+        candidates = set()
+        for variant in _deletes(term, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+        return {
+            token for token in candidates
+            if edit_distance(term, token, max_distance) <= max_distance
+        }
+
+    def search(self, query, prefix=True, fuzzy=False, limit=None):
+        """
+        Zoekt uitspraken die alle woorden uit de zoekopdracht bevatten.
+
+        Args:
+            query (str): De zoekopdracht
+            prefix (bool, optional): Een woord mag ook het begin van een token zijn
+            fuzzy (bool, optional): Een woord mag ook met een typefout voorkomen
+            limit (int, optional): Maximaal aantal resultaten
+
+        Returns:
+            list: Gesorteerde catalogus-indices van de gevonden uitspraken
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            matches = []
+            for term in set(terms):
+                tokens = {term} if term in self._postings else set()
+                if prefix:
+                    tokens.update(self.prefix_tokens(term))
+                if fuzzy:
+                    tokens.update(self.fuzzy_tokens(term))
+                if not tokens:
+                    return []
+                if len(tokens) == 1:
+                    matches.append(self._postings[tokens.pop()])
+                else:
+                    matches.append(set().union(*(self._postings[token] for token in tokens)))
+
+        # Doorsnede, te beginnen bij de kleinste verzameling
+        matches.sort(key=len)
+        result = set(matches[0])
+        for match in matches[1:]:
+            result.intersection_update(match)
+            if not result:
+                return []
+        result = sorted(result)
+        return result[:limit] if limit else result
+
+    def stats(self):
+        """
+        Geeft statistieken van de index.
+
+        Returns:
+            dict: Aantal uitspraken, tokens en fuzzy varianten
+        """
+        with self._lock:
+            return {
+                "quotes": self.size,
+                "tokens": len(self._vocabulary),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+                "fuzzy_variants": len(self._deletes),
+            }
+
+
+# Eén index per catalogus, gedeeld door alle sessies. Een herladen catalogus
+# (catalog_reload.py) krijgt zijn eigen index, die al vóór het omwisselen wordt
+# opgebouwd; de index van de oude catalogus verdwijnt met die catalogus.
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(store=None):
+    """
+    Geeft de zoekindex van een catalogus, in lijn met die catalogus.
+
+    Args:
+        store (QuoteStore, optional): De catalogus; default die van het proces
+
+    Returns:
+        SearchIndex: De gedeelde index van de catalogus
+    """
+    store = store if store is not None else get_quote_store()
+    with _indexes_lock:
+        index = _indexes.get(store)
+        if index is None:
+            index = _indexes[store] = SearchIndex()
+    index.sync(store)
+    return index
+
+
+def search_quotes(query, prefix=True, fuzzy=True, limit=None):
+    """
+    Zoekt uitspraken in de catalogus van het proces.
+
+    Args:
+        query (str): De zoekopdracht
+        prefix (bool, optional): Woorden mogen ook het begin van een token zijn
+        fuzzy (bool, optional): Woorden mogen ook met een typefout voorkomen
+        limit (int, optional): Maximaal aantal resultaten
+
+    Returns:
+        list: Tuples (int, str) met de index en de tekst van de gevonden uitspraken
+    """
+    store = get_quote_store()
+    return [
+        (index, store[index])
+        for index in get_search_index(store).search(query, prefix, fuzzy, limit)
+    ]
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    import time
+    import random
+    from quote_store import InMemoryQuoteStore
+
+    print("Quote Search Test\n")
+    for query in ("commit", "efficient", "geindenteerd", "comit", "merg", "pull request"):
+        results = search_quotes(query, limit=3)
+        print(f"{query!r}: {len(results)} resultaten {[text[:50] for _, text in results]}")
+
+    # Grotere synthetische catalogus voor de lookup tijden
+    words = ["".join(random.choices("abcdefghijklmnopqrstuvwxyzëé", k=random.randint(3, 10)))
+             for _ in range(20000)]
+    store = InMemoryQuoteStore([" ".join(random.choices(words, k=12)) for _ in range(100000)])
+    start = time.perf_counter()
+    index = get_search_index(store)
+    print(f"\nIndex van {len(store)} uitspraken in {time.perf_counter() - start:.2f} s: {index.stats()}")
+
+    sample = random.sample(words, 200)
+    for label, options in (("exact", {"prefix": False}), ("prefix", {"prefix": True}),
+                           ("fuzzy", {"prefix": False, "fuzzy": True})):
+        start = time.perf_counter()
+        for word in sample:
+            index.search(word[:4] if label == "prefix" else word, **options)
+        print(f"{label}: {(time.perf_counter() - start) / len(sample) * 1000:.3f} ms per lookup")
+
+    store.add("Een nieuwe uitspraak over zoekindexen")
+    print(f"\nNa toevoegen: {get_search_index(store).search('zoekindex')} (incrementeel)")
@@ -0,0 +1,285 @@
+"""
+Quote Selection Module voor Stan de GitHub Agent.
+
+Deze module maakt gewogen en gefilterde selectie van uitspraken mogelijk.
+Per combinatie van tags en taal wordt één keer een alias-tabel (methode van
+Vose) opgebouwd en gecachet; daarmee is elke trekking O(1), ongeacht de grootte
+van de catalogus. Een tabel wordt pas opnieuw opgebouwd als de catalogus
+verandert.
+
+Records in de catalogus mogen de volgende optionele velden bevatten:
+- "weight": relatief gewicht (standaard 1.0), bijv. hoger voor nieuwe uitspraken
+- "tags": lijst met tags, of een komma-gescheiden string (CSV)
+- "lang": taalcode (standaard DEFAULT_QUOTE_LANGUAGE)
+
+Met een zoekopdracht (`query`) wordt alleen getrokken uit de uitspraken die de
+zoekindex (quote_search.py) vindt; ook die tabellen worden gecachet.
+"""
+
+import math
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from constants import DEFAULT_QUOTE_LANGUAGE
+from quote_search import get_search_index, tokenize
+
+
+# Maximaal aantal gecachte selectietabellen (combinaties van tags en taal)
+MAX_CACHED_TABLES = 32
+
+# Aantal pogingen om de uitgesloten index te vermijden voordat er lineair
+# wordt gezocht; alleen relevant als één uitspraak bijna al het gewicht heeft
+MAX_REJECTIONS = 32
+
+
+def record_weight(record):
+    """
+    Geeft het gewicht van een record, met 1.0 als standaard.
+
+    Een ontbrekend, leeg of onbruikbaar gewicht (geen veld, JSON null, een
+    lege CSV cel, geen getal, "inf" of "nan") telt als 1.0; alleen een
+    expliciete 0 (of negatief getal) haalt een uitspraak uit de selectie.
+    """
+    weight = record.get("weight")
+    if weight is None or (isinstance(weight, str) and not weight.strip()):
+        return 1.0
+    try:
+        weight = float(weight)
+    except (TypeError, ValueError):
+        return 1.0
+    # Een oneindig gewicht of NaN maakt de kansen in de AliasTable NaN
+    if not math.isfinite(weight):
+        return 1.0
+    return weight if weight > 0 else 0.0
+
+
+def record_tags(record):
+    """Geeft de tags van een record als frozenset."""
+    tags = record.get("tags") or ()
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return frozenset(tag.strip().lower() for tag in tags if tag and tag.strip())
+
+
+def record_language(record):
+    """Geeft de taalcode van een record."""
+    return (record.get("lang") or DEFAULT_QUOTE_LANGUAGE).lower()
+
+
+class AliasTable:
+    """
+    Alias-tabel volgens de methode van Vose voor O(1) gewogen trekkingen.
+
+    De tabel verwijst naar een deelverzameling van de catalogus via `indices`;
+    `draw` geeft direct de catalogus-index terug.
+    """
+
+    def __init__(self, indices, weights):
+        self.indices = array("I", indices)
+        count = len(weights)
+        total = float(sum(weights))
+        self._probability = array("d", [0.0]) * count
+        self._alias = array("I", [0]) * count
+
+        if count == 0 or total <= 0:
+            return
+
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Restanten zijn door afrondingsfouten (op) 1.0 uitgekomen
+        for remaining in large + small:
+            self._probability[remaining] = 1.0
+
+    def __len__(self):
+        return len(self.indices)
+
+    def draw(self, rng=random):
+        """
+        Trekt een catalogus-index volgens de gewichten.
+
+        Args:
+            rng (random.Random, optional): Bron van willekeur. Default is de random module.
+
+        Returns:
+            int: De gekozen catalogus-index
+        """
+        column = rng.randrange(len(self.indices))
+        if rng.random() >= self._probability[column]:
+            column = self._alias[column]
+        return self.indices[column]
+
+
+def build_alias_table(store, tags=None, language=None, candidates=None):
+    """
+    Bouwt een alias-tabel voor de uitspraken die aan het filter voldoen.
+
+    Een uitspraak voldoet als hij minstens één van de gevraagde tags heeft
+    (of er geen tags gevraagd zijn) en in de gevraagde taal is.
+
+    Args:
+        store (QuoteStore): De catalogus
+        tags (frozenset, optional): Gevraagde tags (kleine letters)
+        language (str, optional): Gevraagde taalcode
+        candidates (iterable, optional): Alleen deze catalogus-indices (bijv.
+            zoekresultaten); default de hele catalogus
+
+    Returns:
+        AliasTable: De tabel, eventueel leeg
+    """
+    if candidates is None:
+        records = store.iter_records()
+    else:
+        records = ((index, store.get_record(index)) for index in candidates)
+
+    indices = []
+    weights = []
+    for index, record in records:
+        if tags and not tags & record_tags(record):
+            continue
+        if language and record_language(record) != language:
+            continue
+        weight = record_weight(record)
+        if weight > 0:
+            indices.append(index)
+            weights.append(weight)
+    return AliasTable(indices, weights)
+
+
+class SelectionEngine:
+    """
+    Cache van alias-tabellen per (catalogus, versie, tags, taal).
+
+    De sleutel bevat de generation en versie van de catalogus, zodat een
+    gewijzigde of herladen catalogus automatisch tot nieuwe tabellen leidt.
+    """
+
+    def __init__(self, max_tables=MAX_CACHED_TABLES):
+        self.max_tables = max_tables
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_table(self, store, tags=None, language=None, query=None):
+        """
+        Haalt de alias-tabel voor een filter op en bouwt hem indien nodig.
+
+        Args:
+            store (QuoteStore): De catalogus
+            tags (iterable, optional): Gevraagde tags
+            language (str, optional): Gevraagde taalcode
+            query (str, optional): Alleen uitspraken die deze zoekopdracht vindt
+
+        Returns:
+            AliasTable: De (gecachte) tabel
+        """
+        tag_set = frozenset(tag.lower() for tag in tags) if tags else frozenset()
+        language = language.lower() if language else None
+        terms = tuple(sorted(set(tokenize(query)))) if query else None
+        key = (id(store), store.generation, store.version, len(store), tag_set, language, terms)
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        # Bouw buiten de lock, zodat andere sessies niet hoeven te wachten
+        candidates = None
+        if terms is not None:
+            candidates = get_search_index(store).search(" ".join(terms), prefix=True, fuzzy=True)
+        table = build_alias_table(store, tag_set, language, candidates)
+
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def draw(self, store, current_index=None, tags=None, language=None, rng=random, query=None):
+        """
+        Trekt een gewogen, gefilterde index die niet gelijk is aan de huidige.
+
+        Args:
+            store (QuoteStore): De catalogus
+            current_index (int, optional): De index van de huidige uitspraak
+            tags (iterable, optional): Gevraagde tags
+            language (str, optional): Gevraagde taalcode
+            rng (random.Random, optional): Bron van willekeur
+            query (str, optional): Alleen uitspraken die deze zoekopdracht vindt
+
+        Returns:
+            int: De gekozen catalogus-index, of None als er niets aan het filter voldoet
+        """
+        table = self.get_table(store, tags, language, query)
+        if len(table) == 0:
+            return None
+        if len(table) == 1:
+            return table.indices[0]
+
+        # Afwijzen van de huidige index geeft precies de voorwaardelijke verdeling
+        for _ in range(MAX_REJECTIONS):
+            index = table.draw(rng)
+            if index != current_index:
+                return index
+
+        # Vrijwel al het gewicht ligt op de huidige uitspraak: kies een andere
+        for index in table.indices:
+            if index != current_index:
+                return index
+        return current_index
+
+
+# Eén engine per proces, gedeeld door alle sessies
+_engine = SelectionEngine()
+
+
+def get_selection_engine():
+    """
+    Geeft de procesbrede selectie-engine terug.
+
+    Returns:
+        SelectionEngine: De gedeelde engine
+    """
+    return _engine
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    from quote_store import InMemoryQuoteStore
+
+    print("Quote Selection Test\n")
+    store = InMemoryQuoteStore([
+        {"text": "Vers", "weight": 8, "tags": ["nieuw"]},
+        {"text": "Normaal", "weight": 1},
+        {"text": "Ook normaal", "weight": 1},
+        {"text": "English", "weight": 1, "lang": "en"},
+    ])
+    engine = get_selection_engine()
+
+    counts = {}
+    current = None
+    for _ in range(20000):
+        new = engine.draw(store, current)
+        assert new != current
+        counts[store[new]] = counts.get(store[new], 0) + 1
+        current = new
+    print(f"Gewogen verdeling: {counts}")
+
+    print(f"Filter tag 'nieuw': {store[engine.draw(store, tags=['nieuw'])]}")
+    print(f"Filter taal 'en': {store[engine.draw(store, language='en')]}")
+    print(f"Leeg filter: {engine.draw(store, tags=['bestaat-niet'])}")
+    print(f"Zoekopdracht 'norm': {store[engine.draw(store, query='norm')]}")
@@ -0,0 +1,434 @@
+"""
+Quote Service Module voor Stan de GitHub Agent.
+
+Deze module bevat de procesbrede quote service. De service houdt de catalogus
+één keer vast (via quote_store.py) en bewaart per sessie alleen een compacte
+cursor: de selectiestaat van de sessie (een eigen random.Random en eventueel
+de shuffle-bag) en het tijdstip van de laatste klik. In de sessie-state zelf
+staat alleen nog een integer index; de tekst van de huidige uitspraak wordt bij
+het tonen uit de catalogus opgezocht in plaats van per sessie gekopieerd.
+
+Met dezelfde root seed (RANDOM_SEED) en hetzelfde sessie-id kiest een sessie
+altijd dezelfde reeks uitspraken; replay.py gebruikt dat om een opgenomen
+klikreeks na te spelen.
+
+De gedeelde instantie wordt gemaakt in quote_session.py (st.cache_resource);
+deze module zelf importeert Streamlit niet.
+
+Cursors van inactieve sessies worden verwijderd na SESSION_TTL seconden, en
+nooit meer dan MAX_SESSIONS tegelijk bewaard (LRU). Een sessie waarvan de
+cursor is verwijderd begint gewoon aan een nieuwe ronde, met een opnieuw
+geseede generator; de index in de sessie-state voorkomt nog steeds een directe
+herhaling.
+
+Na het herladen van de catalogus (catalog_reload.py) wordt een cursor bij zijn
+volgende klik omgezet naar de nieuwe catalogus (quote_store.get_remap), zodat
+een lopende ronde doorgaat zonder herhalingen of ongeldige indices.
+
+Met QUOTE_LOOKAHEAD > 0 houdt elke cursor de volgende K indices al klaar. Een
+klik neemt dan alleen de eerste index uit de wachtrij; een thread pool vult de
+wachtrij in batches aan zodra hij half leeg is. De indices worden in dezelfde
+keten getrokken als bij synchrone selectie (elke index sluit de vorige uit), dus
+de regel "geen directe herhaling" en de reproduceerbaarheid met een root seed
+blijven gelden. Is de wachtrij leeg, dan kiest de klik zelf (synchroon). Bij een
+ander filter wordt de wachtrij weggegooid en leggen vooraf getrokken indices
+zich terug in de shuffle-bag.
+"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from quote_sampler import QuoteSampler, session_rng
+from quote_store import get_quote_store, get_remap
+from quote_selection import get_selection_engine
+from constants import (
+    RANDOM_SEED,
+    QUOTE_SELECTION_MODE,
+    QUOTE_SERVICE_MAX_SESSIONS,
+    QUOTE_SERVICE_SESSION_TTL,
+    QUOTE_LOOKAHEAD,
+    QUOTE_LOOKAHEAD_WORKERS
+)
+
+
+# Tekst als er geen enkele uitspraak beschikbaar is
+NO_QUOTES_TEXT = "Geen uitspraken beschikbaar"
+
+
+class SessionCursor:
+    """
+    Compacte selectiestaat van één sessie.
+
+    Elke sessie heeft een eigen sampler met een eigen random.Random (ongeveer
+    2,5 KB), geseed uit de root seed en het sessie-id; in "bag" modus bevat de
+    sampler ook de shuffle-bag. Met lookahead bevat de cursor ook de wachtrij
+    met vooraf gekozen indices, het filter waarvoor ze gekozen zijn en de
+    laatst uitgegeven index.
+
+    Twee locks, altijd in deze volgorde: `draw_lock` voor de sampler (één
+    trekking tegelijk, zodat de trekkingen één keten vormen) en `lock` voor de
+    wachtrij. Een klik die een index uit de wachtrij neemt heeft alleen `lock`
+    nodig en wacht dus niet op een trekking van de thread pool.
+    """
+
+    __slots__ = ("sampler", "last_seen", "generation", "draw_lock", "lock", "lookahead",
+                 "lookahead_key", "last_index", "refilling")
+
+    def __init__(self, sampler=None, generation=0):
+        self.sampler = sampler
+        self.last_seen = time.monotonic()
+        self.generation = generation
+        self.draw_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.lookahead = deque()
+        self.lookahead_key = None
+        self.last_index = None
+        self.refilling = False
+
+
+class QuoteService:
+    """
+    Gedeelde service die uitspraken kiest voor alle sessies van het proces.
+
+    Args:
+        mode (str, optional): Selectiemodus ("random" of "bag")
+        max_sessions (int, optional): Maximaal aantal bewaarde cursors
+        session_ttl (float, optional): Seconden waarna een inactieve cursor vervalt
+        root_seed (str, optional): Root seed voor de generator per sessie (zie
+            quote_sampler.session_rng); indien None onvoorspelbaar
+        lookahead (int, optional): Aantal vooraf gekozen indices per sessie (0 = uit)
+        lookahead_workers (int, optional): Aantal threads dat de wachtrijen aanvult
+    """
+
+    def __init__(self, mode=QUOTE_SELECTION_MODE, max_sessions=QUOTE_SERVICE_MAX_SESSIONS,
+                 session_ttl=QUOTE_SERVICE_SESSION_TTL, root_seed=RANDOM_SEED,
+                 lookahead=QUOTE_LOOKAHEAD, lookahead_workers=QUOTE_LOOKAHEAD_WORKERS):
+        self.mode = mode
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.root_seed = root_seed
+        self.lookahead = lookahead
+        self.lookahead_workers = lookahead_workers
+        self.evictions = 0
+        self.lookahead_hits = 0
+        self.lookahead_misses = 0
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def store(self):
+        """De catalogus van het proces."""
+        return get_quote_store()
+
+    def _evict(self, now):
+        """Verwijdert verlopen en overtollige cursors (de oudste staan vooraan)."""
+        while self._cursors:
+            session_id, cursor = next(iter(self._cursors.items()))
+            if len(self._cursors) <= self.max_sessions and now - cursor.last_seen < self.session_ttl:
+                break
+            del self._cursors[session_id]
+            self.evictions += 1
+
+    def _new_sampler(self, session_id):
+        """Maakt een sampler met een eigen, uit de root seed afgeleide generator."""
+        return QuoteSampler(self.mode, rng=session_rng(session_id, self.root_seed))
+
+    def _cursor_for(self, session_id, store):
+        """Geeft de cursor van een sessie en markeert de sessie als actief."""
+        now = time.monotonic()
+        with self._lock:
+            cursor = self._cursors.get(session_id)
+            if cursor is None:
+                cursor = self._cursors[session_id] = SessionCursor(self._new_sampler(session_id), store.generation)
+            else:
+                cursor.last_seen = now
+                self._cursors.move_to_end(session_id)
+            self._evict(now)
+        return cursor
+
+    def _remap_cursor(self, session_id, cursor, store):
+        """
+        Zet de ronde en de wachtrij van een cursor om als de catalogus is
+        herladen, of begint opnieuw (aanroeper houdt beide locks).
+        """
+        if cursor.generation == store.generation:
+            return
+        mapping = get_remap(cursor.generation)
+        if mapping is not None:
+            cursor.sampler.remap(mapping, len(store))
+            cursor.lookahead = deque(mapping[index] for index in cursor.lookahead if mapping[index] >= 0)
+            last_index = cursor.last_index
+            cursor.last_index = mapping[last_index] if last_index is not None and mapping[last_index] >= 0 else None
+        else:
+            cursor.sampler = self._new_sampler(session_id)
+            cursor.lookahead.clear()
+            cursor.last_index = None
+        cursor.generation = store.generation
+
+    def _draw(self, cursor, store, current_index, key):
+        """Kiest één index met de sampler van de cursor (aanroeper houdt cursor.draw_lock)."""
+        tags, language, weighted, query = key
+        if tags or language or weighted or query:
+            return get_selection_engine().draw(
+                store, current_index, tags, language, rng=cursor.sampler.rng, query=query
+            )
+
+        size = len(store)
+        if size <= 1:
+            return 0
+        return cursor.sampler.next_index(size, current_index)
+
+    def _take_lookahead(self, cursor, key, current_index):
+        """
+        Neemt de eerste vooraf gekozen index die niet gelijk is aan de huidige
+        (aanroeper houdt cursor.lock).
+
+        Returns:
+            int: De index, of None als de wachtrij leeg of voor een ander filter is
+        """
+        if cursor.lookahead_key != key:
+            return None
+        queue = cursor.lookahead
+        for position, index in enumerate(queue):
+            if index != current_index:
+                del queue[position]
+                return index
+        return None
+
+    def _switch_lookahead(self, cursor, key):
+        """
+        Gooit een wachtrij voor een ander filter weg (aanroeper houdt beide locks).
+
+        Zonder filter kwamen de indices uit de shuffle-bag; die krijgt ze terug,
+        zodat ze deze ronde nog aan de beurt komen.
+        """
+        if cursor.lookahead_key == key:
+            return
+        if cursor.lookahead and not any(cursor.lookahead_key):
+            cursor.sampler.undraw(reversed(cursor.lookahead))
+        cursor.lookahead.clear()
+        cursor.lookahead_key = key
+
+    def _refill(self, cursor, key):
+        """Vult de wachtrij van een cursor aan tot `lookahead` indices (in de thread pool)."""
+        try:
+            while True:
+                with cursor.draw_lock:
+                    with cursor.lock:
+                        store = self.store
+                        queue = cursor.lookahead
+                        if (len(queue) >= self.lookahead or cursor.lookahead_key != key
+                                or cursor.generation != store.generation):
+                            return
+                        previous = queue[-1] if queue else cursor.last_index
+                    # Trekken zonder de wachtrij vast te houden: een klik kan intussen een index nemen
+                    index = self._draw(cursor, store, previous, key)
+                    if index is None:
+                        return
+                    with cursor.lock:
+                        queue.append(index)
+        finally:
+            with cursor.lock:
+                cursor.refilling = False
+
+    def _schedule_refill(self, cursor, key):
+        """Laat de thread pool de wachtrij aanvullen als hij half leeg is (aanroeper houdt cursor.lock)."""
+        if cursor.refilling or len(cursor.lookahead) > self.lookahead // 2:
+            return
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.lookahead_workers, thread_name_prefix="stan-lookahead"
+                    )
+        cursor.refilling = True
+        self._executor.submit(self._refill, cursor, key)
+
+    def next_index(self, session_id, current_index=None, tags=None, language=None, weighted=False,
+                   query=None, store=None):
+        """
+        Kiest de index van de volgende uitspraak voor een sessie.
+
+        Args:
+            session_id (str): Id van de sessie
+            current_index (int, optional): Index van de huidige uitspraak
+            tags (iterable, optional): Alleen uitspraken met minstens één van deze tags
+            language (str, optional): Alleen uitspraken in deze taal
+            weighted (bool, optional): Gebruik het "weight" veld van de catalogus
+            query (str, optional): Alleen uitspraken die deze zoekopdracht vindt (zie quote_search.py)
+            store (QuoteStore, optional): Catalogus waarin current_index en de nieuwe
+                index gelden; standaard de huidige. Een aanroeper die de index
+                daarna in dezelfde catalogus opzoekt, geeft die hier mee.
+
+        Returns:
+            int: De nieuwe index, of None als er niets aan het filter voldoet
+        """
+        if store is None:
+            store = self.store
+        cursor = self._cursor_for(session_id, store)
+        key = (frozenset(tags) if tags else None, language, bool(weighted), query)
+
+        # Snelle weg: een vooraf gekozen index, zonder op een trekking te wachten
+        new_index = None
+        if self.lookahead > 0 and cursor.generation == store.generation:
+            with cursor.lock:
+                new_index = self._take_lookahead(cursor, key, current_index)
+                if new_index is not None:
+                    cursor.last_index = new_index
+                    self._schedule_refill(cursor, key)
+
+        from_lookahead = new_index is not None
+        if not from_lookahead:
+            with cursor.draw_lock:
+                with cursor.lock:
+                    self._remap_cursor(session_id, cursor, store)
+                    if self.lookahead > 0:
+                        # De thread pool kan de wachtrij net hebben aangevuld
+                        new_index = self._take_lookahead(cursor, key, current_index)
+                        from_lookahead = new_index is not None
+                        self._switch_lookahead(cursor, key)
+                if not from_lookahead:
+                    new_index = self._draw(cursor, store, current_index, key)
+                with cursor.lock:
+                    cursor.last_index = new_index
+                    if self.lookahead > 0 and new_index is not None:
+                        self._schedule_refill(cursor, key)
+
+        if self.lookahead > 0:
+            # Meerdere sessies klikken tegelijk: "+=" is geen atomaire bewerking
+            with self._lock:
+                if from_lookahead:
+                    self.lookahead_hits += 1
+                else:
+                    self.lookahead_misses += 1
+            metrics.count(metrics.QUOTE_LOOKAHEAD_METRIC, result="hit" if from_lookahead else "miss")
+        return new_index
+
+    def quote_text(self, index, default=NO_QUOTES_TEXT):
+        """
+        Zoekt de tekst van een uitspraak op in de catalogus.
+
+        Args:
+            index (int): Index van de uitspraak, of None
+            default (str, optional): Tekst als de index None is
+
+        Returns:
+            str: De uitspraak
+        """
+        if index is None:
+            return default
+        try:
+            return self.store[index]
+        except IndexError:
+            return NO_QUOTES_TEXT
+
+    def remap_index(self, index, quote_id=None, store=None):
+        """
+        Zet een index uit een eerdere catalogus om naar de huidige.
+
+        Args:
+            index (int): Index in de eerdere catalogus, of None
+            quote_id (str, optional): Stabiel id van de uitspraak (quote_store.record_id).
+                Zonder id blijft de index staan als hij nog binnen de catalogus valt.
+            store (QuoteStore, optional): Catalogus waarnaar wordt omgezet; standaard de huidige
+
+        Returns:
+            int: De index in de catalogus, of None als de uitspraak verwijderd is
+        """
+        if index is None:
+            return None
+        if store is None:
+            store = self.store
+        if quote_id is not None:
+            return store.index_of(quote_id)
+        return index if 0 <= index < len(store) else None
+
+    def reset(self, session_id):
+        """Verwijdert de cursor van een sessie, zodat hij opnieuw begint."""
+        with self._lock:
+            self._cursors.pop(session_id, None)
+
+    def stats(self):
+        """
+        Geeft statistieken van de service.
+
+        Returns:
+            dict: Aantal bewaarde cursors, aantal verwijderde cursors en het
+                aantal klikken met en zonder vooraf gekozen index
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._cursors),
+                "evictions": self.evictions,
+                "lookahead_hits": self.lookahead_hits,
+                "lookahead_misses": self.lookahead_misses,
+            }
+
+    def close(self):
+        """Stopt de thread pool die de wachtrijen aanvult."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    print("Quote Service Test\n")
+    service = QuoteService(mode="bag", max_sessions=3, session_ttl=60)
+
+    current = {}
+    for round_number in range(20):
+        for session in ("a", "b", "c", "d"):
+            new = service.next_index(session, current.get(session))
+            assert new != current.get(session)
+            current[session] = new
+    print(f"Na 4 sessies met maximaal 3 cursors: {service.stats()}")
+    print(f"Uitspraak van sessie a: {service.quote_text(current['a'])}")
+    print(f"Geen index: {service.quote_text(None, 'Klik op de robot!')}")
+
+    # Dezelfde root seed geeft per sessie dezelfde reeks, ook na een reset
+    first = QuoteService(mode="bag", root_seed="42")
+    second = QuoteService(mode="bag", root_seed="42")
+
+    def draw_sequence(service, count=12):
+        current = None
+        sequence = []
+        for _ in range(count):
+            current = service.next_index("sessie", current)
+            sequence.append(current)
+        return sequence
+
+    sequence = draw_sequence(first)
+    assert sequence == draw_sequence(second)
+    first.reset("sessie")
+    assert draw_sequence(first) == sequence
+    print(f"Reproduceerbare reeks met root seed 42: {sequence}")
+
+    # Met lookahead kiest de thread pool dezelfde reeks vooraf; een klik neemt
+    # alleen de eerste index uit de wachtrij
+    ahead = QuoteService(mode="bag", root_seed="42", lookahead=4)
+    current = None
+    ahead_sequence = []
+    for _ in range(12):
+        new = ahead.next_index("sessie", current)
+        assert new != current
+        current = new
+        ahead_sequence.append(current)
+        time.sleep(0.01)
+    assert ahead_sequence == sequence, ahead_sequence
+    print(f"Zelfde reeks met lookahead: {ahead.stats()}")
+
+    # Een ander filter gooit de wachtrij weg; de shuffle-bag krijgt de indices terug
+    shown = set(ahead_sequence)
+    current = ahead.next_index("sessie", current, language="nl")
+    for _ in range(len(ahead.store) - len(shown)):
+        current = ahead.next_index("sessie", current)
+        shown.add(current)
+        time.sleep(0.01)
+    assert len(shown) == len(ahead.store), shown
+    print("Na een filterwissel blijft de ronde compleet")
+    ahead.close()
@@ -0,0 +1,216 @@
+"""
+Quote Session Module voor Stan de GitHub Agent.
+
+Deze module koppelt de pure quote logica (quote_generator.py, quote_service.py)
+aan Streamlit: de sessie-state met de huidige index, de gedeelde quote service
+via st.cache_resource en het id van de huidige sessie.
+
+Naast de index bewaart de sessie het stabiele id van de uitspraak en de
+generation van de catalogus. Is de catalogus inmiddels herladen
+(catalog_reload.py), dan wordt de index bij het volgende gebruik op het id
+omgezet naar de nieuwe catalogus.
+"""
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import metrics
+import state_backend
+from catalog_reload import start_catalog_watcher
+from click_limiter import get_click_limiter
+from constants import QUOTE_WEIGHTED, QUOTE_PLACEHOLDER
+from quote_service import QuoteService, NO_QUOTES_TEXT
+
+
+# Sessie-state sleutels met de geweigerde en samengevoegde klikken van de sessie
+CLICKS_REJECTED_KEY = "clicks_rejected"
+CLICKS_COALESCED_KEY = "clicks_coalesced"
+
+# Sessie-state sleutels met het id van de huidige uitspraak en de generation
+# van de catalogus waarin quote_index geldt
+QUOTE_ID_KEY = "quote_id"
+QUOTE_GENERATION_KEY = "quote_generation"
+
+
+@st.cache_resource
+def get_quote_service():
+    """
+    Geeft de procesbrede quote service terug (één instantie per proces).
+
+    Bij het aanmaken start ook de watcher die de catalogus herlaadt als het
+    bestand uit QUOTE_SOURCE verandert.
+
+    Returns:
+        QuoteService: De gedeelde service
+    """
+    start_catalog_watcher()
+    return QuoteService()
+
+
+def current_session_id():
+    """
+    Geeft het id van de huidige Streamlit sessie.
+
+    Returns:
+        str: Het sessie-id, of "default" buiten een Streamlit sessie
+    """
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "default"
+
+
+def initialize_session_state():
+    """
+    Initialiseert de Streamlit sessie-state voor het bijhouden van de huidige quote index.
+
+    Deze functie moet worden aangeroepen aan het begin van de Streamlit app.
+    De sessie bewaart alleen de index; de selectiestaat (bijv. de shuffle-bag)
+    staat in de gedeelde quote service. Met een gedeelde state backend wordt de
+    uitspraak van een eerder bezoek (ook vanuit een ander proces) hersteld; de
+    index wordt op het bewaarde id omgezet, want de catalogus kan intussen
+    herladen zijn of in het andere proces een andere versie hebben.
+    """
+    if 'quote_index' not in st.session_state:
+        restored = state_backend.get_restored_state()
+        index = restored.get("quote_index")
+        if index is None:
+            st.session_state.quote_index = None
+            return
+        service = get_quote_service()
+        store = service.store
+        set_quote_index(service.remap_index(index, restored.get("quote_id"), store), store)
+
+
+def set_quote_index(index, store=None):
+    """
+    Slaat de huidige uitspraak van de sessie op, met zijn id en de generation.
+
+    Geef de catalogus mee waaruit de index komt: de catalogus van het proces
+    kan intussen herladen zijn, en de index hoort bij de generation waarin hij
+    gekozen is.
+
+    Args:
+        index (int): Index in de catalogus, of None
+        store (QuoteStore, optional): Catalogus waarin de index geldt; standaard de huidige
+    """
+    if store is None:
+        store = get_quote_service().store
+    if index is not None and not 0 <= index < len(store):
+        index = None
+    st.session_state.quote_index = index
+    st.session_state[QUOTE_ID_KEY] = store.quote_id(index) if index is not None else None
+    st.session_state[QUOTE_GENERATION_KEY] = store.generation
+
+
+def current_quote_index(store=None):
+    """
+    Geeft de index van de huidige uitspraak in de huidige catalogus.
+
+    Is de catalogus herladen sinds de index is opgeslagen, dan wordt de index
+    op het stabiele id omgezet (en opgeslagen). Een index zonder id, zoals een
+    hersteld bezoek, blijft staan zolang hij binnen de catalogus valt.
+
+    Args:
+        store (QuoteStore, optional): Catalogus waarin de index moet gelden; standaard de huidige
+
+    Returns:
+        int: De index, of None als er geen (of een verwijderde) uitspraak is
+    """
+    index = st.session_state.get("quote_index")
+    if store is None:
+        store = get_quote_service().store
+    if index is None or st.session_state.get(QUOTE_GENERATION_KEY) == store.generation:
+        return index
+    index = get_quote_service().remap_index(index, st.session_state.get(QUOTE_ID_KEY), store)
+    set_quote_index(index, store)
+    return index
+
+
+def reset_session_state():
+    """
+    Zet de quote-voortgang van de huidige sessie terug naar het begin.
+    """
+    set_quote_index(None)
+    get_quote_service().reset(current_session_id())
+
+
+def admit_clicks(clicks=1):
+    """
+    Laat klikken van de huidige sessie door de rate limiter.
+
+    Geweigerde en samengevoegde klikken worden geteld in de sessie-state
+    (CLICKS_REJECTED_KEY, CLICKS_COALESCED_KEY) en in de metrics.
+
+    Args:
+        clicks (int, optional): Aantal klikken dat samen binnenkwam. Default is 1.
+
+    Returns:
+        ClickDecision: Toegelaten, toe te passen, samengevoegde en geweigerde klikken
+    """
+    decision = get_click_limiter().admit(current_session_id(), clicks)
+    if decision.rejected:
+        st.session_state[CLICKS_REJECTED_KEY] = st.session_state.get(CLICKS_REJECTED_KEY, 0) + decision.rejected
+        metrics.count(metrics.CLICKS_REJECTED_METRIC, decision.rejected)
+    if decision.coalesced:
+        st.session_state[CLICKS_COALESCED_KEY] = st.session_state.get(CLICKS_COALESCED_KEY, 0) + decision.coalesced
+        metrics.count(metrics.CLICKS_COALESCED_METRIC, decision.coalesced)
+    return decision
+
+
+def get_current_quote(default=QUOTE_PLACEHOLDER):
+    """
+    Geeft de tekst van de huidige uitspraak van de sessie.
+
+    De tekst wordt uit de gedeelde catalogus opgezocht, zodat de sessie geen
+    eigen kopie hoeft te bewaren.
+
+    Args:
+        default (str, optional): Tekst zolang er nog geen uitspraak gekozen is.
+
+    Returns:
+        str: De huidige uitspraak.
+    """
+    return get_quote_service().quote_text(current_quote_index(), default)
+
+
+def get_next_quote_with_state(tags=None, language=None, query=None):
+    """
+    Haalt de volgende uitspraak op en update de sessie-state.
+
+    Deze functie is specifiek voor gebruik in een Streamlit-applicatie en maakt gebruik
+    van Streamlit's sessie-state mechanisme om de huidige index bij te houden.
+    Met een filter of bij gewogen selectie (QUOTE_WEIGHTED) wordt de selectie-engine
+    gebruikt; anders de sampler van de sessie in de gedeelde quote service.
+
+    Args:
+        tags (iterable, optional): Alleen uitspraken met minstens één van deze tags.
+        language (str, optional): Alleen uitspraken in deze taal.
+        query (str, optional): Alleen uitspraken die deze zoekopdracht vindt.
+
+    Returns:
+        str: De volgende uitspraak.
+    """
+    # Initialiseer sessie-state indien nodig
+    initialize_session_state()
+
+    # Haal de volgende uitspraak op via de gedeelde service; de hele klik werkt
+    # met één catalogus, ook als die intussen herladen wordt
+    service = get_quote_service()
+    store = service.store
+    with metrics.timed("quote_draw", metric=metrics.QUOTE_DRAW_METRIC):
+        new_index = service.next_index(
+            current_session_id(),
+            current_quote_index(store),
+            tags,
+            language,
+            weighted=QUOTE_WEIGHTED,
+            query=query,
+            store=store
+        )
+
+    # Geen uitspraak voldoet aan het filter: de index blijft ongewijzigd
+    if new_index is None:
+        return NO_QUOTES_TEXT
+
+    # Update de sessie-state
+    set_quote_index(new_index, store)
+
+    return store[new_index]
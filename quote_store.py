@@ -0,0 +1,543 @@
+"""
+Quote Store Module voor Stan de GitHub Agent.
+
+Deze module abstraheert waar de uitspraken vandaan komen. De standaard is de
+QUOTES lijst uit constants.py in het geheugen, maar een catalogus kan ook uit
+een JSONL-, CSV-, SQLite- of compact .stancat bestand worden gelezen. Voor de bestandsformaten
+wordt één keer een offset-index opgebouwd; individuele uitspraken worden daarna
+via memory-mapped reads opgehaald, zodat een catalogus van miljoenen regels
+niet in het geheugen van elke worker hoeft te staan.
+
+Elke uitspraak heeft een stabiel id (het "id" veld, of een hash van de tekst),
+zodat een index na het herladen van de catalogus (catalog_reload.py) naar de
+nieuwe catalogus kan worden omgezet. De catalogus van het proces wordt met
+`swap_quote_store` in één keer vervangen; elke vervanging krijgt een hogere
+`generation`.
+
+Een gemapt bestand dat daarna in place wordt overschreven of afgekapt laat
+het proces bij de volgende read crashen (SIGBUS). Bestanden worden daarom via
+een onveranderlijke kopie in CATALOG_SNAPSHOT_DIR gemapt (open_snapshot); het
+bronbestand mag dan vrij worden bewerkt terwijl de app draait.
+"""
+
+import os
+import csv
+import json
+import mmap
+import hashlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+from array import array
+from constants import QUOTES, QUOTE_SOURCE, CATALOG_SNAPSHOT_DIR
+
+
+def record_id(record):
+    """
+    Geeft het stabiele id van een record.
+
+    Args:
+        record (dict): Het record, met minimaal de sleutel "text"
+
+    Returns:
+        str: Het "id" veld, of anders een hash van de tekst
+    """
+    explicit_id = record.get("id")
+    if explicit_id not in (None, ""):
+        return str(explicit_id)
+    return hashlib.sha1(record.get("text", "").encode("utf-8")).hexdigest()[:16]
+
+
+def _stat_signature(file_stat):
+    """Geeft de velden van een stat die veranderen als het bestand verandert."""
+    return (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+
+
+def open_snapshot(path, snapshot_dir=CATALOG_SNAPSHOT_DIR):
+    """
+    Opent een onveranderlijke kopie van een bestand, om veilig te mappen.
+
+    De kopie heet naar het pad, de inode, de grootte en de mtime van het
+    bestand: processen die dezelfde versie openen delen één kopie (en dus de
+    pagina's in de page cache). Een kopie wordt alleen atomair (os.replace)
+    geschreven en nooit overschreven. Verandert het bestand tijdens het
+    kopiëren, dan wordt de kopie weggegooid.
+
+    Args:
+        path (str): Pad naar het bronbestand
+        snapshot_dir (str, optional): Directory voor de kopieën
+
+    Returns:
+        tuple: (bestandsobject van de kopie, geopend als "rb"; os.stat_result van het bronbestand)
+
+    Raises:
+        OSError: Als het bestand ontbreekt of tijdens het kopiëren veranderde
+    """
+    source_stat = os.stat(path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(path)}:{_stat_signature(source_stat)}".encode("utf-8")
+    ).hexdigest()[:16]
+    snapshot_path = os.path.join(snapshot_dir, key + os.path.splitext(path)[1])
+
+    # Een ander proces kan een oude kopie net hebben verwijderd: maak hem dan opnieuw
+    for _ in range(2):
+        try:
+            return open(snapshot_path, "rb"), source_stat
+        except FileNotFoundError:
+            pass
+        os.makedirs(snapshot_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=snapshot_dir, suffix=".tmp")
+        try:
+            with open(path, "rb") as source_file, os.fdopen(handle, "wb") as snapshot_file:
+                shutil.copyfileobj(source_file, snapshot_file)
+            if _stat_signature(os.stat(path)) != _stat_signature(source_stat):
+                raise OSError(f"{path} veranderde tijdens het kopiëren")
+            os.replace(temp_path, snapshot_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return open(snapshot_path, "rb"), source_stat
+
+
+def remove_snapshot(snapshot_file):
+    """
+    Sluit een kopie van open_snapshot en verwijdert hem.
+
+    Processen die de kopie nog gemapt hebben houden hun map; een proces dat
+    dezelfde versie later opent maakt de kopie opnieuw.
+
+    Args:
+        snapshot_file (file): Het bestandsobject van de kopie
+    """
+    snapshot_file.close()
+    try:
+        os.remove(snapshot_file.name)
+    except OSError:
+        pass
+
+
+class QuoteStore:
+    """
+    Basisklasse voor een catalogus met uitspraken, benaderbaar per index.
+
+    Subklassen implementeren `__len__` en `get_record`. Het attribuut `version`
+    verandert als de inhoud van de catalogus verandert, zodat afgeleide
+    structuren (zoals selectietabellen) weten wanneer ze opnieuw moeten worden
+    opgebouwd. Een catalogus met `append_only` verandert alleen door nieuwe
+    uitspraken achteraan; afgeleide structuren mogen die incrementeel bijwerken.
+    `generation` telt de vervangingen van de catalogus van het proces
+    (swap_quote_store) en blijft gelijk zolang deze catalogus actief is.
+    """
+
+    version = 0
+    generation = 0
+    append_only = False
+    _ids = None
+    _ids_size = 0
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get_record(self, index):
+        """
+        Haalt het volledige record van een uitspraak op.
+
+        Args:
+            index (int): Positie van de uitspraak in de catalogus
+
+        Returns:
+            dict: Het record, met minimaal de sleutel "text"
+
+        Raises:
+            IndexError: Als de index buiten de catalogus valt
+        """
+        raise NotImplementedError
+
+    def __getitem__(self, index):
+        return self.get_record(index)["text"]
+
+    def iter_records(self):
+        """
+        Loopt alle records van de catalogus in volgorde af.
+
+        Yields:
+            tuple: (int, dict) De index en het record
+        """
+        for index in range(len(self)):
+            yield index, self.get_record(index)
+
+    def quote_id(self, index):
+        """
+        Geeft het stabiele id van een uitspraak.
+
+        Args:
+            index (int): Positie van de uitspraak in de catalogus
+
+        Returns:
+            str: Het id (zie record_id)
+        """
+        return record_id(self.get_record(index))
+
+    def build_id_index(self):
+        """
+        Bouwt de opzoektabel van id naar index (eenmalig, O(catalogus)).
+
+        Bij dubbele ids telt de eerste uitspraak.
+
+        Returns:
+            dict: Id naar index
+        """
+        ids = {}
+        size = 0
+        for index, record in self.iter_records():
+            ids.setdefault(record_id(record), index)
+            size = index + 1
+        self._ids = ids
+        self._ids_size = size
+        return ids
+
+    def index_of(self, quote_id):
+        """
+        Zoekt de index van een uitspraak op zijn stabiele id.
+
+        Args:
+            quote_id (str): Het id
+
+        Returns:
+            int: De index, of None als de uitspraak niet (meer) in de catalogus staat
+        """
+        ids = self._ids
+        if ids is None or (self.append_only and self._ids_size != len(self)):
+            # Nog niet opgebouwd, of er zijn sindsdien uitspraken toegevoegd
+            ids = self.build_id_index()
+        return ids.get(quote_id)
+
+    def close(self):
+        """Geeft eventuele bestanden of verbindingen vrij."""
+
+
+class InMemoryQuoteStore(QuoteStore):
+    """Catalogus op basis van een lijst strings of dicts in het geheugen."""
+
+    append_only = True
+
+    def __init__(self, quotes=QUOTES):
+        self._quotes = quotes
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def add(self, quote):
+        """
+        Voegt een uitspraak achteraan de catalogus toe.
+
+        Args:
+            quote (str or dict): De tekst, of een record met minimaal "text"
+
+        Returns:
+            int: De index van de nieuwe uitspraak
+        """
+        with self._lock:
+            if self._quotes is QUOTES:
+                # De standaardlijst uit constants.py niet in-place wijzigen
+                self._quotes = list(QUOTES)
+            self._quotes.append(quote)
+            self.version += 1
+            return len(self._quotes) - 1
+
+    def get_record(self, index):
+        quote = self._quotes[index]
+        return quote if isinstance(quote, dict) else {"text": quote}
+
+    def __getitem__(self, index):
+        quote = self._quotes[index]
+        return quote["text"] if isinstance(quote, dict) else quote
+
+
+class _MappedLineStore(QuoteStore):
+    """
+    Gemeenschappelijke basis voor regel-georiënteerde bestanden.
+
+    Bij het openen wordt een onveranderlijke kopie van het bestand gemapt
+    (open_snapshot) en wordt voor elke niet-lege regel de begin-offset in een
+    compacte array('Q') opgeslagen.
+    """
+
+    def __init__(self, path, skip_lines=0):
+        self.path = path
+        self._file, file_stat = open_snapshot(path)
+        self._mmap = None
+        self._offsets = array("Q")
+        self.version = (file_stat.st_mtime_ns, file_stat.st_size)
+        try:
+            if os.fstat(self._file.fileno()).st_size > 0:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._build_index(skip_lines)
+        except Exception:
+            self.close()
+            raise
+
+    def _build_index(self, skip_lines):
+        """Bouwt de offset-index op (eenmalig, O(bestandsgrootte))."""
+        data = self._mmap
+        size = len(data)
+        start = 0
+        while start < size:
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = size
+            if skip_lines > 0:
+                skip_lines -= 1
+            elif data[start:end].strip():
+                self._offsets.append(start)
+            start = end + 1
+
+    def _read_line(self, index):
+        """Leest de ruwe regel voor een index via de memory map."""
+        if index < 0:
+            index += len(self._offsets)
+        start = self._offsets[index]
+        end = self._mmap.find(b"\n", start)
+        if end == -1:
+            end = len(self._mmap)
+        return self._mmap[start:end].decode("utf-8").rstrip("\r")
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        remove_snapshot(self._file)
+
+
+class JsonlQuoteStore(_MappedLineStore):
+    """
+    Catalogus in JSON Lines formaat.
+
+    Elke regel is een JSON object met minimaal "text", of een losse JSON string.
+    """
+
+    def get_record(self, index):
+        record = json.loads(self._read_line(index))
+        return record if isinstance(record, dict) else {"text": record}
+
+
+class CsvQuoteStore(_MappedLineStore):
+    """
+    Catalogus in CSV formaat met een kopregel die minimaal de kolom "text" bevat.
+
+    Elke uitspraak moet op één regel staan; velden met regeleinden worden
+    niet ondersteund omdat de index per regel wordt opgebouwd.
+    """
+
+    def __init__(self, path):
+        super().__init__(path, skip_lines=1)
+        # De kop uit dezelfde kopie als de regels
+        with open(self._file.name, newline="", encoding="utf-8") as csv_file:
+            self._columns = next(csv.reader(csv_file), [])
+        if "text" not in self._columns:
+            self.close()
+            raise ValueError(f"CSV bestand {path} mist de kolom 'text'")
+
+    def get_record(self, index):
+        values = next(csv.reader([self._read_line(index)]))
+        return dict(zip(self._columns, values))
+
+
+class SQLiteQuoteStore(QuoteStore):
+    """
+    Catalogus in een SQLite tabel met minimaal de kolom "text".
+
+    De rowids worden één keer ingelezen, zodat elke uitspraak met een enkele
+    primary-key lookup kan worden opgehaald.
+    """
+
+    def __init__(self, path, table="quotes"):
+        self.path = path
+        self.table = table
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        file_stat = os.stat(path)
+        self.version = (file_stat.st_mtime_ns, file_stat.st_size)
+        rowids = self._connection.execute(f'SELECT rowid FROM "{table}" ORDER BY rowid')
+        self._rowids = array("q", (row[0] for row in rowids))
+
+    def __len__(self):
+        return len(self._rowids)
+
+    def get_record(self, index):
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT * FROM "{self.table}" WHERE rowid = ?', (self._rowids[index],)
+            ).fetchone()
+        return dict(row)
+
+    def close(self):
+        self._connection.close()
+
+
+def open_quote_store(source=None):
+    """
+    Opent een catalogus op basis van het bestandstype.
+
+    Args:
+        source (str, optional): Pad naar een .jsonl, .csv, .sqlite, .db of .stancat
+            bestand. Indien None, wordt de QUOTES lijst uit constants.py gebruikt.
+
+    Returns:
+        QuoteStore: De geopende catalogus
+
+    Raises:
+        ValueError: Als het bestandstype niet wordt ondersteund
+    """
+    if not source:
+        return InMemoryQuoteStore(QUOTES)
+
+    extension = os.path.splitext(source)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return JsonlQuoteStore(source)
+    if extension == ".csv":
+        return CsvQuoteStore(source)
+    if extension in (".sqlite", ".sqlite3", ".db"):
+        return SQLiteQuoteStore(source)
+    if extension == ".stancat":
+        # Compacte catalogus (één blob met offsets, zie compact_catalog.py)
+        from compact_catalog import CompactQuoteStore
+        return CompactQuoteStore.open(source)
+    raise ValueError(f"Onbekend catalogusformaat: {source}")
+
+
+# Eén catalogus per proces, gedeeld door alle sessies
+_store = None
+_store_lock = threading.Lock()
+
+# Omzetting van de vorige naar de huidige catalogus: (generation, array)
+_last_remap = (None, None)
+
+
+def get_quote_store():
+    """
+    Geeft de catalogus van het proces terug en opent hem bij de eerste aanroep.
+
+    Returns:
+        QuoteStore: De catalogus uit QUOTE_SOURCE, of de standaard QUOTES lijst
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_quote_store(QUOTE_SOURCE)
+    return _store
+
+
+def build_remap(old_store, new_store):
+    """
+    Bepaalt voor elke index van de oude catalogus de index in de nieuwe.
+
+    Args:
+        old_store (QuoteStore): De oude catalogus
+        new_store (QuoteStore): De nieuwe catalogus
+
+    Returns:
+        array: array('l') met per oude index de nieuwe index, of -1 als de
+            uitspraak is verwijderd
+    """
+    mapping = array("l", [-1]) * len(old_store)
+    for index, record in old_store.iter_records():
+        new_index = new_store.index_of(record_id(record))
+        if new_index is not None:
+            mapping[index] = new_index
+    return mapping
+
+
+def swap_quote_store(new_store, prepare=None):
+    """
+    Vervangt de catalogus van het proces in één keer door een nieuwe.
+
+    De nieuwe catalogus krijgt de volgende `generation` en de omzetting van de
+    oude naar de nieuwe indices wordt bewaard (get_remap). Alles wat vooraf
+    moet worden opgebouwd gebeurt vóór de toewijzing; lezers zien dus de oude
+    of de complete nieuwe catalogus. Lopende aanroepen werken met de catalogus
+    die ze al in handen hebben; de aanroeper sluit de oude catalogus pas als
+    die niet meer in gebruik is.
+
+    Args:
+        new_store (QuoteStore): De nieuwe catalogus
+        prepare (callable, optional): Bouwt afgeleide structuren van de nieuwe
+            catalogus (bijv. de zoekindex); de generation is dan al gezet
+
+    Returns:
+        QuoteStore: De vorige catalogus
+    """
+    global _store, _last_remap
+    get_quote_store()
+    with _store_lock:
+        old_store = _store
+        new_store.generation = old_store.generation + 1
+        mapping = build_remap(old_store, new_store)
+        if prepare is not None:
+            prepare(new_store)
+        _last_remap = (old_store.generation, mapping)
+        _store = new_store
+    return old_store
+
+
+def get_remap(generation):
+    """
+    Geeft de omzetting van een vorige catalogus naar de huidige.
+
+    Alleen de laatste vervanging wordt bewaard; een cursor die meerdere
+    vervangingen heeft gemist begint opnieuw.
+
+    Args:
+        generation (int): De generation van de catalogus van de cursor
+
+    Returns:
+        array: Oude index naar nieuwe index (zie build_remap), of None
+    """
+    from_generation, mapping = _last_remap
+    return mapping if generation == from_generation else None
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    import tempfile
+
+    print("Quote Store Test\n")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jsonl_path = os.path.join(temp_dir, "quotes.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+            for quote in QUOTES:
+                jsonl_file.write(json.dumps({"text": quote}, ensure_ascii=False) + "\n")
+
+        csv_path = os.path.join(temp_dir, "quotes.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["text"])
+            writer.writerows([quote] for quote in QUOTES)
+
+        sqlite_path = os.path.join(temp_dir, "quotes.sqlite")
+        connection = sqlite3.connect(sqlite_path)
+        connection.execute("CREATE TABLE quotes (text TEXT NOT NULL)")
+        connection.executemany("INSERT INTO quotes (text) VALUES (?)", [(q,) for q in QUOTES])
+        connection.commit()
+        connection.close()
+
+        from compact_catalog import write_compact_catalog
+        stancat_path = os.path.join(temp_dir, "quotes.stancat")
+        write_compact_catalog(QUOTES, stancat_path)
+
+        for path in (None, jsonl_path, csv_path, sqlite_path, stancat_path):
+            store = open_quote_store(path)
+            assert len(store) == len(QUOTES)
+            assert all(store[i] == QUOTES[i] for i in range(len(QUOTES)))
+            assert store.index_of(store.quote_id(3)) == 3
+            print(f"{type(store).__name__}: {len(store)} uitspraken OK")
+            store.close()
@@ -0,0 +1,208 @@
+"""
+Replay Module voor Stan de GitHub Agent.
+
+Deze module speelt de klikreeksen uit de analytics database
+(click_analytics.py) opnieuw af en controleert dat de app dezelfde uitspraken
+had gekozen. Elke sessie kiest zijn uitspraken met een eigen random.Random,
+geseed uit de root seed (RANDOM_SEED) en het sessie-id
+(quote_sampler.session_rng). Een nieuwe QuoteService met dezelfde root seed,
+dezelfde selectiemodus en dezelfde catalogus doet per sessie dus precies
+dezelfde trekkingen; een afwijking wijst op een bug in de selectie of op
+gedeelde toestand tussen sessies.
+
+Per event van een sessie (in volgorde van vastleggen):
+- "server": `count` klikken, waarvan er met CLICK_COALESCE_MODE "once" maar
+  één de uitspraak laat opschuiven; de getoonde index moet overeenkomen
+- "reset": de sessie begint opnieuw (nieuwe cursor, opnieuw geseed)
+- "client": de browser koos zelf; de vastgelegde index wordt overgenomen
+
+Een replay klopt alleen als de sessie in de app niet is onderbroken: een
+cursor die door de LRU/TTL van de service is verwijderd, een herladen
+catalogus, een hersteld bezoek (state_backend.py) of events die uit een
+volle analytics buffer zijn weggevallen laten de reeks afwijken.
+
+Gebruik:
+    STAN_ANALYTICS=1 STAN_RANDOM_SEED=42 streamlit run app.py
+    python replay.py --seed 42
+    python replay.py --seed 42 --session <sessie-id> --db clicks.sqlite
+    python replay.py --self-test
+"""
+
+import sys
+import sqlite3
+import argparse
+from collections import OrderedDict
+from constants import (
+    RANDOM_SEED, ANALYTICS_DB_PATH, CLICK_COALESCE_MODE, QUOTE_SELECTION_MODE, QUOTE_WEIGHTED
+)
+from quote_service import QuoteService
+
+
+def load_sessions(db_path, session_id=None):
+    """
+    Leest de events uit de analytics database, gegroepeerd per sessie.
+
+    Args:
+        db_path (str): Pad naar de SQLite database
+        session_id (str, optional): Alleen de events van deze sessie
+
+    Returns:
+        OrderedDict: Sessie-id -> lijst van (quote_index, source, count), in
+            volgorde van vastleggen
+    """
+    sql = "SELECT session_id, quote_index, source, count FROM clicks"
+    parameters = ()
+    if session_id is not None:
+        sql += " WHERE session_id = ?"
+        parameters = (session_id,)
+    sql += " ORDER BY rowid"
+
+    sessions = OrderedDict()
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for session, quote_index, source, count in connection.execute(sql, parameters):
+            sessions.setdefault(session, []).append((quote_index, source, count))
+    finally:
+        connection.close()
+    return sessions
+
+
+def replay_session(service, session_id, events, coalesce_mode=CLICK_COALESCE_MODE,
+                   weighted=QUOTE_WEIGHTED):
+    """
+    Speelt de events van één sessie af en vergelijkt de gekozen uitspraken.
+
+    Args:
+        service (QuoteService): Service met de root seed van de opname
+        session_id (str): Id van de sessie
+        events (list): Tuples (quote_index, source, count) van load_sessions
+        coalesce_mode (str, optional): CLICK_COALESCE_MODE van de opname
+        weighted (bool, optional): QUOTE_WEIGHTED van de opname
+
+    Returns:
+        dict: Aantal gecontroleerde events, overeenkomsten, afwijkingen en de
+            eerste afwijking als (event, verwacht, gekozen), of None
+    """
+    service.reset(session_id)
+    current = None
+    checked = matched = 0
+    first_mismatch = None
+    for number, (quote_index, source, count) in enumerate(events):
+        if source == "reset":
+            service.reset(session_id)
+            current = None
+            continue
+        if source != "server":
+            current = quote_index
+            continue
+
+        draws = min(count, 1) if coalesce_mode == "once" else count
+        for _ in range(draws):
+            new_index = service.next_index(session_id, current, weighted=weighted)
+            if new_index is not None:
+                current = new_index
+        checked += 1
+        if current == quote_index:
+            matched += 1
+        elif first_mismatch is None:
+            first_mismatch = (number, quote_index, current)
+            # Verder met de vastgelegde index, zodat één afwijking de rest niet meesleept
+            current = quote_index
+
+    return {
+        "events": checked,
+        "matched": matched,
+        "mismatched": checked - matched,
+        "first_mismatch": first_mismatch,
+    }
+
+
+def replay(db_path=ANALYTICS_DB_PATH, root_seed=RANDOM_SEED, session_id=None,
+           mode=QUOTE_SELECTION_MODE, coalesce_mode=CLICK_COALESCE_MODE, weighted=QUOTE_WEIGHTED):
+    """
+    Speelt alle (of één) sessies uit de analytics database af.
+
+    Args:
+        db_path (str, optional): Pad naar de SQLite database
+        root_seed (str, optional): Root seed van de opname (STAN_RANDOM_SEED)
+        session_id (str, optional): Alleen deze sessie
+        mode (str, optional): Selectiemodus van de opname
+        coalesce_mode (str, optional): CLICK_COALESCE_MODE van de opname
+        weighted (bool, optional): QUOTE_WEIGHTED van de opname
+
+    Returns:
+        dict: Sessie-id -> resultaat van replay_session
+
+    Raises:
+        ValueError: Als er geen root seed is; zonder seed is een opname niet na te spelen
+    """
+    if root_seed is None:
+        raise ValueError("Geen root seed: zet STAN_RANDOM_SEED of geef --seed mee")
+    sessions = load_sessions(db_path, session_id)
+    # Geen LRU, TTL of lookahead tijdens het naspelen: elke sessie houdt zijn
+    # cursor en trekt synchroon (de lookahead trekt dezelfde keten vooraf)
+    service = QuoteService(mode=mode, max_sessions=len(sessions) + 1, session_ttl=float("inf"),
+                           root_seed=root_seed, lookahead=0)
+    return OrderedDict(
+        (session, replay_session(service, session, events, coalesce_mode, weighted))
+        for session, events in sessions.items()
+    )
+
+
+def run_self_test():
+    """Neemt twee sessies op en controleert dat de replay ze exact naspeelt."""
+    import os
+    import tempfile
+    from click_analytics import ClickRecorder
+
+    print("Replay Test\n")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "clicks.sqlite")
+        recorder = ClickRecorder(db_path, batch_size=50, flush_interval=0.1)
+
+        # Neem twee door elkaar klikkende sessies op, met een reset en een dubbele klik
+        live = QuoteService(mode="bag", root_seed="42")
+        current = {"a": None, "b": None}
+        script = [("a", 1), ("b", 1), ("a", 2), ("b", 1), ("a", "reset"), ("a", 1), ("b", 3), ("a", 1)]
+        for session, clicks in script:
+            if clicks == "reset":
+                live.reset(session)
+                current[session] = None
+                recorder.record(None, session, source="reset", count=0)
+                continue
+            for _ in range(clicks):
+                current[session] = live.next_index(session, current[session])
+            recorder.record(current[session], session, count=clicks)
+        recorder.close()
+
+        results = replay(db_path, root_seed="42", mode="bag", coalesce_mode="each", weighted=False)
+        for session, result in results.items():
+            print(f"Sessie {session}: {result}")
+        assert all(result["mismatched"] == 0 for result in results.values())
+
+        # Met een andere root seed wijkt de reeks af
+        results = replay(db_path, root_seed="7", mode="bag", coalesce_mode="each", weighted=False)
+        assert any(result["mismatched"] for result in results.values())
+        print(f"Andere seed: {sum(result['mismatched'] for result in results.values())} afwijkingen")
+
+
+# Command line interface
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speel de klikreeksen uit de analytics database na")
+    parser.add_argument("--db", default=ANALYTICS_DB_PATH, help="Pad naar de analytics database")
+    parser.add_argument("--seed", default=RANDOM_SEED, help="Root seed van de opname (STAN_RANDOM_SEED)")
+    parser.add_argument("--session", help="Alleen deze sessie")
+    parser.add_argument("--self-test", action="store_true", help="Draai de standalone test")
+    arguments = parser.parse_args()
+    if arguments.self_test:
+        run_self_test()
+        sys.exit(0)
+
+    try:
+        results = replay(arguments.db, arguments.seed, arguments.session)
+    except ValueError as error:
+        parser.error(str(error))
+    for session, result in results.items():
+        print(f"{session}: {result['matched']}/{result['events']} events gelijk"
+              + (f", eerste afwijking {result['first_mismatch']}" if result["mismatched"] else ""))
+    sys.exit(1 if any(result["mismatched"] for result in results.values()) else 0)
@@ -0,0 +1,96 @@
+"""
+Robot Component Module voor Stan de GitHub Agent.
+
+Deze module declareert de klikbare robot als minimale bidirectionele Streamlit
+component (components/robot/index.html). De component stuurt klikken direct
+terug naar Python, met een vaste key zodat er per klik geen widgets opnieuw
+hoeven te worden opgebouwd. Snelle klikken worden in de browser samengevoegd
+(debounce), zodat een reeks klikken niet tot een reeks reruns leidt.
+"""
+
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+from constants import BASE_DIR, ROBOT_CLICK_DEBOUNCE_MS
+
+
+# Directory met de frontend van de component (geen build stap nodig)
+ROBOT_COMPONENT_DIR = os.path.join(BASE_DIR, "components", "robot")
+
+# Vaste key van de component binnen een sessie
+ROBOT_COMPONENT_KEY = "robot_component"
+
+# Sessie-state sleutel met de laatst verwerkte (instance, clicks) van de component
+SEEN_CLICKS_KEY = "robot_component_seen"
+
+_robot_component = components.declare_component("robot", path=ROBOT_COMPONENT_DIR)
+
+
+def consume_new_clicks(value):
+    """
+    Bepaalt hoeveel nieuwe klikken een waarde van de component bevat.
+
+    De component stuurt het totaal aantal klikken sinds hij geladen is. Het
+    verschil met de vorige waarde is het aantal nieuwe klikken; een nieuwe
+    instance (bijv. na het opnieuw laden van de iframe) begint weer bij nul.
+
+    Args:
+        value (dict): Waarde van de component, {"instance": str, "clicks": int}
+
+    Returns:
+        int: Aantal nieuwe klikken sinds de vorige aanroep
+    """
+    if not isinstance(value, dict):
+        return 0
+
+    instance = value.get("instance")
+    clicks = int(value.get("clicks") or 0)
+    seen_instance, seen_clicks = st.session_state.get(SEEN_CLICKS_KEY, (None, 0))
+    if instance != seen_instance:
+        seen_clicks = 0
+
+    st.session_state[SEEN_CLICKS_KEY] = (instance, clicks)
+    return max(clicks - seen_clicks, 0)
+
+
+def robot_component(image_src, on_click=None, width=300,
+                    debounce_ms=ROBOT_CLICK_DEBOUNCE_MS, key=ROBOT_COMPONENT_KEY,
+                    on_value=None, **extra_args):
+    """
+    Rendert de klikbare robot en verwerkt de klikken die hij terugstuurt.
+
+    Args:
+        image_src (str): URL of data URI van de robot afbeelding
+        on_click (callable, optional): Callback die één keer per rerun wordt
+            aangeroepen met het aantal nieuwe klikken, vóór de volgende
+            (fragment-)rerun
+        width (int, optional): Breedte van de robot in pixels. Default is 300.
+        debounce_ms (int, optional): Venster waarin snelle klikken in de browser
+            worden samengevoegd. Default uit constants.py.
+        key (str, optional): Vaste widget key van de component
+        on_value (callable, optional): Callback die de ruwe waarde van de
+            component krijgt in plaats van de per-klik afhandeling van on_click
+            (gebruikt door de client-side quote modus)
+        **extra_args: Extra argumenten voor de frontend
+
+    Returns:
+        dict: De laatste waarde van de component, of None als er nog niet geklikt is
+    """
+    def handle_change():
+        value = st.session_state.get(key)
+        if on_value is not None:
+            on_value(value)
+            return
+        new_clicks = consume_new_clicks(value)
+        if on_click is not None and new_clicks:
+            on_click(new_clicks)
+
+    return _robot_component(
+        image_src=image_src,
+        width=width,
+        debounce_ms=debounce_ms,
+        key=key,
+        default=None,
+        on_change=handle_change,
+        **extra_args
+    )
@@ -5,16 +5,27 @@ Deze module verzorgt de weergave van de robot in de Streamlit applicatie
 en bevat functies voor het tonen en stylen van de robot afbeelding.
 """
 
-import os
-import base64
+import html
 import streamlit as st
-from constants import ROBOT_IMAGE_PATH, PRIMARY_COLOR
+import asset_registry
+import asset_build
+import client_quotes
+import click_analytics
+import state_backend
+import quote_session
+import styles
+from robot_component import robot_component
+from fragment_cache import get_fragment_cache
+from constants import ROBOT_IMAGE_PATH, PRIMARY_COLOR, ASSET_VARIANTS
 
 
 def get_base64_encoded_image(image_path):
     """
     Leest een afbeeldingsbestand en retourneert de base64-encoded versie.
     
+    Het bestand wordt via de asset registry maar één keer per proces ingelezen;
+    volgende aanroepen worden uit het geheugen beantwoord.
+    
     Args:
         image_path (str): Pad naar de afbeelding
         
@@ -22,119 +33,105 @@ def get_base64_encoded_image(image_path):
         str: Base64-encoded afbeelding string
     """
     try:
-        with open(image_path, "rb") as image_file:
-            encoded = base64.b64encode(image_file.read()).decode()
-            return encoded
+        return asset_registry.get_registry().get(image_path).base64
     except Exception as e:
         st.error(f"Fout bij het lezen van afbeelding: {str(e)}")
         return None
 
 
-def display_robot():
+def get_robot_src(width=300):
+    """
+    Geeft de <img src> van de robot voor een weergavebreedte.
+
+    Met ASSET_VARIANTS is dat de kleinste geschikte variant uit asset_build.py
+    (geminificeerde SVG of een raster van minstens die breedte); anders de
+    originele afbeelding uit de asset registry.
+
+    Args:
+        width (int, optional): Weergavebreedte in pixels. Default is 300.
+
+    Returns:
+        str: URL of data URI van de robot
+
+    Raises:
+        OSError: Als de afbeelding niet gelezen kan worden
+    """
+    if ASSET_VARIANTS:
+        return asset_build.get_variant_src(ROBOT_IMAGE_PATH, int(width))
+    return asset_registry.get_registry().get_image_src(ROBOT_IMAGE_PATH)
+
+
+def _default_click_handler(clicks=1):
+    """
+    Standaard klikactie: verhoogt de counter en kiest een nieuwe uitspraak.
+
+    Args:
+        clicks (int, optional): Aantal klikken dat samen binnenkwam. Default is 1.
+    """
+    decision = quote_session.admit_clicks(clicks)
+    if not decision.accepted:
+        return
+    st.session_state.click_count = st.session_state.get("click_count", 0) + decision.accepted
+    for _ in range(decision.applied):
+        quote_session.get_next_quote_with_state()
+    click_analytics.record_click(
+        st.session_state.quote_index, quote_session.current_session_id(), count=decision.accepted,
+        quote_id=st.session_state.get(quote_session.QUOTE_ID_KEY)
+    )
+    state_backend.persist_clicks(
+        st.session_state.quote_index, clicks=decision.accepted,
+        quote_id=st.session_state.get(quote_session.QUOTE_ID_KEY)
+    )
+
+
+def display_robot(on_click=None, client_mode=False):
     """
     Toont de robot afbeelding in de Streamlit app.
     
     Laadt de robot afbeelding uit het gespecificeerde pad in constants.py
     en geeft deze weer in het midden van de app met een hover-effect en klikfunctionaliteit.
+    De robot is een custom component (robot_component.py) die klikken direct
+    terugstuurt, zonder verborgen form of per klik wisselende widget keys.
+    
+    Args:
+        on_click (callable, optional): Callback die met het aantal nieuwe
+            klikken wordt uitgevoerd, vóór de volgende (fragment-)rerun. Default
+            verhoogt de click counter en kiest een nieuwe uitspraak.
+        client_mode (bool, optional): Laat de browser zelf de uitspraken roteren
+            en toont ze in de component (zie client_quotes.py). Default is False.
     
     Returns:
         bool: True als de robot succesvol is weergegeven, anders False
     """
     try:
-        # Controleer of het bestand bestaat
-        if not os.path.exists(ROBOT_IMAGE_PATH):
+        # Haal de robot op uit de asset cache (alleen de eerste keer van schijf).
+        # In de static modus is dit een korte, cachebare URL in plaats van de
+        # volledige base64 data URI.
+        try:
+            robot_src = get_robot_src()
+        except FileNotFoundError:
             st.error(f"Robot afbeelding niet gevonden op pad: {ROBOT_IMAGE_PATH}")
             return False
-        
-        # Haal de base64-encoded SVG op
-        encoded_image = get_base64_encoded_image(ROBOT_IMAGE_PATH)
-        if not encoded_image:
-            st.error("Kon de robotafbeelding niet inlezen")
+        except OSError as e:
+            st.error(f"Kon de robotafbeelding niet inlezen: {str(e)}")
             return False
         
-        # Genereer een unieke key voor de sessie
-        if 'robot_click_key' not in st.session_state:
-            st.session_state.robot_click_key = 0
-        
-        # CSS voor hover-effect
-        hover_css = f"""
-        <style>
-            .robot-container {{
-                display: flex;
-                justify-content: center;
-                margin: 20px auto;
-                width: 300px;
-                transition: transform 0.3s ease;
-            }}
-            .robot-container:hover {{
-                transform: scale(1.05);
-                cursor: pointer;
-            }}
-            .robot-container img {{
-                max-width: 100%;
-                border-radius: 10px;
-            }}
-            /* Verberg de submit knop */
-            .robot-click-form .stButton {{
-                display: none;
-            }}
-        </style>
-        """
-        st.markdown(hover_css, unsafe_allow_html=True)
-        
         # Container voor centreren en opmaak
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col2:
-            # JavaScript om de form te submitten wanneer op de robot wordt geklikt
-            javascript = f"""
-            <script>
-                document.addEventListener('DOMContentLoaded', function() {{
-                    const robotContainer = document.querySelector('.robot-container');
-                    const robotForm = document.querySelector('.robot-click-form form');
-                    
-                    if (robotContainer && robotForm) {{
-                        robotContainer.addEventListener('click', function() {{
-                            const submitButton = robotForm.querySelector('button[type="submit"]');
-                            if (submitButton) {{
-                                submitButton.click();
-                            }}
-                        }});
-                    }}
-                }});
-            </script>
-            """
-            st.markdown(javascript, unsafe_allow_html=True)
-            
-            # Toon de robot afbeelding in HTML om hover-effect mogelijk te maken
-            # Gebruik data URI voor de afbeelding
-            st.markdown(
-                f"""
-                <div class="robot-container">
-                    <img src="data:image/svg+xml;base64,{encoded_image}" alt="GitHub Agent Robot">
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
-
-            # Onzichtbare form die wordt gesubmit wanneer op de robot wordt geklikt
-            with st.form(key=f"robot_click_form_{st.session_state.robot_click_key}", clear_on_submit=False):
-                st.form_submit_button("Robot Klik", type="primary", use_container_width=True, 
-                                     on_click=lambda: st.session_state.update({"robot_was_clicked": True}))
-        
-        # Check of er geklikt is op de robot sinds laatste render
-        if st.session_state.get("robot_was_clicked", False):
-            # Reset de robot_was_clicked flag
-            st.session_state.robot_was_clicked = False
-            
-            # Verhoog de robot_click_key voor de volgende keer
-            st.session_state.robot_click_key += 1
-            
-            # Voer de klikactie uit zoals gedefinieerd in app.py
-            import quote_generator
-            st.session_state.click_count += 1
-            st.session_state.current_quote = quote_generator.get_next_quote_with_state()
-            st.rerun()
+            if client_mode:
+                # De browser kiest de uitspraken zelf en meldt klikken in batches
+                css, _ = styles.get_style_bundle()
+                robot_component(
+                    robot_src,
+                    on_value=client_quotes.apply_client_sync,
+                    **client_quotes.build_component_args(css)
+                )
+            else:
+                # Klikbare robot als custom component met vaste key: klikken komen
+                # direct terug en snelle klikken worden in de browser samengevoegd
+                robot_component(robot_src, on_click=on_click or _default_click_handler)
         
         return True
         
@@ -147,26 +144,34 @@ def get_robot_html(width=300):
     """
     Genereert HTML voor de robot afbeelding met aangepaste breedte.
     
+    Per breedte wordt de kleinste geschikte variant van de robot gekozen. Het
+    fragment wordt per (breedte, afbeelding) één keer opgebouwd en daarna uit
+    de fragment cache gehaald; een gewijzigde afbeelding krijgt een nieuwe src
+    en daarmee een nieuw fragment.
+    
     Args:
         width (int): Breedte van de robot afbeelding in pixels
         
     Returns:
         str: HTML code voor het weergeven van de robot
     """
-    # Controleer of het bestand bestaat
-    if not os.path.exists(ROBOT_IMAGE_PATH):
+    # Haal de robot op uit de asset cache (alleen de eerste keer van schijf)
+    try:
+        robot_src = get_robot_src(width)
+    except FileNotFoundError:
         return f"<div>Robot afbeelding niet gevonden op pad: {ROBOT_IMAGE_PATH}</div>"
-    
-    # Haal de base64-encoded SVG op
-    encoded_image = get_base64_encoded_image(ROBOT_IMAGE_PATH)
-    if not encoded_image:
+    except OSError:
         return "<div>Kon de robotafbeelding niet inlezen</div>"
     
-    return f"""
+    width = int(width)
+    return get_fragment_cache().get_or_render(
+        ("robot", width, robot_src),
+        lambda: f"""
     <div class="robot-container" style="width: {width}px;">
-        <img src="data:image/svg+xml;base64,{encoded_image}" alt="GitHub Agent Robot">
+        <img src="{html.escape(robot_src)}" alt="GitHub Agent Robot">
     </div>
     """
+    )
 
 
 # Voor standalone test
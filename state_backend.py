@@ -0,0 +1,819 @@
+"""
+State Backend Module voor Stan de GitHub Agent.
+
+Deze module maakt het mogelijk om meerdere `streamlit run app.py` processen
+achter een load balancer te draaien zonder sticky sessions. De click counter
+en de quote cursor van een sessie (en globale tellers) worden dan niet alleen
+in st.session_state bewaard, maar ook in een gedeelde backend:
+
+- "session": alleen st.session_state (standaard, geen gedeelde staat)
+- "memory": procesbrede dict; overleeft het herladen van de pagina binnen één proces
+- "sqlite": SQLite bestand, gedeeld door alle processen op één host
+- "redis": elke server die het Redis protocol (RESP) spreekt; voor tests
+  kan FakeRedisServer uit deze module die rol overnemen
+
+Een browsersessie wordt herkend aan een willekeurig id in de query parameters
+(STATE_SESSION_PARAM), zodat een ander proces dezelfde staat kan ophalen. Een
+klik kost precies één round trip: alle bewerkingen gaan in één transactie
+(SQLite) of één pipeline (Redis).
+
+De backends zelf gebruiken geen Streamlit; alleen de sessiefuncties onderaan
+importeren het bij gebruik.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import select
+import socket
+import logging
+import sqlite3
+import threading
+import socketserver
+from urllib.parse import urlparse
+from constants import (
+    STATE_BACKEND,
+    STATE_SQLITE_PATH,
+    STATE_REDIS_URL,
+    STATE_TTL,
+    STATE_SESSION_PARAM
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Sessie-state sleutels
+SESSION_KEY_KEY = "state_session_key"
+RESTORED_STATE_KEY = "state_restored"
+
+# Vorm van een geldig sessie-id in de URL
+_SESSION_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# Aantal updates tussen twee opruimrondes van verlopen sessies (SQLite)
+SQLITE_CLEANUP_EVERY = 1000
+
+
+class StateBackendError(Exception):
+    """Fout bij het lezen of schrijven van de gedeelde staat."""
+
+
+class StateBackend:
+    """
+    Basisklasse voor een backend met per sessie een set integer velden.
+
+    Een veld met de waarde None wordt verwijderd; een ontbrekend veld betekent
+    "niet ingesteld". Een waarde mag ook een str zijn, mits die niet als getal
+    te lezen is (SQLite en Redis maken van "12" weer een int); persist_clicks
+    slaat het quote id daarom als JSON string op.
+    """
+
+    def load(self, session_key):
+        """
+        Haalt de velden van een sessie op.
+
+        Args:
+            session_key (str): Id van de sessie
+
+        Returns:
+            dict: Veldnaam naar int of str (leeg voor een onbekende of verlopen sessie)
+        """
+        raise NotImplementedError
+
+    def update(self, session_key, increments=None, values=None, global_increments=None):
+        """
+        Werkt een sessie (en globale tellers) in één bewerking bij.
+
+        Args:
+            session_key (str): Id van de sessie
+            increments (dict, optional): Veldnaam naar ophoging
+            values (dict, optional): Veldnaam naar nieuwe waarde (None = verwijderen)
+            global_increments (dict, optional): Naam van een globale teller naar ophoging
+
+        Returns:
+            dict: De velden van de sessie na de update
+        """
+        raise NotImplementedError
+
+    def delete(self, session_key):
+        """Verwijdert alle velden van een sessie."""
+        raise NotImplementedError
+
+    def get_global(self, name):
+        """Geeft de waarde van een globale teller (0 als hij niet bestaat)."""
+        raise NotImplementedError
+
+    def close(self):
+        """Sluit eventuele verbindingen."""
+
+
+def _field_value(value):
+    """Geeft een veldwaarde als int, of als str als hij geen geheel getal is."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return int(value)
+
+
+class InMemoryStateBackend(StateBackend):
+    """Backend in het geheugen van het proces (één host, één proces)."""
+
+    def __init__(self, ttl=STATE_TTL):
+        self.ttl = ttl
+        self._sessions = {}
+        self._globals = {}
+        self._lock = threading.Lock()
+
+    def _fields(self, session_key, now):
+        entry = self._sessions.get(session_key)
+        if entry is None or entry[1] < now:
+            return None
+        return entry[0]
+
+    def load(self, session_key):
+        with self._lock:
+            return dict(self._fields(session_key, time.time()) or {})
+
+    def update(self, session_key, increments=None, values=None, global_increments=None):
+        now = time.time()
+        with self._lock:
+            fields = self._fields(session_key, now)
+            if fields is None:
+                fields = {}
+            for name, amount in (increments or {}).items():
+                fields[name] = fields.get(name, 0) + amount
+            for name, value in (values or {}).items():
+                if value is None:
+                    fields.pop(name, None)
+                else:
+                    fields[name] = _field_value(value)
+            self._sessions[session_key] = (fields, now + self.ttl)
+            for name, amount in (global_increments or {}).items():
+                self._globals[name] = self._globals.get(name, 0) + amount
+            return dict(fields)
+
+    def delete(self, session_key):
+        with self._lock:
+            self._sessions.pop(session_key, None)
+
+    def get_global(self, name):
+        with self._lock:
+            return self._globals.get(name, 0)
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Backend in een SQLite bestand, gedeeld door alle processen op één host.
+
+    Het proces gebruikt één verbinding, beschermd door een lock: Streamlit
+    draait elke rerun in een eigen thread, dus een verbinding per thread zou
+    bij bijna elke rerun een nieuwe verbinding openen (en nooit sluiten). Een
+    update is één transactie.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS session_fields (
+        session_key TEXT NOT NULL,
+        field TEXT NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (session_key, field)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS session_expiry (
+        session_key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS global_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, path=STATE_SQLITE_PATH, ttl=STATE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._updates = 0
+        self._lock = threading.Lock()
+        self._connection_handle = None
+        self._connection_pid = None
+        with self._lock:
+            self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        """Geeft de verbinding van het proces (aanroeper houdt self._lock)."""
+        if self._connection_handle is None or self._connection_pid != os.getpid():
+            # Na een fork hoort de verbinding bij de ouder: open een nieuwe
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection_handle = connection
+            self._connection_pid = os.getpid()
+        return self._connection_handle
+
+    def load(self, session_key):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT field, value FROM session_fields WHERE session_key = ? AND EXISTS ("
+                "SELECT 1 FROM session_expiry WHERE session_key = ? AND expires_at >= ?)",
+                (session_key, session_key, time.time())
+            ).fetchall()
+        return dict(rows)
+
+    def update(self, session_key, increments=None, values=None, global_increments=None):
+        with self._lock:
+            return self._update(self._connection(), session_key, increments, values, global_increments)
+
+    def _update(self, connection, session_key, increments, values, global_increments):
+        """Voert een update uit in één transactie (aanroeper houdt self._lock)."""
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Een verlopen sessie begint leeg
+            expired = connection.execute(
+                "SELECT 1 FROM session_expiry WHERE session_key = ? AND expires_at < ?",
+                (session_key, now)
+            ).fetchone()
+            if expired:
+                connection.execute("DELETE FROM session_fields WHERE session_key = ?", (session_key,))
+
+            connection.executemany(
+                "INSERT INTO session_fields (session_key, field, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_key, field) DO UPDATE SET value = value + excluded.value",
+                [(session_key, name, amount) for name, amount in (increments or {}).items()]
+            )
+            for name, value in (values or {}).items():
+                if value is None:
+                    connection.execute(
+                        "DELETE FROM session_fields WHERE session_key = ? AND field = ?", (session_key, name)
+                    )
+                else:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO session_fields (session_key, field, value) VALUES (?, ?, ?)",
+                        (session_key, name, _field_value(value))
+                    )
+            connection.execute(
+                "INSERT OR REPLACE INTO session_expiry (session_key, expires_at) VALUES (?, ?)",
+                (session_key, now + self.ttl)
+            )
+            connection.executemany(
+                "INSERT INTO global_counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                list((global_increments or {}).items())
+            )
+
+            self._updates += 1
+            if self._updates % SQLITE_CLEANUP_EVERY == 0:
+                self._cleanup(connection, now)
+
+            rows = connection.execute(
+                "SELECT field, value FROM session_fields WHERE session_key = ?", (session_key,)
+            ).fetchall()
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return dict(rows)
+
+    def _cleanup(self, connection, now):
+        """Verwijdert verlopen sessies."""
+        connection.execute(
+            "DELETE FROM session_fields WHERE session_key IN ("
+            "SELECT session_key FROM session_expiry WHERE expires_at < ?)", (now,)
+        )
+        connection.execute("DELETE FROM session_expiry WHERE expires_at < ?", (now,))
+
+    def delete(self, session_key):
+        with self._lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM session_fields WHERE session_key = ?", (session_key,))
+                connection.execute("DELETE FROM session_expiry WHERE session_key = ?", (session_key,))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    def get_global(self, name):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM global_counters WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        with self._lock:
+            if self._connection_handle is not None:
+                self._connection_handle.close()
+                self._connection_handle = None
+
+
+def _encode_command(*args):
+    """Codeert één commando als RESP array van bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    """Leest één RESP antwoord van een bestandsachtig object."""
+    line = reader.readline()
+    if not line:
+        raise StateBackendError("Verbinding met de Redis server verbroken")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode("utf-8")
+    if kind == b"-":
+        return StateBackendError(payload.decode("utf-8"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2].decode("utf-8")
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [_read_reply(reader) for _ in range(length)]
+    raise StateBackendError(f"Onverwacht Redis antwoord: {line!r}")
+
+
+class RespConnection:
+    """
+    Minimale client voor het Redis protocol (RESP2) met pipelining.
+
+    Args:
+        host (str): Hostnaam van de server
+        port (int): Poort van de server
+        db (int, optional): Database nummer
+        timeout (float, optional): Socket timeout in seconden
+    """
+
+    def __init__(self, host, port, db=0, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._socket = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+        if self.db:
+            self._send([("SELECT", self.db)])
+
+    def _send(self, commands):
+        self._socket.sendall(b"".join(_encode_command(*command) for command in commands))
+        return [_read_reply(self._reader) for _ in commands]
+
+    def _is_stale(self):
+        """Geeft True als de server de verbinding al heeft gesloten (of ongevraagd iets stuurde)."""
+        try:
+            readable, _, _ = select.select([self._socket], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def pipeline(self, commands, idempotent=False):
+        """
+        Stuurt alle commando's in één keer en leest daarna alle antwoorden.
+
+        Een verbinding die de server al heeft gesloten wordt vóór het sturen
+        vervangen. Mislukt het sturen daarna nog, dan wordt één keer opnieuw
+        verbonden, maar alleen als er nog geen byte van de commando's weg is:
+        anders kan de server ze al hebben uitgevoerd en zou een herhaalde
+        HINCRBY/INCRBY dubbel tellen. Commando's die herhaald mogen worden
+        (lezen, verwijderen) geven idempotent=True mee.
+
+        Args:
+            commands (list): Lijst met tuples (commando, argumenten...)
+            idempotent (bool, optional): De commando's mogen ook na een fout
+                tijdens het sturen of lezen opnieuw worden gestuurd
+
+        Returns:
+            list: De antwoorden, in dezelfde volgorde
+        """
+        payload = b"".join(_encode_command(*command) for command in commands)
+        with self._lock:
+            for attempt in range(2):
+                written = 0
+                try:
+                    if self._socket is not None and self._is_stale():
+                        self.close()
+                    if self._socket is None:
+                        self._connect()
+                    while written < len(payload):
+                        written += self._socket.send(payload[written:])
+                    replies = [_read_reply(self._reader) for _ in commands]
+                    break
+                except (OSError, StateBackendError):
+                    self.close()
+                    if attempt or (written and not idempotent):
+                        raise
+        for reply in replies:
+            if isinstance(reply, StateBackendError):
+                raise reply
+        return replies
+
+    def close(self):
+        """Sluit de verbinding."""
+        if self._socket is not None:
+            try:
+                self._reader.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._reader = None
+
+
+class RedisStateBackend(StateBackend):
+    """
+    Backend in een Redis (of compatibele) server, gedeeld door alle hosts.
+
+    Een sessie is een hash "stan:session:<id>" met een TTL; globale tellers
+    zijn "stan:global:<naam>". Een update is één MULTI/EXEC pipeline.
+    """
+
+    def __init__(self, url=STATE_REDIS_URL, ttl=STATE_TTL):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self._connection = RespConnection(parsed.hostname or "127.0.0.1", parsed.port or 6379, db)
+
+    @staticmethod
+    def _session_name(session_key):
+        return f"stan:session:{session_key}"
+
+    @staticmethod
+    def _to_fields(flat):
+        """Zet een HGETALL antwoord om naar een dict met ints (en str voor tekstvelden)."""
+        flat = flat or []
+        return {flat[i]: _field_value(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+    def load(self, session_key):
+        return self._to_fields(
+            self._connection.pipeline([("HGETALL", self._session_name(session_key))], idempotent=True)[0]
+        )
+
+    def update(self, session_key, increments=None, values=None, global_increments=None):
+        name = self._session_name(session_key)
+        commands = [("MULTI",)]
+        commands += [("HINCRBY", name, field, amount) for field, amount in (increments or {}).items()]
+        to_set = [(field, _field_value(value)) for field, value in (values or {}).items() if value is not None]
+        to_delete = [field for field, value in (values or {}).items() if value is None]
+        if to_set:
+            commands.append(("HSET", name) + tuple(part for pair in to_set for part in pair))
+        if to_delete:
+            commands.append(("HDEL", name) + tuple(to_delete))
+        commands.append(("EXPIRE", name, int(self.ttl)))
+        commands += [("INCRBY", f"stan:global:{counter}", amount)
+                     for counter, amount in (global_increments or {}).items()]
+        commands.append(("HGETALL", name))
+        commands.append(("EXEC",))
+
+        results = self._connection.pipeline(commands)[-1]
+        if results is None:
+            raise StateBackendError("Redis transactie afgebroken")
+        for result in results:
+            if isinstance(result, StateBackendError):
+                raise result
+        return self._to_fields(results[-1])
+
+    def delete(self, session_key):
+        self._connection.pipeline([("DEL", self._session_name(session_key))], idempotent=True)
+
+    def get_global(self, name):
+        value = self._connection.pipeline([("GET", f"stan:global:{name}")], idempotent=True)[0]
+        return int(value) if value is not None else 0
+
+    def close(self):
+        self._connection.close()
+
+
+class FakeRedisServer:
+    """
+    Kleine Redis-compatibele server in het geheugen, voor tests en demo's.
+
+    Ondersteunt alleen de commando's die RedisStateBackend gebruikt. Start met
+    `start()`; het adres staat daarna in `url`. Met `drop_exec_replies` sluit
+    de server na zoveel uitgevoerde transacties de verbinding zonder te
+    antwoorden, om een verbinding na te bootsen die halverwege wegvalt.
+
+    Args:
+        host (str, optional): Adres om op te luisteren
+        port (int, optional): Poort (0 = een vrije poort)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+        self.drop_exec_replies = 0
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def handle(self):
+                queued = None
+                while True:
+                    try:
+                        command = _read_reply(self.rfile)
+                    except StateBackendError:
+                        return
+                    name = command[0].upper()
+                    if name == "MULTI":
+                        queued = []
+                        reply = "OK"
+                    elif name == "EXEC":
+                        with fake._lock:
+                            reply = [fake._execute(queued_command) for queued_command in (queued or [])]
+                            dropped = fake.drop_exec_replies > 0
+                            if dropped:
+                                fake.drop_exec_replies -= 1
+                        if dropped:
+                            return
+                        queued = None
+                    elif queued is not None:
+                        queued.append(command)
+                        reply = "QUEUED"
+                    else:
+                        with fake._lock:
+                            reply = fake._execute(command)
+                    self.wfile.write(FakeRedisServer._encode_reply(reply))
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"redis://{host}:{self._server.server_address[1]}/0"
+
+    @staticmethod
+    def _encode_reply(reply):
+        if isinstance(reply, StateBackendError):
+            return b"-%s\r\n" % str(reply).encode("utf-8")
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(FakeRedisServer._encode_reply(item) for item in reply)
+        if reply in ("OK", "QUEUED", "PONG"):
+            return b"+%s\r\n" % reply.encode("utf-8")
+        data = str(reply).encode("utf-8")
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _get(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline < time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _execute(self, command):
+        name, args = command[0].upper(), command[1:]
+        if name == "PING":
+            return "PONG"
+        if name == "SELECT":
+            return "OK"
+        if name == "HGETALL":
+            fields = self._get(args[0]) or {}
+            return [part for pair in fields.items() for part in pair]
+        if name == "HINCRBY":
+            fields = self._get(args[0]) or self._data.setdefault(args[0], {})
+            fields[args[1]] = str(int(fields.get(args[1], 0)) + int(args[2]))
+            return int(fields[args[1]])
+        if name == "HSET":
+            fields = self._get(args[0]) or self._data.setdefault(args[0], {})
+            new = sum(1 for field in args[1::2] if field not in fields)
+            fields.update(zip(args[1::2], args[2::2]))
+            return new
+        if name == "HDEL":
+            fields = self._get(args[0]) or {}
+            return sum(1 for field in args[1:] if fields.pop(field, None) is not None)
+        if name == "EXPIRE":
+            if self._get(args[0]) is None:
+                return 0
+            self._expires[args[0]] = time.time() + int(args[1])
+            return 1
+        if name == "DEL":
+            removed = sum(1 for key in args if self._data.pop(key, None) is not None)
+            for key in args:
+                self._expires.pop(key, None)
+            return removed
+        if name == "GET":
+            return self._get(args[0])
+        if name == "INCRBY":
+            self._data[args[0]] = str(int(self._get(args[0]) or 0) + int(args[1]))
+            return int(self._data[args[0]])
+        return StateBackendError(f"ERR unknown command '{name}'")
+
+    def start(self):
+        """Start de server in een achtergrondthread."""
+        threading.Thread(target=self._server.serve_forever, name="stan-fake-redis", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stopt de server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def create_state_backend(kind=STATE_BACKEND):
+    """
+    Maakt de backend van het gevraagde type.
+
+    Args:
+        kind (str, optional): "session", "memory", "sqlite" of "redis"
+
+    Returns:
+        StateBackend: De backend, of None voor "session" (alleen st.session_state)
+    """
+    if kind == "session":
+        return None
+    if kind == "memory":
+        return InMemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend()
+    if kind == "redis":
+        return RedisStateBackend()
+    raise ValueError(f"Onbekende state backend: {kind}")
+
+
+# Eén backend per proces, gedeeld door alle sessies
+_backend = None
+_backend_created = False
+_backend_lock = threading.Lock()
+
+
+def get_state_backend():
+    """
+    Geeft de backend van het proces terug en maakt hem bij de eerste aanroep.
+
+    Returns:
+        StateBackend: De gedeelde backend, of None als alleen st.session_state wordt gebruikt
+    """
+    global _backend, _backend_created
+    if not _backend_created:
+        with _backend_lock:
+            if not _backend_created:
+                _backend = create_state_backend()
+                _backend_created = True
+    return _backend
+
+
+def session_key():
+    """
+    Geeft het id waarmee de browsersessie in de backend staat.
+
+    Het id staat in de query parameters van de URL, zodat een ander proces
+    achter de load balancer (of hetzelfde proces na een herstart) dezelfde
+    sessie herkent.
+
+    Returns:
+        str: Het sessie-id
+    """
+    import streamlit as st
+    key = st.session_state.get(SESSION_KEY_KEY)
+    if key is None:
+        key = st.query_params.get(STATE_SESSION_PARAM)
+        if not key or not _SESSION_ID_PATTERN.fullmatch(key):
+            key = uuid.uuid4().hex
+            st.query_params[STATE_SESSION_PARAM] = key
+        st.session_state[SESSION_KEY_KEY] = key
+    return key
+
+
+def get_restored_state():
+    """
+    Haalt één keer per sessie de bewaarde staat uit de backend op.
+
+    Returns:
+        dict: Bewaarde velden (bijv. click_count, quote_index en quote_id), of een lege dict
+    """
+    backend = get_state_backend()
+    if backend is None:
+        return {}
+    import streamlit as st
+    if RESTORED_STATE_KEY not in st.session_state:
+        try:
+            fields = backend.load(session_key())
+        except (OSError, StateBackendError, sqlite3.Error) as e:
+            # Zonder backend werkt de app gewoon verder met een lege sessie
+            logger.warning("Kon de sessie niet uit de state backend laden: %s", e)
+            fields = {}
+        if "quote_id" in fields:
+            try:
+                fields["quote_id"] = json.loads(fields["quote_id"])
+            except (TypeError, ValueError):
+                fields.pop("quote_id")
+        st.session_state[RESTORED_STATE_KEY] = fields
+    return st.session_state[RESTORED_STATE_KEY]
+
+
+def persist_clicks(quote_index, clicks=1, quote_id=None):
+    """
+    Schrijft klikken en de nieuwe quote cursor in één round trip weg.
+
+    Naast de index wordt het stabiele id van de uitspraak bewaard, zodat een
+    hersteld bezoek na een herladen catalogus (of in een proces met een andere
+    versie van de catalogus) dezelfde uitspraak terugvindt.
+
+    Args:
+        quote_index (int): Index van de getoonde uitspraak
+        clicks (int, optional): Aantal nieuwe klikken
+        quote_id (str, optional): Stabiel id van de uitspraak (quote_store.record_id)
+
+    Returns:
+        int: Het totaal aantal klikken van de sessie volgens de backend, of
+            None als er geen backend is of het wegschrijven mislukt
+    """
+    backend = get_state_backend()
+    if backend is None:
+        return None
+    try:
+        fields = backend.update(
+            session_key(),
+            increments={"click_count": clicks} if clicks else None,
+            values={
+                "quote_index": quote_index,
+                # Als JSON string, zodat een id als "12" niet als getal terugkomt
+                "quote_id": json.dumps(quote_id) if quote_id is not None else None,
+            },
+            global_increments={"clicks": clicks} if clicks else None
+        )
+    except (OSError, StateBackendError, sqlite3.Error) as e:
+        logger.warning("Kon de klik niet in de state backend opslaan: %s", e)
+        return None
+    return fields.get("click_count", 0)
+
+
+def reset_persisted_state():
+    """Verwijdert de bewaarde staat van de huidige sessie."""
+    backend = get_state_backend()
+    if backend is None:
+        return
+    try:
+        backend.delete(session_key())
+    except (OSError, StateBackendError, sqlite3.Error) as e:
+        logger.warning("Kon de sessie niet uit de state backend verwijderen: %s", e)
+
+
+# Voor standalone test
+if __name__ == "__main__":
+    import tempfile
+
+    print("State Backend Test\n")
+    fake_server = FakeRedisServer().start()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        backends = {
+            "memory": InMemoryStateBackend(),
+            "sqlite": SQLiteStateBackend(os.path.join(temp_dir, "state.sqlite")),
+            "redis": RedisStateBackend(fake_server.url),
+        }
+        for name, backend in backends.items():
+            for index in (3, 7, 5):
+                fields = backend.update("sessie", {"click_count": 1}, {"quote_index": index}, {"clicks": 1})
+            assert backend.load("sessie") == {"click_count": 3, "quote_index": 5}
+            backend.update("sessie", values={"quote_id": json.dumps("12")})
+            assert json.loads(backend.load("sessie")["quote_id"]) == "12"
+            backend.update("sessie", values={"quote_index": None})
+            assert "quote_index" not in backend.load("sessie")
+            backend.delete("sessie")
+            assert backend.load("sessie") == {}
+
+            start = time.perf_counter()
+            for _ in range(1000):
+                backend.update("bench", {"click_count": 1}, {"quote_index": 1}, {"clicks": 1})
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{name}: globale klikken {backend.get_global('clicks')}, {elapsed / 1000:.3f} ms per klik")
+            backend.close()
+
+        # Redis: een door de server gesloten verbinding wordt vóór het sturen vervangen,
+        # maar een transactie die al weg is wordt niet herhaald (geen dubbele klik)
+        backend = RedisStateBackend(fake_server.url)
+        backend.update("retry", {"click_count": 1})
+        backend._connection._socket.shutdown(socket.SHUT_RD)
+        assert backend.update("retry", {"click_count": 1}) == {"click_count": 2}
+        fake_server.drop_exec_replies = 1
+        try:
+            backend.update("retry", {"click_count": 1})
+            raise AssertionError("update zonder antwoord had moeten mislukken")
+        except (OSError, StateBackendError):
+            pass
+        assert backend.load("retry") == {"click_count": 3}
+        print(f"redis: verbroken verbinding, klikken {backend.load('retry')['click_count']} (geen dubbele telling)")
+        backend.close()
+    fake_server.stop()
@@ -0,0 +1,123 @@
+"""
+Static Server Module voor Stan de GitHub Agent.
+
+Kleine companion server die de gepubliceerde assets uit de static directory
+serveert met lange cache headers. Streamlit's eigen static file serving stuurt
+alleen een ETag mee; omdat onze bestandsnamen een content-hash bevatten, kunnen
+ze veilig als "immutable" worden gemarkeerd zodat de browser ze nooit opnieuw
+hoeft op te vragen. Staat er naast een bestand een voorgecomprimeerde versie
+(`.br` of `.gz`, gemaakt door asset_build.py) en accepteert de browser die
+encoding, dan wordt die versie geserveerd.
+
+Gebruik:
+    python static_server.py --port 8502
+    STAN_STATIC_URL_PREFIX=http://localhost:8502 streamlit run app.py
+"""
+
+import os
+import re
+import argparse
+import mimetypes
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from constants import STATIC_DIR
+
+
+# Bestandsnamen zoals gepubliceerd door asset_registry: <naam>.<16 hex>.<ext>
+HASHED_NAME_PATTERN = re.compile(r"^[\w-]+\.([0-9a-f]{16})\.\w+$")
+
+# Eén jaar, de gangbare maximale waarde voor immutable assets
+IMMUTABLE_MAX_AGE = 31536000
+
+# Voorgecomprimeerde varianten in volgorde van voorkeur: (Content-Encoding, extensie)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class ImmutableAssetHandler(SimpleHTTPRequestHandler):
+    """
+    Request handler die content-hashed bestanden met ETag en een
+    "immutable" Cache-Control header serveert.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=STATIC_DIR, **kwargs)
+
+    def _content_hash(self):
+        """Geeft de content-hash uit de opgevraagde bestandsnaam, of None."""
+        match = HASHED_NAME_PATTERN.match(os.path.basename(self.path.split("?")[0]))
+        return match.group(1) if match else None
+
+    def send_head(self):
+        # Een geldige ETag betekent dat de browser het bestand al heeft
+        content_hash = self._content_hash()
+        if content_hash is not None:
+            etag = f'"{content_hash}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return None
+            precompressed = self._send_precompressed()
+            if precompressed is not None:
+                return precompressed
+        return super().send_head()
+
+    def _send_precompressed(self):
+        """
+        Stuurt de headers voor een voorgecomprimeerde versie van het bestand.
+
+        Returns:
+            file: Het geopende bestand, of None als er geen geschikte versie is
+        """
+        path = self.translate_path(self.path)
+        accepted = {
+            part.split(";")[0].strip() for part in self.headers.get("Accept-Encoding", "").split(",")
+        }
+        for encoding, extension in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted or not os.path.isfile(path + extension):
+                continue
+            compressed_file = open(path + extension, "rb")
+            self.send_response(200)
+            self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(os.fstat(compressed_file.fileno()).st_size))
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return compressed_file
+        return None
+
+    def end_headers(self):
+        # Alleen content-hashed bestanden zijn onveranderlijk; de rest altijd revalideren
+        content_hash = self._content_hash()
+        if content_hash is not None:
+            self.send_header("ETag", f'"{content_hash}"')
+            self.send_header("Cache-Control", f"public, max-age={IMMUTABLE_MAX_AGE}, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        super().end_headers()
+
+
+def run_server(host="127.0.0.1", port=8502):
+    """
+    Start de static server en blijft draaien tot hij wordt onderbroken.
+
+    Args:
+        host (str, optional): Adres om op te luisteren. Default is 127.0.0.1.
+        port (int, optional): Poort om op te luisteren. Default is 8502.
+    """
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    server = ThreadingHTTPServer((host, port), ImmutableAssetHandler)
+    print(f"Static assets uit {STATIC_DIR} op http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveer Stan's assets met immutable cache headers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    arguments = parser.parse_args()
+    run_server(arguments.host, arguments.port)
@@ -3,30 +3,49 @@ Styles Module voor Stan de GitHub Agent.
 
 Deze module is verantwoordelijk voor het definiëren en laden van CSS-stijlen
 die de visuele presentatie van de Streamlit applicatie verbeteren.
+
+Alle stijlen worden één keer per proces samengevoegd tot een geminificeerde
+bundle met een content-hash. Die bundle wordt per browsersessie maar één keer
+in de pagina geïnjecteerd, zodat een rerun geen CSS meer hoeft mee te sturen.
+
+Alleen apply_styles() heeft Streamlit nodig en importeert het bij gebruik; de
+overige functies zijn pure string-bewerkingen.
 """
 
-import streamlit as st
+import re
+import html
+import json
+import hashlib
+import functools
+from fragment_cache import get_fragment_cache
 from constants import (
     PRIMARY_COLOR, 
     SECONDARY_COLOR, 
     BACKGROUND_COLOR, 
-    TEXT_COLOR
+    TEXT_COLOR,
+    STYLE_INJECTION_MODE,
+    QUOTE_DISPLAY_MODE,
+    TYPEWRITER_CHAR_MS,
+    TYPEWRITER_MAX_MS
 )
 
 
-def load_styles():
+# Sessie-state sleutel waarin de hash van de geïnjecteerde bundle staat
+INJECTED_BUNDLE_KEY = "style_bundle_hash"
+
+
+def build_css():
     """
-    Laadt CSS-stijlen voor de Streamlit applicatie.
+    Bouwt de volledige, nog niet geminificeerde CSS voor de applicatie.
     
-    Genereert en retourneert een CSS-string met stijlen die de visuele presentatie
-    van de applicatie verbeteren, inclusief headers, containers en quote weergave.
+    Bevat de stijlen voor headers, containers en quote weergave, plus de
+    robot stijlen die voorheen apart door robot_display.py werden geïnjecteerd.
     
     Returns:
-        str: CSS-code die in Streamlit kan worden geladen via st.markdown()
+        str: CSS-code zonder <style> tags
     """
     # Basis CSS-stijlen voor de hele applicatie
     css = f"""
-    <style>
         /* Algemene pagina styling */
         .reportview-container .main .block-container {{
             padding-top: 2rem;
@@ -79,13 +98,22 @@ def load_styles():
             color: {TEXT_COLOR};
         }}
         
-        /* Robot container stijlen (aanvullend op robot_display.py) */
+        /* Robot container stijlen (voor get_robot_html; de klikbare robot
+           component heeft zijn eigen stijlen) */
         .robot-container {{
-            transition: all 0.3s ease !important;
-            cursor: pointer !important;
+            display: flex;
+            justify-content: center;
+            margin: 20px auto;
+            width: 300px;
+            cursor: pointer;
+            transition: transform 0.3s ease;
         }}
         .robot-container:hover {{
-            transform: scale(1.05) !important;
+            transform: scale(1.05);
+        }}
+        .robot-container img {{
+            max-width: 100%;
+            border-radius: 10px;
         }}
         
         /* Button stijlen */
@@ -113,6 +141,21 @@ def load_styles():
             animation: fadeIn 0.5s ease-out;
         }}
         
+        /* Typemachine: elk woord verschijnt na zijn eigen animation-delay */
+        @keyframes typeIn {{
+            to {{ opacity: 1; }}
+        }}
+        .quote-text.typewriter .tw-word {{
+            opacity: 0;
+            animation: typeIn 0.05s linear forwards;
+        }}
+        @media (prefers-reduced-motion: reduce) {{
+            .quote-text.typewriter .tw-word {{
+                opacity: 1;
+                animation: none;
+            }}
+        }}
+        
         /* Responsieve aanpassingen */
         @media screen and (max-width: 640px) {{
             h1 {{
@@ -122,26 +165,171 @@ def load_styles():
                 font-size: 1rem;
             }}
         }}
-    </style>
     """
     return css
 
 
+def minify_css(css):
+    """
+    Verwijdert commentaar en overbodige witruimte uit CSS.
+    
+    Args:
+        css (str): De te minificeren CSS-code
+        
+    Returns:
+        str: Geminificeerde CSS-code
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+@functools.lru_cache(maxsize=1)
+def get_style_bundle():
+    """
+    Geeft de geminificeerde stylesheet en zijn content-hash terug.
+    
+    De bundle wordt één keer per proces berekend uit de kleuren in constants.py.
+    
+    Returns:
+        tuple: (str, str) De geminificeerde CSS en de verkorte SHA-256 hash
+    """
+    css = minify_css(build_css())
+    return css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:16]
+
+
+def load_styles():
+    """
+    Laadt CSS-stijlen voor de Streamlit applicatie.
+    
+    Retourneert de geminificeerde bundle verpakt in <style> tags.
+    
+    Returns:
+        str: CSS-code die in Streamlit kan worden geladen via st.markdown()
+    """
+    css, bundle_hash = get_style_bundle()
+    return f'<style data-stan-bundle="{bundle_hash}">{css}</style>'
+
+
+def _injection_script(css, bundle_hash):
+    """
+    Genereert het script dat de bundle in de <head> van de app pagina zet.
+    
+    Het script draait in een component iframe en schrijft naar het parent
+    document. Een eerder geïnjecteerde, verouderde bundle wordt vervangen.
+    """
+    return f"""
+    <script>
+        (function() {{
+            const doc = window.parent.document;
+            const bundleId = "stan-styles-{bundle_hash}";
+            if (doc.getElementById(bundleId)) {{
+                return;
+            }}
+            doc.querySelectorAll("style[data-stan-bundle]").forEach(function(el) {{
+                el.remove();
+            }});
+            const style = doc.createElement("style");
+            style.id = bundleId;
+            style.setAttribute("data-stan-bundle", "{bundle_hash}");
+            style.textContent = {json.dumps(css)};
+            doc.head.appendChild(style);
+        }})();
+    </script>
+    """
+
+
 def apply_styles():
     """
     Past de CSS-stijlen toe op de huidige Streamlit app.
     
-    Deze functie genereert de CSS-stijlen en past ze toe op de app
-    via st.markdown() met unsafe_allow_html=True.
+    In de "once" modus wordt de bundle alleen bij de eerste run van een
+    browsersessie in de <head> van de pagina gezet; volgende reruns sturen
+    geen CSS meer mee. In de "every_run" modus wordt de bundle bij elke rerun
+    via st.markdown() meegestuurd.
+    """
+    import streamlit as st
+    
+    css, bundle_hash = get_style_bundle()
+    
+    if STYLE_INJECTION_MODE != "once":
+        st.markdown(load_styles(), unsafe_allow_html=True)
+        return
+    
+    if st.session_state.get(INJECTED_BUNDLE_KEY) == bundle_hash:
+        return
+    
+    # st.iframe vervangt components.html in nieuwere Streamlit versies
+    if hasattr(st, "iframe"):
+        st.iframe(_injection_script(css, bundle_hash), height="content")
+    else:
+        import streamlit.components.v1 as components
+        components.html(_injection_script(css, bundle_hash), height=0)
+    st.session_state[INJECTED_BUNDLE_KEY] = bundle_hash
+
+
+def typewriter_html(quote_text, char_ms=TYPEWRITER_CHAR_MS, max_ms=TYPEWRITER_MAX_MS):
+    """
+    Zet een uitspraak om in woorden met elk een eigen animation-delay.
+    
+    De browser onthult de woorden zelf na elkaar; de server stuurt de hele
+    uitspraak in één bericht. Het eerste woord staat er meteen; het tempo
+    volgt het aantal tekens, en lange uitspraken worden versneld zodat het
+    laatste woord uiterlijk na `max_ms` verschijnt.
+    
+    Args:
+        quote_text (str): De tekst van de quote
+        char_ms (int, optional): Milliseconden per teken
+        max_ms (int, optional): Maximale vertraging van het laatste woord
+    
+    Returns:
+        str: Ge-escapete HTML met een <span> per woord
+    """
+    words = quote_text.split()
+    if not words:
+        return ""
+    
+    # Vertraging per woord is de tekenpositie waarop het woord begint
+    total_chars = sum(len(word) + 1 for word in words[:-1])
+    step_ms = min(char_ms, max_ms / total_chars) if total_chars else char_ms
+    spans = []
+    offset = 0
+    for word in words:
+        spans.append(
+            f'<span class="tw-word" style="animation-delay:{round(offset * step_ms)}ms">'
+            f'{html.escape(word)}</span>'
+        )
+        offset += len(word) + 1
+    return " ".join(spans)
+
+
+def _render_quote_html(quote_text, is_new):
+    """Bouwt het HTML fragment voor een uitspraak (zonder cache)."""
+    new_class = "new" if is_new else ""
+    if is_new and QUOTE_DISPLAY_MODE == "typewriter":
+        return f"""
+    <div class="quote-container {new_class}">
+        <p class="quote-text typewriter" aria-label="{html.escape(quote_text)}">{typewriter_html(quote_text)}</p>
+    </div>
+    """
+    return f"""
+    <div class="quote-container {new_class}">
+        <p class="quote-text">{html.escape(quote_text)}</p>
+    </div>
     """
-    css = load_styles()
-    st.markdown(css, unsafe_allow_html=True)
 
 
 def create_quote_html(quote_text, is_new=True):
     """
     Genereert HTML voor een quote met styling.
     
+    De tekst wordt ge-escaped, omdat het fragment via
+    st.markdown(..., unsafe_allow_html=True) naar de browser gaat. Elk fragment
+    wordt één keer opgebouwd en daarna uit de fragment cache gehaald. Met
+    QUOTE_DISPLAY_MODE "typewriter" wordt een nieuwe uitspraak woord voor
+    woord onthuld (zie typewriter_html).
+    
     Args:
         quote_text (str): De tekst van de quote
         is_new (bool, optional): Of de quote nieuw is (voor animatie). Default is True.
@@ -149,16 +337,41 @@ def create_quote_html(quote_text, is_new=True):
     Returns:
         str: HTML-code voor de gestileerde quote
     """
-    new_class = "new" if is_new else ""
-    return f"""
-    <div class="quote-container {new_class}">
-        <p class="quote-text">{quote_text}</p>
-    </div>
+    is_new = bool(is_new)
+    return get_fragment_cache().get_or_render(
+        ("quote", quote_text, is_new),
+        lambda: _render_quote_html(quote_text, is_new)
+    )
+
+
+def prerender_quote_html(quote_texts):
+    """
+    Zet de fragmenten van een reeks uitspraken vooraf in de cache.
+    
+    Per uitspraak worden beide varianten (nieuw en niet nieuw) opgebouwd. Er
+    worden niet meer fragmenten gemaakt dan in de cache passen.
+    
+    Args:
+        quote_texts (iterable): De teksten van de uitspraken
+    
+    Returns:
+        int: Aantal opgebouwde fragmenten
     """
+    cache = get_fragment_cache()
+    rendered = 0
+    for quote_text in quote_texts:
+        if rendered + 2 > cache.max_entries:
+            break
+        for is_new in (False, True):
+            cache.put(("quote", quote_text, is_new), _render_quote_html(quote_text, is_new))
+            rendered += 1
+    return rendered
 
 
 # Voor standalone test
 if __name__ == "__main__":
+    import streamlit as st
+    
     st.title("Styles Test")
     st.write("Dit is een test voor de styles module.")
     
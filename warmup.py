@@ -0,0 +1,290 @@
+"""
+Warm-up Module voor Stan de GitHub Agent.
+
+Deze module verkort de koude start van een Streamlit proces. `warm_up()` laadt
+vooraf de catalogus (met zoekindex), de asset cache (inclusief het publiceren van de robot
+en zijn varianten naar static/), de CSS bundle en eventueel de HTML van de hele catalogus
+(STAN_HTML_PRERENDER=1), en importeert de Streamlit modules van de app.
+Met `python warmup.py serve` gebeurt dat in hetzelfde proces vóórdat de
+Streamlit server start, zodat de eerste bezoeker er niet op hoeft te wachten.
+
+Daarnaast maakt `python warmup.py profile` een import-time rapport (via
+`python -X importtime`) en controleert het dat de pure logica zonder Streamlit
+te importeren is. Met --baseline wordt het rapport vergeleken met een eerdere
+meting en eindigt het script met exitcode 1 bij een regressie.
+
+Gebruik:
+    python warmup.py serve --port 8501
+    python warmup.py profile --output import_profile.json
+    python warmup.py profile --baseline import_profile.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from constants import (
+    BASE_DIR, ROBOT_IMAGE_PATH, QUOTE_WEIGHTED, CLIENT_QUOTE_MODE, HTML_PRERENDER, ASSET_VARIANTS
+)
+
+
+# Pad naar de app
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+# Modules met pure logica; die mogen Streamlit niet importeren
+CORE_MODULES = (
+    "quote_generator", "quote_service", "quote_store", "quote_sampler",
+    "quote_selection", "styles", "asset_registry", "metrics",
+    "click_analytics", "state_backend", "asset_build", "click_limiter", "quote_search",
+    "catalog_reload", "compact_catalog", "replay",
+)
+
+# Streamlit modules van de app die vooraf worden geïmporteerd
+GLUE_MODULES = ("robot_component", "quote_session", "client_quotes", "robot_display")
+
+# Toegestane verslechtering van de import-tijd ten opzichte van de baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Aantal metingen per profiel (de snelste telt)
+DEFAULT_REPEAT = 5
+
+
+def warm_up(preload_modules=True):
+    """
+    Laadt de procesbrede caches vóór de eerste aanvraag.
+
+    Args:
+        preload_modules (bool, optional): Importeer ook de Streamlit modules van de app
+
+    Returns:
+        dict: Duur per stap in milliseconden
+    """
+    timings = {}
+
+    def step(name, function):
+        start = time.perf_counter()
+        function()
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def load_catalog():
+        from quote_store import get_quote_store
+        store = get_quote_store()
+        len(store)
+        if QUOTE_WEIGHTED:
+            from quote_selection import get_selection_engine
+            get_selection_engine().get_table(store)
+
+    def load_search_index():
+        from quote_search import get_search_index
+        get_search_index()
+
+    def load_assets():
+        import asset_registry
+        registry = asset_registry.get_registry()
+        registry.get(ROBOT_IMAGE_PATH)
+        registry.get_image_src(ROBOT_IMAGE_PATH)
+        if ASSET_VARIANTS:
+            import asset_build
+            asset_build.ensure_variants(ROBOT_IMAGE_PATH)
+
+    def load_styles():
+        import styles
+        styles.get_style_bundle()
+
+    def prerender_html():
+        import styles
+        from quote_store import get_quote_store
+        store = get_quote_store()
+        styles.prerender_quote_html(store[index] for index in range(len(store)))
+
+    def load_modules():
+        for module_name in GLUE_MODULES:
+            importlib.import_module(module_name)
+
+    def load_client_pages():
+        import client_quotes
+        client_quotes.get_page(0)
+
+    step("catalog", load_catalog)
+    step("search_index", load_search_index)
+    step("assets", load_assets)
+    step("css_bundle", load_styles)
+    if HTML_PRERENDER:
+        step("html_fragments", prerender_html)
+    if preload_modules:
+        step("modules", load_modules)
+    if CLIENT_QUOTE_MODE:
+        step("client_pages", load_client_pages)
+    return timings
+
+
+def parse_importtime(output):
+    """
+    Leest de uitvoer van `python -X importtime`.
+
+    Args:
+        output (str): De stderr van het proces
+
+    Returns:
+        dict: Modulenaam naar (eigen tijd, cumulatieve tijd) in milliseconden
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if own.isdigit():
+            modules[name] = (int(own) / 1000, int(cumulative) / 1000)
+    return modules
+
+
+def profile_imports(module="app", repeat=DEFAULT_REPEAT):
+    """
+    Meet de import-tijd van een module in een nieuw Python proces.
+
+    De meting wordt `repeat` keer herhaald; de snelste run telt, omdat
+    uitschieters vrijwel altijd door de rest van het systeem komen.
+
+    Args:
+        module (str, optional): Module of komma-gescheiden modules om te importeren
+        repeat (int, optional): Aantal metingen
+
+    Returns:
+        dict: Modulenaam naar (eigen tijd, cumulatieve tijd) in milliseconden
+    """
+    statement = "; ".join(f"import {name.strip()}" for name in module.split(","))
+    best = None
+    for _ in range(max(repeat, 1)):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        )
+        profile = parse_importtime(result.stderr)
+        if best is None or _total_ms(profile) < _total_ms(best):
+            best = profile
+    return best
+
+
+def _total_ms(profile):
+    """Totale import-tijd van een profiel in milliseconden."""
+    return sum(own for own, _ in profile.values())
+
+
+def build_report(top=15, repeat=DEFAULT_REPEAT):
+    """
+    Maakt het import-time rapport voor de app en voor de pure logica.
+
+    Args:
+        top (int, optional): Aantal traagste modules in het rapport
+        repeat (int, optional): Aantal metingen per profiel
+
+    Returns:
+        dict: Het rapport, klaar om als JSON weg te schrijven
+    """
+    project_modules = {name[:-3] for name in os.listdir(BASE_DIR) if name.endswith(".py")}
+
+    app_profile = profile_imports("app", repeat)
+    core_profile = profile_imports(",".join(CORE_MODULES), repeat)
+
+    slowest = sorted(app_profile.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    own_modules = sorted(
+        ((name, times) for name, times in app_profile.items() if name in project_modules),
+        key=lambda item: item[1][1], reverse=True
+    )
+
+    return {
+        "app_import_ms": round(_total_ms(app_profile), 1),
+        "core_import_ms": round(_total_ms(core_profile), 1),
+        "core_imports_streamlit": "streamlit" in core_profile,
+        "project_modules_ms": {name: round(cumulative, 2) for name, (_, cumulative) in own_modules},
+        "slowest_modules_ms": {name: round(own, 2) for name, (own, _) in slowest},
+        "python": sys.version.split()[0],
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Vergelijkt een rapport met een eerder rapport.
+
+    Args:
+        report (dict): Het nieuwe rapport
+        baseline (dict): Het eerder opgeslagen rapport
+        tolerance (float, optional): Toegestane relatieve verslechtering
+
+    Returns:
+        list: Beschrijvingen van de gevonden regressies
+    """
+    regressions = []
+    for name in ("app_import_ms", "core_import_ms"):
+        previous = baseline.get(name)
+        if previous and report[name] > previous * (1 + tolerance):
+            regressions.append(f"{name}: {previous} -> {report[name]}")
+    if report["core_imports_streamlit"] and not baseline.get("core_imports_streamlit"):
+        regressions.append("de pure logica importeert nu Streamlit")
+    return regressions
+
+
+def serve(port=None):
+    """
+    Warmt het proces op en start daarna de Streamlit server in hetzelfde proces.
+
+    Args:
+        port (int, optional): Poort van de server; standaard die uit de Streamlit config
+    """
+    from streamlit.web import bootstrap
+
+    # Eerst de config laden, zodat de modules van de app die al zien
+    flag_options = {"server_port": port} if port else {}
+    bootstrap.load_config_options(flag_options=flag_options)
+
+    timings = warm_up()
+    print(f"Warm-up klaar: {timings}")
+
+    bootstrap.run(APP_PATH, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-up en import-time profiel voor Stan de GitHub Agent")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    subcommands.add_parser("warm", help="Laad de caches en toon de duur per stap")
+
+    serve_parser = subcommands.add_parser("serve", help="Warm op en start de Streamlit server")
+    serve_parser.add_argument("--port", type=int, help="Poort van de server")
+
+    profile_parser = subcommands.add_parser("profile", help="Maak een import-time rapport")
+    profile_parser.add_argument("--top", type=int, default=15, help="Aantal traagste modules")
+    profile_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Aantal metingen per profiel")
+    profile_parser.add_argument("--output", help="Schrijf het rapport als JSON naar dit bestand")
+    profile_parser.add_argument("--baseline", help="Vergelijk met het rapport in dit JSON bestand")
+    profile_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                                help="Toegestane relatieve verslechtering ten opzichte van de baseline")
+    arguments = parser.parse_args()
+
+    if arguments.command == "warm":
+        print(json.dumps(warm_up(), indent=2))
+
+    elif arguments.command == "serve":
+        serve(arguments.port)
+
+    else:
+        report = build_report(arguments.top, arguments.repeat)
+        print(json.dumps(report, indent=2))
+
+        if arguments.output:
+            with open(arguments.output, "w", encoding="utf-8") as output_file:
+                json.dump(report, output_file, indent=2)
+            print(f"Rapport geschreven naar {arguments.output}")
+
+        if arguments.baseline:
+            with open(arguments.baseline, encoding="utf-8") as baseline_file:
+                regressions = compare_to_baseline(report, json.load(baseline_file), arguments.tolerance)
+            if regressions:
+                print("Regressies gevonden:")
+                for regression in regressions:
+                    print(f"  - {regression}")
+                sys.exit(1)
+            print("Geen regressies ten opzichte van de baseline")